@@ -0,0 +1,149 @@
+"""
+Compare blocking and async database sessions under concurrent requests.
+
+Each simulated request runs inside the event loop the way a route does: most
+read one user by primary key, every ``--write-every`` request inserts one.
+The "blocking" run uses a synchronous ``Session`` inside ``async def`` (the
+old ``get_session``), the "async" run uses ``database.get_session``.
+
+While the requests run, a heartbeat task measures how late the event loop
+wakes it up, which is how long any other request would have been frozen.
+
+Usage::
+
+    python benchmarks/bench_async_db.py --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from common import percentile, setup
+
+
+async def heartbeat(lags: list[float], stop: asyncio.Event) -> None:
+    """
+    Record how late the event loop schedules a 1 ms sleep.
+
+    Parameters
+    ----------
+    lags : list[float]
+        Collected lag samples in seconds.
+    stop : asyncio.Event
+        Set when the measurement should end.
+    """
+    interval = 0.001
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run(name, request, total: int, concurrency: int) -> None:
+    """
+    Drive ``total`` requests with bounded concurrency and print the result.
+
+    Parameters
+    ----------
+    name : str
+        The label of the run.
+    request : Callable[[int], Awaitable[None]]
+        Coroutine function performing one request.
+    total : int
+        The number of requests.
+    concurrency : int
+        The number of requests in flight at the same time.
+    """
+    lags: list[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(number: int) -> None:
+        async with semaphore:
+            await request(number)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded(number) for number in range(total)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    print(
+        f"{name:<9} {total / elapsed:>9.1f} req/s   "
+        f"loop lag p50 {percentile(lags, 0.50) * 1000:>7.2f} ms   "
+        f"p99 {percentile(lags, 0.99) * 1000:>7.2f} ms   "
+        f"max {max(lags, default=0.0) * 1000:>7.2f} ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Seed a temporary database and benchmark both session kinds.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        setup(path)
+
+        from database import create_db_and_tables, dispose, get_session
+        from database.models.user import User, UserRole
+        from sqlmodel import Session, create_engine
+
+        await create_db_and_tables()
+        sync_engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False}
+        )
+        with Session(sync_engine) as session:
+            session.add_all(
+                User(
+                    username=f"seed{n}", password_hash="x", role=UserRole.user
+                )
+                for n in range(args.users)
+            )
+            session.commit()
+
+        def new_user(prefix: str, number: int) -> User:
+            return User(
+                username=f"{prefix}{number}",
+                password_hash="x",
+                role=UserRole.member,
+            )
+
+        async def blocking_request(number: int) -> None:
+            with Session(sync_engine) as session:
+                if number % args.write_every == 0:
+                    session.add(new_user("blocking", number))
+                    session.commit()
+                else:
+                    session.get(User, random.randint(1, args.users))
+
+        async def async_request(number: int) -> None:
+            async for session in get_session():
+                if number % args.write_every == 0:
+                    session.add(new_user("async", number))
+                    await session.commit()
+                else:
+                    await session.get(User, random.randint(1, args.users))
+
+        await run(
+            "blocking", blocking_request, args.requests, args.concurrency
+        )
+        await run("async", async_request, args.requests, args.concurrency)
+        sync_engine.dispose()
+        await dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--write-every", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,388 @@
+"""
+Stress concurrent booking creation and check that nothing is double-booked.
+
+Thousands of ``POST /bookings`` requests are fired at the app in-process,
+all competing for a handful of slots per place, so most of them conflict.
+The run is repeated against a single place and against many, in different
+weeks of the same database.
+
+The last run starts ``cli.serve`` with several worker processes on its own
+database and races weekly ``POST /bookings/series`` requests against
+single bookings over the weeks the series cover, so the workers' in-memory
+indexes are behind each other's writes all the time.
+
+Afterwards the stored active bookings and series occurrences are read back
+and the peak usage of every place is checked never to exceed its capacity.
+The benchmark fails if any place is overbooked or any request is answered
+with something else than 201 or 409.
+
+Usage::
+
+    python benchmarks/bench_booking_race.py --requests 5000 --places 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from common import API_PATH, app_client, setup
+
+# Runs cli.serve in a fresh interpreter against the benchmark's database
+SERVER = """
+import sys
+sys.path.insert(0, {api_path!r})
+from properties import config
+config.database.update_entry("url", {url!r}, source="benchmark")
+config.logging.update_entry("path", {logs!r}, source="benchmark")
+from cli.serve import main
+sys.argv = ["cli.serve", "--host", "127.0.0.1", "--port", "{port}",
+            "--workers", "{workers}"]
+sys.exit(main())
+"""
+
+
+async def seed(client, places: int) -> None:
+    """
+    Create the user and the places the bookings are made for.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        The client bound to the app.
+    places : int
+        The number of places.
+    """
+    await client.post(
+        "/users",
+        json={"username": "bench", "password": "x", "role": "user"},
+    )
+    for number in range(1, places + 1):
+        response = await client.post(
+            "/places",
+            json={
+                "name": f"place{number}",
+                "allow_partial_booking": number % 3 != 0,
+            },
+        )
+        response.raise_for_status()
+
+
+async def storm(
+    client,
+    args: argparse.Namespace,
+    places: int,
+    week: int,
+    series_share: float = 0.0,
+) -> Counter:
+    """
+    Fire the booking requests and count the response codes.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        The client bound to the app or the server.
+    args : argparse.Namespace
+        The parsed command line arguments.
+    places : int
+        The number of places the requests are spread over.
+    week : int
+        The first week the requests are made for, to keep the runs apart.
+    series_share : float, optional
+        The share of requests creating a weekly series instead of a single
+        booking, by default none. With series, single bookings are spread
+        over the weeks the series cover.
+
+    Returns
+    -------
+    Counter
+        The number of responses per status code.
+    """
+    semaphore = asyncio.Semaphore(args.concurrency)
+    start = datetime(2030, 1, 7, 8) + timedelta(weeks=week)
+    weeks = args.series_weeks if series_share else 1
+    codes: Counter = Counter()
+
+    async def book() -> None:
+        slot = start + timedelta(hours=random.randrange(args.slots))
+        body = {
+            "user_id": 1,
+            "place_id": random.randint(1, places),
+            "booked_area": random.choice(["full", "half", "quarter"]),
+        }
+        if random.random() < series_share:
+            path = "/bookings/series"
+            body["frequency"] = "weekly"
+            body["until"] = (slot + timedelta(weeks=weeks - 1)).date()
+        else:
+            path = "/bookings"
+            slot += timedelta(weeks=random.randrange(weeks))
+        body["start_time"] = slot
+        body["end_time"] = slot + timedelta(minutes=90)
+        async with semaphore:
+            response = await client.post(
+                path, content=json.dumps(body, default=str)
+            )
+        codes[response.status_code] += 1
+
+    await asyncio.gather(*(book() for _ in range(args.requests)))
+    return codes
+
+
+def report(label: str, codes: Counter, elapsed: float) -> bool:
+    """
+    Print the outcome of a storm.
+
+    Parameters
+    ----------
+    label : str
+        What the storm ran against.
+    codes : Counter
+        The number of responses per status code.
+    elapsed : float
+        The duration of the storm in seconds.
+
+    Returns
+    -------
+    bool
+        True if any response was neither created nor a conflict.
+    """
+    other = sum(codes.values()) - codes[201] - codes[409]
+    print(
+        f"{label:<22} "
+        f"{sum(codes.values()) / elapsed:>8.1f} req/s  "
+        f"created {codes[201]:>5}  "
+        f"conflicts {codes[409]:>5}  other {other:>3}"
+    )
+    if other:
+        unexpected = {
+            code: count
+            for code, count in codes.items()
+            if code not in {201, 409}
+        }
+        print(f"  unexpected responses: {unexpected}")
+    return bool(other)
+
+
+def overbooked(path: Path) -> list[int]:
+    """
+    Find the places whose stored bookings exceed the capacity.
+
+    Parameters
+    ----------
+    path : Path
+        The SQLite file.
+
+    Returns
+    -------
+    list[int]
+        The IDs of the overbooked places.
+    """
+    from database.cache.availability import CAPACITY, peak_units, units_for
+    from database.models.booking import BookedArea
+    from database.models.booking_series import BookingSeries, Frequency
+    from database.recurrence import occurrences
+
+    bookings = defaultdict(list)
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute(
+            "SELECT place_id, start_time, end_time, booked_area, "
+            "allow_partial_booking FROM booking "
+            "JOIN place ON place.id = booking.place_id "
+            "WHERE status = 'active'"
+        )
+        for place_id, start, end, area, partial in rows:
+            bookings[place_id].append(
+                (
+                    datetime.fromisoformat(start),
+                    datetime.fromisoformat(end),
+                    units_for(BookedArea[area], bool(partial)),
+                )
+            )
+        rows = connection.execute(
+            "SELECT place_id, start_time, end_time, booked_area, "
+            "frequency, until, exceptions, allow_partial_booking "
+            "FROM booking_series "
+            "JOIN place ON place.id = booking_series.place_id "
+            "WHERE status = 'active'"
+        )
+        for row in rows:
+            place_id, start, end, area, frequency, until, skipped, partial = (
+                row
+            )
+            series = BookingSeries(
+                start_time=datetime.fromisoformat(start),
+                end_time=datetime.fromisoformat(end),
+                frequency=Frequency[frequency],
+                until=date.fromisoformat(until),
+                exceptions=json.loads(skipped),
+            )
+            units = units_for(BookedArea[area], bool(partial))
+            bookings[place_id].extend(
+                (begin, finish, units)
+                for _, begin, finish in occurrences(series)
+            )
+    return [
+        place_id
+        for place_id, intervals in bookings.items()
+        if peak_units(intervals, datetime.min, datetime.max) > CAPACITY
+    ]
+
+
+def free_port() -> int:
+    """
+    Find a free local TCP port.
+
+    Returns
+    -------
+    int
+        The port number.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def served(directory: Path, workers: int) -> AsyncIterator:
+    """
+    Run ``cli.serve`` on a new database and yield a client for it.
+
+    Parameters
+    ----------
+    directory : Path
+        A temporary directory for the database and the logs.
+    workers : int
+        The number of worker processes.
+
+    Yields
+    ------
+    httpx.AsyncClient
+        The client, sending requests to the server over TCP.
+    """
+    import httpx
+
+    port = free_port()
+    code = SERVER.format(
+        api_path=str(API_PATH),
+        url=f"sqlite+aiosqlite:///{directory / 'served.db'}",
+        logs=str(directory / "served-logs"),
+        port=port,
+        workers=workers,
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        cwd=directory,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=60
+        ) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError("The server exited on startup")
+                try:
+                    response = await client.get("/places")
+                    if response.status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("The server did not start in time")
+                await asyncio.sleep(0.2)
+            yield client
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def main(args: argparse.Namespace) -> int:
+    """
+    Run the storms and verify the stored bookings.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    Returns
+    -------
+    int
+        The exit code, 1 if any place is overbooked or any response was
+        unexpected.
+    """
+    random.seed(args.seed)
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        setup(path)
+
+        async with app_client() as client:
+            await seed(client, args.places)
+            for week, places in enumerate((1, args.places)):
+                started = time.perf_counter()
+                codes = await storm(client, args, places, week)
+                failed |= report(
+                    f"in-process {places:>4} places",
+                    codes,
+                    time.perf_counter() - started,
+                )
+        bad = overbooked(path)
+
+        if args.workers:
+            async with served(Path(directory), args.workers) as client:
+                await seed(client, args.places)
+                started = time.perf_counter()
+                codes = await storm(
+                    client, args, args.places, 0, args.series_share
+                )
+                failed |= report(
+                    f"{args.workers} workers {args.places:>4} places",
+                    codes,
+                    time.perf_counter() - started,
+                )
+            bad += overbooked(Path(directory) / "served.db")
+    print(f"overbooked places: {bad or 'none'}")
+    return int(failed or bool(bad))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--places", type=int, default=50)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="server workers of the last run, 0 to skip it",
+    )
+    parser.add_argument(
+        "--series-share",
+        type=float,
+        default=0.3,
+        help="share of the last run's requests creating a series",
+    )
+    parser.add_argument(
+        "--series-weeks",
+        type=int,
+        default=4,
+        help="weeks covered by each series of the last run",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,209 @@
+"""
+Compare user write throughput with and without group commit.
+
+Concurrent ``POST /users`` and ``PUT /users/{id}`` requests are fired at
+the app in-process, first committing each write on its own, then through
+the group commit writer. Some usernames are repeated, so part of the
+creates fail with 400 while the rest of their batch is committed. After
+each run, the stored users are checked against the responses.
+
+The scrypt cost is lowered for the run, so hashing does not hide the
+commits. ``--synchronous FULL`` makes every commit wait for an fsync.
+
+Usage::
+
+    python benchmarks/bench_group_commit.py --requests 3000
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Awaitable
+from pathlib import Path
+
+from common import app_client, setup
+
+
+async def send(request: Awaitable) -> int | str:
+    """
+    Send a request, catching the errors the app raises.
+
+    Parameters
+    ----------
+    request : Awaitable
+        The request.
+
+    Returns
+    -------
+    int | str
+        The status code, or the name of the error, e.g. when waiting for
+        the database lock timed out.
+    """
+    try:
+        response = await request
+    except Exception as err:
+        return type(err).__name__
+    return response.status_code
+
+
+async def storm(client, args: argparse.Namespace, run: int) -> Counter:
+    """
+    Fire the write requests and count the response codes.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        The client bound to the app.
+    args : argparse.Namespace
+        The parsed command line arguments.
+    run : int
+        The run number, to keep the usernames of the runs apart.
+
+    Returns
+    -------
+    Counter
+        The number of responses per operation and status code.
+    """
+    semaphore = asyncio.Semaphore(args.concurrency)
+    codes: Counter = Counter()
+
+    async def create() -> None:
+        # Drawn from fewer names than requests, so some are taken
+        name = f"run{run}-{random.randrange(args.requests * 9 // 10)}"
+        body = {"username": name, "password": "x", "role": "user"}
+        async with semaphore:
+            codes["create", await send(client.post("/users", json=body))] += 1
+
+    async def update() -> None:
+        url = f"/users/{random.randint(1, args.users)}"
+        body = {"role": random.choice(["user", "member", "leader"])}
+        async with semaphore:
+            codes["update", await send(client.put(url, json=body))] += 1
+
+    await asyncio.gather(
+        *(
+            create() if random.random() < args.creates else update()
+            for _ in range(args.requests)
+        )
+    )
+    return codes
+
+
+def count_writes(path: Path) -> tuple[int, int]:
+    """
+    Count the stored users and the updates made to them.
+
+    Parameters
+    ----------
+    path : Path
+        The SQLite file.
+
+    Returns
+    -------
+    tuple[int, int]
+        The number of users and the sum of their versions past the first.
+    """
+    with sqlite3.connect(path) as connection:
+        return connection.execute(
+            "SELECT count(*), sum(version - 1) FROM user"
+        ).fetchone()
+
+
+async def main(args: argparse.Namespace) -> int:
+    """
+    Run the storm with and without group commit.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    Returns
+    -------
+    int
+        The exit code, 1 if the stored users do not match the responses.
+    """
+    random.seed(args.seed)
+    consistent = True
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        setup(path)
+
+        import database.group_commit
+        from database import engine
+        from database.group_commit import GroupCommitWriter
+        from properties import config
+        from utils.passwords import password_hasher
+
+        config.database.sqlite.update_entry(
+            "synchronous", args.synchronous, source="benchmark"
+        )
+
+        password_hasher.n = 16
+        writers = {
+            "single": None,
+            "grouped": GroupCommitWriter(
+                engine, args.max_batch, args.max_wait_ms / 1000
+            ),
+        }
+        async with app_client() as client:
+            for number in range(args.users):
+                await client.post(
+                    "/users",
+                    json={
+                        "username": f"seed{number}",
+                        "password": "x",
+                        "role": "user",
+                    },
+                )
+        for run, (name, writer) in enumerate(writers.items()):
+            database.group_commit.group_commit = writer
+            users, versions = count_writes(path)
+            async with app_client() as client:
+                started = time.perf_counter()
+                codes = await storm(client, args, run)
+                elapsed = time.perf_counter() - started
+            stored_users, stored_versions = count_writes(path)
+            ok = (
+                stored_users - users == codes["create", 201]
+                and stored_versions - versions == codes["update", 200]
+            )
+            consistent &= ok
+            other = sum(codes.values()) - sum(
+                codes[operation, code]
+                for operation, code in (
+                    ("create", 201),
+                    ("create", 400),
+                    ("update", 200),
+                )
+            )
+            print(
+                f"{name:<8} {args.requests / elapsed:>8.1f} writes/s  "
+                f"created {codes['create', 201]:>5}  "
+                f"taken {codes['create', 400]:>4}  "
+                f"updated {codes['update', 200]:>5}  other {other:>3}  "
+                f"{'consistent' if ok else 'INCONSISTENT'}"
+            )
+    return int(not consistent)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument(
+        "--creates", type=float, default=0.5, help="share of creates"
+    )
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2)
+    parser.add_argument(
+        "--synchronous", choices=["OFF", "NORMAL", "FULL"], default="NORMAL"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
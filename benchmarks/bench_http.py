@@ -0,0 +1,449 @@
+"""
+Load-test the API in-process and compare the result with a baseline.
+
+The app from ``main`` is served through the httpx ASGI transport against a
+temporary SQLite file, so no server, network or external service is
+needed. After seeding users and places, each scenario sends a weighted mix
+of requests from ``--concurrency`` concurrent clients and reports the
+throughput and the p50/p95/p99 latency, overall and per operation. The
+latencies include the httpx client, which is the same on every run.
+
+With ``--save`` the result becomes the baseline, kept in
+``benchmarks/results`` and not committed, as it only holds for the machine
+it was recorded on. Otherwise it is compared with the baseline, if there
+is one, and a drop in throughput or a rise in p50/p95 latency beyond
+``--threshold`` is reported as a regression and makes the script exit
+with status 1. p99 is shown but not gated, as the tail of an in-process
+run mostly follows the garbage collector.
+
+Usage::
+
+    python benchmarks/bench_http.py --save
+    python benchmarks/bench_http.py --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from common import (
+    RESULTS_PATH,
+    app_client,
+    git_revision,
+    latency_summary,
+    setup,
+)
+
+BASELINE = RESULTS_PATH / "http.json"
+START = datetime(2030, 1, 7)
+HORIZON_DAYS = 180
+# The metrics compared with the baseline, and whether higher is better
+GATED = {"requests_per_second": True, "p50_ms": False, "p95_ms": False}
+
+
+class Workload:
+    """The rows the requests of a run pick from and add to."""
+
+    def __init__(self, users: int, places: int, rng: random.Random) -> None:
+        """
+        Start from the seeded rows.
+
+        Parameters
+        ----------
+        users : int
+            The number of seeded users, with IDs from 1.
+        places : int
+            The number of seeded places, with IDs from 1.
+        rng : random.Random
+            The random generator of the run.
+        """
+        self.users = list(range(1, users + 1))
+        self.places = places
+        self.bookings: list[int] = []
+        self.rng = rng
+        self.numbers = itertools.count()
+
+
+async def create_user(client, workload: Workload):
+    """Create a user."""
+    response = await client.post(
+        "/users",
+        json={
+            "username": f"load{next(workload.numbers)}",
+            "password": "x",
+            "role": "user",
+        },
+    )
+    if response.status_code == 201:
+        workload.users.append(response.json()["id"])
+    return response
+
+
+async def read_user(client, workload: Workload):
+    """Read a random user."""
+    return await client.get(f"/users/{workload.rng.choice(workload.users)}")
+
+
+async def update_user(client, workload: Workload):
+    """Change the role of a random user."""
+    return await client.put(
+        f"/users/{workload.rng.choice(workload.users)}",
+        json={"role": workload.rng.choice(["user", "admin"])},
+    )
+
+
+async def list_users(client, workload: Workload):
+    """Read a page of users from a random point."""
+    after = workload.rng.randrange(len(workload.users))
+    return await client.get("/users", params={"after": after, "limit": 50})
+
+
+async def list_places(client, workload: Workload):
+    """Read all places."""
+    return await client.get("/places")
+
+
+async def place_occupancy(client, workload: Workload):
+    """Read a week of occupancy of a random place."""
+    first = START + timedelta(days=workload.rng.randrange(HORIZON_DAYS))
+    return await client.get(
+        f"/places/{workload.rng.randint(1, workload.places)}/occupancy",
+        params={
+            "from": first.date().isoformat(),
+            "to": (first + timedelta(days=6)).date().isoformat(),
+        },
+    )
+
+
+async def create_booking(client, workload: Workload):
+    """Book a random place at a random time."""
+    rng = workload.rng
+    start = START + timedelta(
+        days=rng.randrange(HORIZON_DAYS), hours=rng.randint(7, 20)
+    )
+    response = await client.post(
+        "/bookings",
+        json={
+            "user_id": rng.choice(workload.users),
+            "place_id": rng.randint(1, workload.places),
+            "start_time": start.isoformat(),
+            "end_time": (
+                start + timedelta(minutes=rng.choice((30, 60, 90, 120)))
+            ).isoformat(),
+            "booked_area": rng.choice(["full", "half", "quarter"]),
+        },
+    )
+    if response.status_code == 201:
+        workload.bookings.append(response.json()["id"])
+    return response
+
+
+async def read_booking(client, workload: Workload):
+    """Read a random booking, or the places if there is none yet."""
+    if not workload.bookings:
+        return await list_places(client, workload)
+    return await client.get(
+        f"/bookings/{workload.rng.choice(workload.bookings)}"
+    )
+
+
+Operation = Callable[..., Awaitable]
+
+# Each operation with the status codes it may answer with
+OPERATIONS: dict[str, tuple[Operation, set[int]]] = {
+    "create user": (create_user, {201}),
+    "read user": (read_user, {200}),
+    "update user": (update_user, {200}),
+    "list users": (list_users, {200}),
+    "list places": (list_places, {200}),
+    "place occupancy": (place_occupancy, {200}),
+    # A conflict is a normal outcome when the slot is taken
+    "create booking": (create_booking, {201, 409}),
+    "read booking": (read_booking, {200}),
+}
+
+# The weight of each operation in a scenario
+SCENARIOS: dict[str, dict[str, int]] = {
+    "users": {"create user": 1, "read user": 6, "update user": 2},
+    "lists": {"list users": 3, "list places": 1, "place occupancy": 2},
+    "bookings": {"create booking": 3, "read booking": 2},
+    "mixed": {
+        "create user": 1,
+        "read user": 8,
+        "update user": 1,
+        "list users": 3,
+        "list places": 1,
+        "place occupancy": 2,
+        "create booking": 3,
+        "read booking": 3,
+    },
+}
+
+
+async def seed(client, path: Path, users: int, places: int) -> None:
+    """
+    Create the users and places the scenarios start from.
+
+    The users are inserted directly, as hashing thousands of passwords
+    would make up most of the run.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        The client bound to the app.
+    path : Path
+        The SQLite file.
+    users : int
+        The number of users to create.
+    places : int
+        The number of places to create.
+    """
+    with sqlite3.connect(path) as connection:
+        connection.executemany(
+            "INSERT INTO user (username, password_hash, role) "
+            "VALUES (?, 'x', 'user')",
+            ((f"seed{n}",) for n in range(users)),
+        )
+    for number in range(1, places + 1):
+        response = await client.post(
+            "/places",
+            json={
+                "name": f"place{number}",
+                "allow_partial_booking": number % 3 != 0,
+            },
+        )
+        response.raise_for_status()
+
+
+async def run(
+    client,
+    workload: Workload,
+    weights: dict[str, int],
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """
+    Send a mix of requests and measure them.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        The client bound to the app.
+    workload : Workload
+        The rows to pick from.
+    weights : dict[str, int]
+        The weight of each operation.
+    requests : int
+        The number of requests to send.
+    concurrency : int
+        The number of clients sending them.
+
+    Returns
+    -------
+    dict
+        The throughput, the latency percentiles, the number of unexpected
+        responses and the same figures per operation.
+    """
+    plan = iter(
+        workload.rng.choices(
+            list(weights), weights=list(weights.values()), k=requests
+        )
+    )
+    samples: dict[str, list[float]] = defaultdict(list)
+    errors: Counter = Counter()
+
+    async def client_loop() -> None:
+        # The clients share the plan, each takes the next request when done
+        for name in plan:
+            operation, expected = OPERATIONS[name]
+            started = time.perf_counter()
+            response = await operation(client, workload)
+            samples[name].append(time.perf_counter() - started)
+            if response.status_code not in expected:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests_per_second": round(requests / elapsed, 1),
+        **latency_summary(list(itertools.chain(*samples.values()))),
+        "errors": sum(errors.values()),
+        "operations": {
+            name: {
+                "count": len(samples[name]),
+                **latency_summary(samples[name]),
+                "errors": errors[name],
+            }
+            for name in sorted(samples)
+        },
+    }
+
+
+def regressions(
+    results: dict[str, dict], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    """
+    Compare the gated metrics of each scenario with the baseline.
+
+    Parameters
+    ----------
+    results : dict[str, dict]
+        The current result per scenario.
+    baseline : dict[str, dict]
+        The baseline result per scenario.
+    threshold : float
+        The tolerated relative change, e.g. 0.1 for 10%.
+
+    Returns
+    -------
+    list[str]
+        A description of each metric beyond the threshold.
+    """
+    found = []
+    for scenario, result in results.items():
+        if scenario not in baseline:
+            continue
+        for metric, higher_is_better in GATED.items():
+            before, now = baseline[scenario][metric], result[metric]
+            if not before:
+                continue
+            change = now / before - 1
+            if (-change if higher_is_better else change) > threshold:
+                found.append(
+                    f"{scenario} {metric}: {before} -> {now} ({change:+.1%})"
+                )
+    return found
+
+
+def report(scenario: str, result: dict) -> None:
+    """
+    Print the result of a scenario.
+
+    Parameters
+    ----------
+    scenario : str
+        The name of the scenario.
+    result : dict
+        Its result.
+    """
+    print(
+        f"{scenario:<10} {result['requests_per_second']:>8.1f} req/s  "
+        f"p50 {result['p50_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms  "
+        f"p99 {result['p99_ms']:>7.2f} ms  errors {result['errors']}"
+    )
+    for name, figures in result["operations"].items():
+        print(
+            f"  {name:<16} {figures['count']:>6}  "
+            f"p50 {figures['p50_ms']:>7.2f} ms  "
+            f"p95 {figures['p95_ms']:>7.2f} ms  "
+            f"p99 {figures['p99_ms']:>7.2f} ms  errors {figures['errors']}"
+        )
+
+
+async def main(args: argparse.Namespace) -> int:
+    """
+    Run the scenarios, then save or compare the result.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    Returns
+    -------
+    int
+        The exit code, 1 if a regression or an unexpected response was
+        found.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        setup(path)
+        async with app_client() as client:
+            await seed(client, path, args.users, args.places)
+            workload = Workload(
+                args.users, args.places, random.Random(args.seed)
+            )
+            for scenario in args.scenarios:
+                weights = SCENARIOS[scenario]
+                await run(
+                    client, workload, weights, args.warmup, args.concurrency
+                )
+                results[scenario] = await run(
+                    client, workload, weights, args.requests, args.concurrency
+                )
+                report(scenario, results[scenario])
+
+    settings = {
+        key: getattr(args, key)
+        for key in ("requests", "concurrency", "users", "places", "seed")
+    }
+    failed = any(result["errors"] for result in results.values())
+    if args.save:
+        record = {
+            "date": datetime.now(UTC).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "machine": platform.machine(),
+            "settings": settings,
+            "scenarios": results,
+        }
+        args.baseline.parent.mkdir(exist_ok=True)
+        args.baseline.write_text(json.dumps(record, indent=2) + "\n")
+        print(f"baseline saved to {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        print(
+            f"compared with {baseline['revision'] or 'baseline'} "
+            f"from {baseline['date']}"
+        )
+        if baseline["settings"] != settings:
+            print(f"note: the baseline ran with {baseline['settings']}")
+        found = regressions(results, baseline["scenarios"], args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if not found:
+            print(f"no regression beyond {args.threshold:.0%}")
+        failed |= bool(found)
+    return int(failed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+    )
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--warmup", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--places", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="tolerated relative change before a regression is reported",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="save the result as the new baseline instead of comparing",
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
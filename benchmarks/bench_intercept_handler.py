@@ -0,0 +1,58 @@
+"""
+Measure records per second through ``LoggerConstructor.InterceptHandler``.
+
+A standard library logger is routed through the intercept handler into
+loguru, with the console and file formats rendered to sinks that discard
+the output, so the numbers only cover the handler and the formatting.
+
+Usage::
+
+    python benchmarks/bench_intercept_handler.py --records 100000
+"""
+
+import argparse
+import logging
+import time
+
+from common import setup
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Log through the intercept handler and print the throughput.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+    """
+    setup()
+
+    from utils.logging import logger, logger_instance
+    from utils.logging.logging import LoggerConstructor
+
+    def discard(message: str) -> None:
+        pass
+
+    logger.add(discard, level="DEBUG", format=logger_instance._console_format)
+    logger.add(discard, level="DEBUG", format=logger_instance._file_format)
+
+    intercepted = logging.getLogger("sqlalchemy.engine.Engine")
+    intercepted.handlers = [LoggerConstructor.InterceptHandler()]
+    intercepted.propagate = False
+    intercepted.setLevel(logging.DEBUG)
+
+    started = time.perf_counter()
+    for number in range(args.records):
+        intercepted.info("SELECT user.id FROM user WHERE user.id = %s", number)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{args.records / elapsed:>10.0f} records/s   "
+        f"{elapsed / args.records * 1e6:>6.2f} us/record"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100000)
+    main(parser.parse_args())
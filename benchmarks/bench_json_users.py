@@ -0,0 +1,180 @@
+"""
+Compare the response model path and the fast path of ``GET /users``.
+
+For each size a temporary database is seeded with that many users and one
+page holding all of them is requested in-process, first with
+``api.json.fast`` off (column tuples validated into ``UserRead`` and
+encoded by FastAPI) and then on (column tuples encoded by
+``FastJSONResponse``). Both responses are checked to be equal before
+timing. The page is also requested with only ``--fields``, which reads
+and encodes fewer columns.
+
+Usage::
+
+    python benchmarks/bench_json_users.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from common import percentile, setup
+
+
+def seed(path: Path, users: int) -> None:
+    """
+    Create the tables and insert users directly with sqlite3.
+
+    Parameters
+    ----------
+    path : Path
+        The SQLite file.
+    users : int
+        The number of users to insert.
+    """
+    from sqlmodel import SQLModel, create_engine
+
+    sync_engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    with sqlite3.connect(path) as connection:
+        connection.executemany(
+            "INSERT INTO user (username, password_hash, role) "
+            "VALUES (?, 'x', 'user')",
+            ((f"user{n}",) for n in range(users)),
+        )
+
+
+async def fetch(
+    client, size: int, fast: bool, fields: str | None = None
+) -> bytes:
+    """
+    Request one page of ``size`` users.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        The client bound to the app.
+    size : int
+        The page size.
+    fast : bool
+        Whether to use the fast path.
+    fields : str | None, optional
+        The fields to request, by default all.
+
+    Returns
+    -------
+    bytes
+        The response body.
+    """
+    from properties import config
+
+    config.api.json.update_entry("fast", fast, source="benchmark")
+    params = {"limit": size}
+    if fields is not None:
+        params["fields"] = fields
+    response = await client.get("/users", params=params)
+    response.raise_for_status()
+    return response.content
+
+
+async def time_path(
+    client, size: int, fast: bool, repeat: int, fields: str | None = None
+) -> list[float]:
+    """
+    Time requests for one page of ``size`` users.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        The client bound to the app.
+    size : int
+        The page size.
+    fast : bool
+        Whether to use the fast path.
+    repeat : int
+        The number of timed requests.
+    fields : str | None, optional
+        The fields to request, by default all.
+
+    Returns
+    -------
+    list[float]
+        The duration of each request in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fetch(client, size, fast, fields)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Benchmark both paths for each size.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        setup(path)
+
+        import httpx
+        from properties import config
+
+        # The page size limit is read when the router is imported
+        config.api.pagination.update_entry(
+            "max_limit", max(args.sizes), source="benchmark"
+        )
+        from main import app
+        from utils.responses import ORJSON_AVAILABLE
+
+        print(f"orjson available: {ORJSON_AVAILABLE}")
+        seed(path, max(args.sizes))
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                for size in args.sizes:
+                    model_page = await fetch(client, size, fast=False)
+                    fast_page = await fetch(client, size, fast=True)
+                    assert json.loads(model_page) == json.loads(fast_page)
+                    results = {
+                        fast: await time_path(client, size, fast, args.repeat)
+                        for fast in (False, True)
+                    }
+                    sparse = statistics.median(
+                        await time_path(
+                            client, size, False, args.repeat, args.fields
+                        )
+                    )
+                    model = statistics.median(results[False])
+                    fast = statistics.median(results[True])
+                    print(
+                        f"{size:>7} users   "
+                        f"model {model * 1000:>9.1f} ms   "
+                        f"fast {fast * 1000:>9.1f} ms "
+                        f"(p95 {percentile(results[True], 0.95) * 1000:.1f})"
+                        f"   speedup {model / fast:>5.1f}x   "
+                        f"fields={args.fields} {sparse * 1000:>9.1f} ms"
+                    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fields", default="id,username")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,181 @@
+"""
+Show that a storm of password checks does not slow down other requests.
+
+A user is created through the API, then ``GET /users/{id}`` is probed one
+request at a time while ``--logins`` password checks run concurrently,
+the way a login endpoint would await them. The probe latency is compared
+between no storm, a storm through the configured password pool and a
+storm deriving the keys inline on the event loop.
+
+Usage::
+
+    python benchmarks/bench_passwords.py --logins 200 --probes 300
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from common import app_client, latency_summary, setup
+
+PASSWORD = "correct horse battery staple"
+
+
+async def probe(client, count: int, stop: asyncio.Event) -> list[float]:
+    """
+    Time requests to another endpoint, one at a time.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        The client bound to the app.
+    count : int
+        The most requests to time.
+    stop : asyncio.Event
+        Set when the storm is over.
+
+    Returns
+    -------
+    list[float]
+        The latencies in seconds.
+    """
+    samples = []
+    while len(samples) < count and not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/users/1")
+        samples.append(time.perf_counter() - started)
+        response.raise_for_status()
+        await asyncio.sleep(0.001)
+    return samples
+
+
+async def verify_inline(password: str, encoded: str) -> bool:
+    """
+    Check a password on the event loop, as an inline route would.
+
+    Parameters
+    ----------
+    password : str
+        The password.
+    encoded : str
+        The encoded hash.
+
+    Returns
+    -------
+    bool
+        True if the password matches.
+    """
+    _, n, r, p, salt, key = encoded.split("$")
+    key = base64.b64decode(key)
+    derived = hashlib.scrypt(
+        password.encode(),
+        salt=base64.b64decode(salt),
+        n=int(n),
+        r=int(r),
+        p=int(p),
+        maxmem=128 * int(r) * (int(n) + int(p) + 2),
+        dklen=len(key),
+    )
+    return derived == key
+
+
+async def storm(verify, encoded: str, logins: int, concurrency: int) -> None:
+    """
+    Check the password many times concurrently.
+
+    Parameters
+    ----------
+    verify : Callable
+        The coroutine function checking a password.
+    encoded : str
+        The encoded hash.
+    logins : int
+        The number of checks.
+    concurrency : int
+        The number of checks awaited at once.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            if not await verify(PASSWORD, encoded):
+                raise AssertionError("The password did not verify")
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Probe the latency with and without a storm of password checks.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        setup(path)
+
+        from properties import config
+        from utils.passwords import password_hasher
+
+        async with app_client() as client:
+            response = await client.post(
+                "/users",
+                json={
+                    "username": "bench",
+                    "password": PASSWORD,
+                    "role": "user",
+                },
+            )
+            response.raise_for_status()
+            with sqlite3.connect(path) as connection:
+                (encoded,) = connection.execute(
+                    "SELECT password_hash FROM user WHERE id = 1"
+                ).fetchone()
+
+            print(
+                f"scrypt n={password_hasher.n} r={password_hasher.r} "
+                f"p={password_hasher.p}, {config.passwords.workers} "
+                f"{config.passwords.executor} workers"
+            )
+            runs = {
+                "no storm": None,
+                "pool": password_hasher.verify,
+                "inline": verify_inline,
+            }
+            for name, verify in runs.items():
+                stop = asyncio.Event()
+                started = time.perf_counter()
+                probing = asyncio.create_task(probe(client, args.probes, stop))
+                if verify is not None:
+                    await storm(verify, encoded, args.logins, args.concurrency)
+                    stop.set()
+                samples = await probing
+                elapsed = time.perf_counter() - started
+                summary = latency_summary(samples)
+                logins = (
+                    f"{args.logins / elapsed:>6.1f} logins/s"
+                    if verify is not None
+                    else " " * 15
+                )
+                print(
+                    f"{name:<9} {logins}  probes {len(samples):>4}  "
+                    f"p50 {summary['p50_ms']:>8.2f} ms  "
+                    f"p95 {summary['p95_ms']:>8.2f} ms  "
+                    f"p99 {summary['p99_ms']:>8.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+"""
+Time the free slot search across many places.
+
+An availability index is filled in memory with random bookings for
+``--places`` places over ``--days`` days, then one search over the whole
+horizon is timed for each booked area. The database is not used.
+
+Usage::
+
+    python benchmarks/bench_slot_search.py --places 500 --days 30
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from common import percentile, setup
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Fill an index and time searches over it.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+    """
+    setup()
+
+    from database.cache.availability import AvailabilityIndex
+    from database.cache.search import search_slots
+    from database.models.booking import BookedArea
+    from database.models.place import Place
+    from properties import config
+
+    random.seed(args.seed)
+    index = AvailabilityIndex(
+        config.api.occupancy.slot_minutes,
+        config.server.cache_stripes,
+        config.api.occupancy.max_days,
+    )
+    start = datetime(2025, 6, 2)
+    booking_id = 0
+    filled = time.perf_counter()
+    for place_id in range(1, args.places + 1):
+        availability = index.register_place(
+            Place(
+                id=place_id,
+                name=f"place{place_id}",
+                allow_partial_booking=place_id % 3 != 0,
+            )
+        )
+        for day in range(args.days):
+            for _ in range(args.bookings_per_day):
+                booking_id += 1
+                begin = start + timedelta(
+                    days=day, hours=random.randint(7, 21)
+                )
+                end = begin + timedelta(minutes=random.choice((30, 60, 90)))
+                area = random.choice(list(BookedArea))
+                if availability.fits(begin, end, area):
+                    availability.add(booking_id, begin, end, area)
+    print(
+        f"indexed {args.places} places, {args.days} days in "
+        f"{time.perf_counter() - filled:.2f} s"
+    )
+
+    end = start + timedelta(days=args.days)
+    for area in BookedArea:
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            found = search_slots(
+                index, start, end, timedelta(minutes=90), area, 20
+            )
+            samples.append(time.perf_counter() - started)
+        print(
+            f"{area.value:<8} median {statistics.median(samples) * 1000:>7.2f}"
+            f" ms   p95 {percentile(samples, 0.95) * 1000:>7.2f} ms   "
+            f"first {found[0] if found else None}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--places", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--bookings-per-day", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
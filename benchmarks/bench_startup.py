@@ -0,0 +1,143 @@
+"""
+Measure the time from importing the app to its first served request.
+
+Every run starts a fresh interpreter, which imports ``main`` (finding and
+reading the configuration, setting up the logger and the engine), runs the
+lifespan startup against an empty database and serves ``GET /users``
+in-process. The phases are timed separately and the medians are printed
+and appended to a JSON history, so startup time can be followed over time.
+
+Usage::
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+
+from common import API_PATH, RESULTS_PATH, git_revision
+
+HISTORY = RESULTS_PATH / "startup.json"
+
+# Runs in the fresh interpreter and prints the phase timings as JSON
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {api_path!r})
+from properties import config
+config.database.update_entry("url", {url!r}, source="benchmark")
+config.logging.update_entry("path", {logs!r}, source="benchmark")
+from utils.logging import logger
+logger.remove()
+import httpx
+from main import app
+imported = time.perf_counter()
+
+async def serve():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            response = await client.get("/users")
+            response.raise_for_status()
+        return ready, time.perf_counter()
+
+ready, served = asyncio.run(serve())
+print(json.dumps({{
+    "import": imported - started,
+    "startup": ready - imported,
+    "first_request": served - ready,
+    "total": served - started,
+}}))
+"""
+
+
+def measure(directory: Path, run: int) -> dict[str, float]:
+    """
+    Time one cold start in a fresh interpreter.
+
+    Parameters
+    ----------
+    directory : Path
+        A temporary directory for the database and the logs.
+    run : int
+        The number of the run, used to give it its own database.
+
+    Returns
+    -------
+    dict[str, float]
+        The duration of each phase in seconds.
+    """
+    code = CHILD.format(
+        api_path=str(API_PATH),
+        url=f"sqlite+aiosqlite:///{directory / f'startup{run}.db'}",
+        logs=str(directory / "logs"),
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=directory,
+    )
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Run the cold starts, print the medians and record them.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        samples = [measure(Path(directory), run) for run in range(args.runs)]
+    medians = {
+        phase: statistics.median(sample[phase] for sample in samples)
+        for phase in samples[0]
+    }
+    for phase, seconds in medians.items():
+        print(f"{phase:<14} {seconds * 1000:>9.1f} ms")
+
+    if args.no_record:
+        return
+    history = json.loads(HISTORY.read_text()) if HISTORY.exists() else []
+    history.append(
+        {
+            "date": datetime.now(UTC).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "runs": args.runs,
+            "median_ms": {
+                phase: round(seconds * 1000, 2)
+                for phase, seconds in medians.items()
+            },
+        }
+    )
+    HISTORY.parent.mkdir(exist_ok=True)
+    HISTORY.write_text(json.dumps(history, indent=2) + "\n")
+    if len(history) > 1:
+        previous = history[-2]["median_ms"]["total"]
+        change = medians["total"] * 1000 / previous - 1
+        print(f"total vs previous record: {change:+.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--no-record",
+        action="store_true",
+        help="do not append the result to the history",
+    )
+    main(parser.parse_args())
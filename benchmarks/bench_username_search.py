@@ -0,0 +1,181 @@
+"""
+Compare username prefix search in the in-memory index and in SQLite.
+
+A temporary database is seeded with users with random usernames, the
+username index is built from it, and random prefixes of one to three
+letters are looked up three ways: in ``username_index`` directly, with a
+``LIKE 'prefix%'`` query on the table, and through ``GET /users?q=``
+in-process. Before timing, every prefix is checked to match the same
+users in the index and in the database.
+
+Usage::
+
+    python benchmarks/bench_username_search.py --users 100000
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import app_client, latency_summary, setup
+
+QUERY = (
+    "SELECT id, username, role FROM user WHERE username LIKE ? || '%' "
+    "ORDER BY username COLLATE NOCASE LIMIT ?"
+)
+
+
+def seed(path: Path, users: int) -> None:
+    """
+    Create the tables and insert users with random usernames.
+
+    Parameters
+    ----------
+    path : Path
+        The SQLite file.
+    users : int
+        The number of users to insert.
+    """
+    from sqlmodel import SQLModel, create_engine
+
+    sync_engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    letters = string.ascii_letters
+    with sqlite3.connect(path) as connection:
+        connection.executemany(
+            "INSERT INTO user (username, password_hash, role) "
+            "VALUES (?, 'x', ?)",
+            (
+                (
+                    "".join(random.choices(letters, k=random.randint(4, 12)))
+                    + str(number),
+                    random.choice(["admin", "leader", "member", "user"]),
+                )
+                for number in range(users)
+            ),
+        )
+
+
+def time_calls(call, prefixes: list[str]) -> list[float]:
+    """
+    Time a lookup of each prefix.
+
+    Parameters
+    ----------
+    call : Callable[[str], object]
+        The lookup.
+    prefixes : list[str]
+        The prefixes.
+
+    Returns
+    -------
+    list[float]
+        The duration of each lookup in seconds.
+    """
+    samples = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        call(prefix)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def main(args: argparse.Namespace) -> int:
+    """
+    Seed the database and time the lookups.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    Returns
+    -------
+    int
+        The exit code, 1 if the index and the database disagree.
+    """
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.db"
+        setup(path)
+
+        from database import engine
+        from database.cache.usernames import username_index
+        from sqlmodel.ext.asyncio.session import AsyncSession
+
+        seed(path, args.users)
+        prefixes = [
+            "".join(
+                random.choices(string.ascii_letters, k=random.randint(1, 3))
+            )
+            for _ in range(args.lookups)
+        ]
+
+        async with app_client() as client:
+            # Built by the app's startup, rebuilt here to time it
+            started = time.perf_counter()
+            async with AsyncSession(engine) as session:
+                await username_index.rebuild(session)
+            print(
+                f"index of {len(username_index)} users built in "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+
+            connection = sqlite3.connect(path)
+            for prefix in prefixes[:100]:
+                found = username_index.search(prefix, args.users, None)
+                rows = connection.execute(QUERY, (prefix, args.users))
+                if sorted(user_id for user_id, _, _ in found) != sorted(
+                    user_id for user_id, _, _ in rows
+                ):
+                    print(f"MISMATCH for prefix {prefix!r}")
+                    return 1
+
+            results = {
+                "index": time_calls(
+                    lambda prefix: username_index.search(prefix, args.limit),
+                    prefixes,
+                ),
+                "sqlite": time_calls(
+                    lambda prefix: connection.execute(
+                        QUERY, (prefix, args.limit)
+                    ).fetchall(),
+                    prefixes,
+                ),
+            }
+            connection.close()
+            samples = []
+            for prefix in prefixes:
+                started = time.perf_counter()
+                response = await client.get(
+                    "/users", params={"q": prefix, "limit": args.limit}
+                )
+                response.raise_for_status()
+                samples.append(time.perf_counter() - started)
+            results["http"] = samples
+
+    print(f"{args.lookups} prefix lookups, top {args.limit} matches")
+    for name, samples in results.items():
+        summary = latency_summary(samples)
+        print(
+            f"{name:<7} p50 {summary['p50_ms']:>8.3f} ms  "
+            f"p95 {summary['p95_ms']:>8.3f} ms  "
+            f"p99 {summary['p99_ms']:>8.3f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
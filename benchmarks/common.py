@@ -0,0 +1,127 @@
+"""Shared setup for the benchmark scripts."""
+
+import subprocess
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+API_PATH = Path(__file__).resolve().parents[1] / "src" / "api"
+RESULTS_PATH = Path(__file__).resolve().parent / "results"
+
+
+def setup(database_path: Path | None = None) -> str:
+    """
+    Point the API at a throwaway database and silence its logger.
+
+    Must be called before anything from ``database`` is imported, as the
+    engine is created at import time from ``config.database.url``.
+
+    Parameters
+    ----------
+    database_path : Path | None, optional
+        The SQLite file to use for the benchmark run, by default an
+        in-memory database.
+
+    Returns
+    -------
+    str
+        The async database URL the API has been configured with.
+    """
+    if str(API_PATH) not in sys.path:
+        sys.path.insert(0, str(API_PATH))
+
+    from properties import config
+    from utils.logging import logger
+
+    url = f"sqlite+aiosqlite:///{database_path or ':memory:'}"
+    config.database.update_entry("url", url, source="benchmark")
+    config.database.update_entry("echo", False, source="benchmark")
+    logger.remove()
+    return url
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """
+    Get a percentile from a list of samples.
+
+    Parameters
+    ----------
+    samples : list[float]
+        The samples, in any order.
+    fraction : float
+        The percentile as a fraction, e.g. 0.95.
+
+    Returns
+    -------
+    float
+        The sample at the given percentile, 0.0 if there are no samples.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def latency_summary(samples: list[float]) -> dict[str, float]:
+    """
+    Summarise request latencies.
+
+    Parameters
+    ----------
+    samples : list[float]
+        The latencies in seconds.
+
+    Returns
+    -------
+    dict[str, float]
+        The 50th, 95th and 99th percentiles in milliseconds.
+    """
+    return {
+        f"p{round(fraction * 100)}_ms": round(
+            percentile(samples, fraction) * 1000, 3
+        )
+        for fraction in (0.5, 0.95, 0.99)
+    }
+
+
+def git_revision() -> str:
+    """
+    Get the current git revision, if any.
+
+    Returns
+    -------
+    str
+        The short commit hash, empty string outside a git checkout.
+    """
+    output = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        capture_output=True,
+        text=True,
+        cwd=API_PATH,
+    )
+    return output.stdout.strip()
+
+
+@asynccontextmanager
+async def app_client() -> AsyncIterator:
+    """
+    Run the app's lifespan and yield a client bound to it in-process.
+
+    Call ``setup`` first, the app is imported here.
+
+    Yields
+    ------
+    httpx.AsyncClient
+        The client, sending requests through the ASGI transport.
+    """
+    import httpx
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            yield client
@@ -0,0 +1 @@
+"""Initialize the cli module."""
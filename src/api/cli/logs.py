@@ -0,0 +1,475 @@
+"""
+Command line tools for the log files.
+
+Run from ``src/api``::
+
+    python -m cli.logs summary --since 2025-01-01 --bucket day
+
+The current log file and its rotated archives are read in order, the
+archives straight from the zip files without extracting them, and the
+records are counted per level and per function, with error rates and a
+histogram over time. Only the counts are kept, so memory use grows with
+the number of functions and time buckets, not with the size of the logs.
+"""
+
+import argparse
+import json
+import mmap
+import re
+import sys
+import zipfile
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from properties import config
+
+# The separator between the fields of a record in the file format
+SEPARATOR = " │ ".encode()
+# The levels counted as errors
+ERROR_LEVELS = {"ERROR", "CRITICAL"}
+_RAW_ERROR_LEVELS = {level.encode() for level in ERROR_LEVELS}
+BUCKETS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+# Loguru time tokens and their ``strptime`` directives
+TIME_TOKENS = {
+    "YYYY": "%Y",
+    "MM": "%m",
+    "DD": "%d",
+    "HH": "%H",
+    "mm": "%M",
+    "ss": "%S",
+    "SSSSSS": "%f",
+    "SSS": "%f",
+    "ZZ": "%z",
+    "Z": "%z",
+}
+
+
+def strptime_format(time_format: str) -> str:
+    """
+    Translate a loguru time format to a ``strptime`` format.
+
+    Parameters
+    ----------
+    time_format : str
+        The loguru format, e.g. ``config.logging.time_fmt``. A trailing
+        ``!UTC`` is dropped, as it only converts the time.
+
+    Returns
+    -------
+    str
+        The ``strptime`` format.
+    """
+    time_format = time_format.removesuffix("!UTC").replace("%", "%%")
+    pattern = "|".join(sorted(TIME_TOKENS, key=len, reverse=True))
+    return re.sub(pattern, lambda match: TIME_TOKENS[match[0]], time_format)
+
+
+def utc_time(text: str) -> datetime:
+    """
+    Parse an ISO 8601 time, as UTC without a time zone.
+
+    Parameters
+    ----------
+    text : str
+        The time, in UTC unless it has an offset.
+
+    Returns
+    -------
+    datetime
+        The naive UTC time, comparable with the record times.
+    """
+    moment = datetime.fromisoformat(text)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC).replace(tzinfo=None)
+    return moment
+
+
+def log_files(directory: Path, sink: str) -> list[Path]:
+    """
+    Find the files of a sink, oldest first.
+
+    Rotated files are named after the time they were rotated, so they sort
+    by name, before the current file.
+
+    Parameters
+    ----------
+    directory : Path
+        The log directory.
+    sink : str
+        The name of the sink's file without suffix, e.g. "debug".
+
+    Returns
+    -------
+    list[Path]
+        The rotated files, zipped or not, and the current file.
+    """
+    rotated = [
+        path
+        for path in directory.glob(f"{sink}.*.log*")
+        if path.name.endswith((".log", ".log.zip"))
+    ]
+    current = directory / f"{sink}.log"
+    return sorted(rotated) + ([current] if current.exists() else [])
+
+
+def read_lines(path: Path) -> Iterator[bytes]:
+    """
+    Read the lines of a log file or of the logs in a zip archive.
+
+    Plain files are memory-mapped, so their pages are read on demand and
+    left to the OS cache. Archives are decompressed as they are read.
+
+    Parameters
+    ----------
+    path : Path
+        The file, a zip archive if it ends in ``.zip``.
+
+    Yields
+    ------
+    Iterator[bytes]
+        The lines, with their line endings.
+    """
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if member.endswith(".log"):
+                    with archive.open(member) as stream:
+                        yield from stream
+        return
+    with path.open("rb") as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty, or a file that can not be mapped
+            yield from file
+            return
+        with mapped:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                # Read ahead, and let the pages already read go first
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            yield from iter(mapped.readline, b"")
+
+
+class LogSummary:
+    """
+    Counts of log records per level, function and time bucket.
+
+    Records are added as raw fields, which are only decoded when the
+    summary is reported.
+    """
+
+    def __init__(
+        self,
+        time_format: str,
+        bucket: timedelta,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> None:
+        """
+        Create an empty summary.
+
+        Parameters
+        ----------
+        time_format : str
+            The ``strptime`` format of the record times.
+        bucket : timedelta
+            The width of the histogram buckets.
+        since : datetime | None, optional
+            Skip the records before this, by default none.
+        until : datetime | None, optional
+            Skip the records from this on, by default none.
+        """
+        self.time_format = time_format
+        self.bucket = bucket
+        self.since = since
+        self.until = until
+        self.skipped = 0
+        # Lines that are not records, e.g. traceback lines
+        self.other_lines = 0
+        self.first: datetime | None = None
+        self.last: datetime | None = None
+        # Records per (name, function, level), as raw bytes
+        self._counts: Counter[tuple[bytes, bytes, bytes]] = Counter()
+        # Records and errors per bucket start
+        self._records: Counter[datetime] = Counter()
+        self._errors: Counter[datetime] = Counter()
+        # The last time parsed with its bucket, as records often share
+        # the same second
+        self._raw_time = b""
+        self._time: tuple[datetime, datetime] | None = None
+
+    def _parse_time(self, raw: bytes) -> tuple[datetime, datetime] | None:
+        """
+        Parse the time of a record.
+
+        Parameters
+        ----------
+        raw : bytes
+            The time field.
+
+        Returns
+        -------
+        tuple[datetime, datetime] | None
+            The time and the start of its bucket, None if the field is not
+            a time.
+        """
+        if raw != self._raw_time:
+            try:
+                moment = datetime.strptime(raw.decode(), self.time_format)
+            except (UnicodeDecodeError, ValueError):
+                return None
+            if moment.tzinfo is not None:
+                moment = moment.astimezone(UTC).replace(tzinfo=None)
+            offset = (moment - datetime.min) // self.bucket * self.bucket
+            self._raw_time = raw
+            self._time = moment, datetime.min + offset
+        return self._time
+
+    def add_line(self, line: bytes) -> None:
+        """
+        Count a line of a log file.
+
+        Parameters
+        ----------
+        line : bytes
+            The line, in the format of ``LoggerConstructor._file_format``.
+        """
+        fields = line.split(SEPARATOR, 6)
+        parsed = self._parse_time(fields[0]) if len(fields) == 7 else None
+        if parsed is None:
+            self.other_lines += 1
+            return
+        moment, start = parsed
+        if (self.since is not None and moment < self.since) or (
+            self.until is not None and moment >= self.until
+        ):
+            self.skipped += 1
+            return
+        _, _, level, _, name, function, _ = fields
+        level = level.strip()
+        self._counts[name.strip(), function.strip(), level] += 1
+        self._records[start] += 1
+        if level in _RAW_ERROR_LEVELS:
+            self._errors[start] += 1
+        if self.first is None or moment < self.first:
+            self.first = moment
+        if self.last is None or moment > self.last:
+            self.last = moment
+
+    def add_lines(self, lines: Iterable[bytes]) -> None:
+        """
+        Count the lines of a log file.
+
+        Parameters
+        ----------
+        lines : Iterable[bytes]
+            The lines.
+        """
+        for line in lines:
+            self.add_line(line)
+
+    def report(self, top: int) -> dict:
+        """
+        Summarise the counted records.
+
+        Parameters
+        ----------
+        top : int
+            The number of functions to list, those with the most errors
+            first, then those with the most records.
+
+        Returns
+        -------
+        dict
+            The totals, the counts per level, the top functions with their
+            error rates, and the histogram, JSON-ready.
+        """
+        levels: Counter[str] = Counter()
+        functions: dict[str, Counter[str]] = {}
+        for (name, function, level), count in self._counts.items():
+            level = level.decode()
+            levels[level] += count
+            key = f"{name.decode()}:{function.decode()}"
+            functions.setdefault(key, Counter())[level] += count
+        ranked = sorted(
+            functions.items(),
+            key=lambda item: (
+                -sum(item[1][level] for level in ERROR_LEVELS),
+                -item[1].total(),
+                item[0],
+            ),
+        )
+        rows = []
+        for key, counts in ranked[:top]:
+            function_errors = sum(counts[level] for level in ERROR_LEVELS)
+            rows.append(
+                {
+                    "function": key,
+                    "records": counts.total(),
+                    "errors": function_errors,
+                    "error_rate": function_errors / counts.total(),
+                    "levels": dict(counts.most_common()),
+                }
+            )
+        records = levels.total()
+        errors = sum(levels[level] for level in ERROR_LEVELS)
+        return {
+            "records": records,
+            "errors": errors,
+            "error_rate": errors / records if records else 0.0,
+            "first": self.first.isoformat() if self.first else None,
+            "last": self.last.isoformat() if self.last else None,
+            "skipped": self.skipped,
+            "other_lines": self.other_lines,
+            "levels": dict(levels.most_common()),
+            "functions": rows,
+            "histogram": [
+                {
+                    "start": start.isoformat(),
+                    "records": self._records[start],
+                    "errors": self._errors[start],
+                }
+                for start in sorted(self._records)
+            ],
+        }
+
+
+def print_report(report: dict, width: int = 40) -> None:
+    """
+    Print a summary as text tables.
+
+    Parameters
+    ----------
+    report : dict
+        The summary, from ``LogSummary.report``.
+    width : int, optional
+        The width of the longest histogram bar, by default 40.
+    """
+    print(
+        f"{report['records']} records from {report['first']} to "
+        f"{report['last']}, {report['errors']} errors "
+        f"({report['error_rate']:.2%}), {report['skipped']} outside the "
+        f"time range, {report['other_lines']} other lines"
+    )
+    print("\nLevel      Records")
+    for level, count in report["levels"].items():
+        print(f"{level:<10} {count:>7}")
+    print(f"\n{'Function':<50} {'Records':>8} {'Errors':>7} {'Rate':>7}")
+    for row in report["functions"]:
+        print(
+            f"{row['function'][:50]:<50} {row['records']:>8} "
+            f"{row['errors']:>7} {row['error_rate']:>7.2%}"
+        )
+    histogram = report["histogram"]
+    peak = max((row["records"] for row in histogram), default=0)
+    print(f"\n{'Start':<19} {'Records':>8} {'Errors':>7}")
+    for row in histogram:
+        bar = "█" * round(row["records"] / peak * width)
+        print(
+            f"{row['start']:<19} {row['records']:>8} {row['errors']:>7} {bar}"
+        )
+
+
+def summarize(args: argparse.Namespace) -> int:
+    """
+    Summarise the log files.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    Returns
+    -------
+    int
+        The exit code, 1 if a path does not exist or there are no log
+        files.
+    """
+    files = []
+    for path in args.paths:
+        if path.is_dir():
+            files.extend(log_files(path, args.sink))
+        elif path.exists():
+            files.append(path)
+        else:
+            print(f"{path} does not exist.", file=sys.stderr)
+            return 1
+    if not files:
+        print(f"No {args.sink} log files found.", file=sys.stderr)
+        return 1
+    summary = LogSummary(
+        strptime_format(config.logging.time_fmt),
+        BUCKETS[args.bucket],
+        args.since,
+        args.until,
+    )
+    for path in files:
+        summary.add_lines(read_lines(path))
+    report = summary.report(args.top)
+    report["files"] = [str(path) for path in files]
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+def main() -> int:
+    """
+    Run the logs command line interface.
+
+    Returns
+    -------
+    int
+        The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m cli.logs", description="Analyse the log files."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary_parser = commands.add_parser(
+        "summary",
+        help="Count the records per level, function and time.",
+    )
+    summary_parser.add_argument(
+        "paths",
+        type=Path,
+        nargs="*",
+        default=[Path(config.logging.path)],
+        help="log files or directories, by default the log directory",
+    )
+    summary_parser.add_argument(
+        "--sink",
+        default=str(config.logging.file.levels[0]).lower(),
+        help="the file sink to read in directories, e.g. error",
+    )
+    summary_parser.add_argument(
+        "--since",
+        type=utc_time,
+        help="skip the records before this UTC time",
+    )
+    summary_parser.add_argument(
+        "--until",
+        type=utc_time,
+        help="skip the records from this UTC time on",
+    )
+    summary_parser.add_argument(
+        "--bucket", choices=list(BUCKETS), default="hour"
+    )
+    summary_parser.add_argument(
+        "--top", type=int, default=10, help="the functions to list"
+    )
+    summary_parser.add_argument(
+        "--json", action="store_true", help="print the summary as JSON"
+    )
+    return summarize(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
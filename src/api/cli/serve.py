@@ -0,0 +1,276 @@
+"""
+Production server running the API in several worker processes.
+
+Run from ``src/api``::
+
+    python -m cli.serve --workers 4
+
+The launcher imports the app and prepares the database once, then forks the
+workers, which share its listening socket and the pages of the preloaded
+modules. On SIGTERM or SIGINT every worker stops accepting connections and
+finishes its requests for up to ``server.graceful_timeout`` seconds. A
+worker that exits on its own is replaced.
+
+The workers send their log records to the launcher, which alone writes the
+log files. ``python main.py`` still runs a single reloading process for
+development.
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any
+
+from properties import config
+
+# Set before the logger is created on importing the app
+config.logging.file.update_entry("multiprocess", True, source="cli.serve")
+
+import uvicorn  # noqa: E402
+from database import (  # noqa: E402
+    create_db_and_tables,
+    dispose,
+    log_database_settings,
+    share_caches,
+)
+from main import app  # noqa: E402
+from utils.logging import logger  # noqa: E402
+
+# A worker exiting sooner than this after being forked waits before being
+# replaced, so a worker failing at startup does not spin the launcher
+RESTART_DELAY = 1.0
+
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    """
+    Open the listening socket shared by the workers.
+
+    Parameters
+    ----------
+    host : str
+        The host to bind to.
+    port : int
+        The port to bind to.
+    backlog : int
+        The most connections waiting to be accepted.
+
+    Returns
+    -------
+    socket.socket
+        The listening socket.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket) -> None:
+    """
+    Serve the app on the shared socket until told to stop.
+
+    Called in a forked process.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        The listening socket.
+    """
+    # In its own process group, so a Ctrl+C in the terminal only reaches
+    # the launcher, which then stops the worker exactly once
+    os.setpgid(0, 0)
+    # Until uvicorn installs its handlers, and after it restores them
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app,
+            backlog=config.server.backlog,
+            timeout_graceful_shutdown=config.server.graceful_timeout,
+            access_log=True,
+            log_config=None,
+            log_level=None,
+        )
+    )
+    server.run(sockets=[sock])
+
+
+def fork_worker(sock: socket.socket) -> int:
+    """
+    Start a worker process.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        The listening socket.
+
+    Returns
+    -------
+    int
+        The process ID of the worker.
+    """
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            run_worker(sock)
+            code = 0
+        except BaseException:
+            logger.exception("Worker {} failed.", os.getpid())
+        finally:
+            # Skip the launcher's exit handlers. The records are already
+            # queued for the launcher, so there is nothing to flush.
+            os._exit(code)
+    logger.info("Started worker {}.", pid)
+    return pid
+
+
+class Supervisor:
+    """Run the workers, replacing those that exit, until told to stop."""
+
+    def __init__(self, sock: socket.socket, workers: int) -> None:
+        """
+        Create a supervisor.
+
+        Parameters
+        ----------
+        sock : socket.socket
+            The listening socket.
+        workers : int
+            The number of workers.
+        """
+        self.sock = sock
+        self.workers = workers
+        self.stopping = False
+        # The time each running worker was started, by process ID
+        self._started: dict[int, float] = {}
+
+    def _start(self) -> None:
+        """Start a worker."""
+        self._started[fork_worker(self.sock)] = time.monotonic()
+
+    def stop(self, signum: int, _: Any) -> None:
+        """
+        Drain the workers, or kill them on a second signal.
+
+        Parameters
+        ----------
+        signum : int
+            The signal received.
+        _ : Any
+            The interrupted frame.
+        """
+        if self.stopping:
+            self.kill()
+            return
+        self.stopping = True
+        logger.info(
+            "Received {}, draining {} workers.",
+            signal.Signals(signum).name,
+            len(self._started),
+        )
+        for pid in self._started:
+            os.kill(pid, signal.SIGTERM)
+        # Kill the workers that are still draining past the timeout
+        signal.alarm(config.server.graceful_timeout + 5)
+
+    def kill(self, *_: Any) -> None:
+        """Kill the remaining workers."""
+        logger.warning("Killing {} workers.", len(self._started))
+        for pid in self._started:
+            os.kill(pid, signal.SIGKILL)
+
+    def run(self) -> int:
+        """
+        Start the workers and wait until all of them stopped.
+
+        Returns
+        -------
+        int
+            The exit code.
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGALRM, self.kill)
+        for _ in range(self.workers):
+            self._start()
+        while self._started:
+            pid, status = os.wait()
+            lifetime = time.monotonic() - self._started.pop(pid)
+            if self.stopping:
+                logger.info("Worker {} stopped.", pid)
+                continue
+            logger.error(
+                "Worker {} exited with code {}, replacing it.",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            if lifetime < RESTART_DELAY:
+                time.sleep(RESTART_DELAY)
+            if not self.stopping:
+                self._start()
+        signal.alarm(0)
+        return 0
+
+
+async def prepare() -> None:
+    """Create the database and log its settings, once for all workers."""
+    await create_db_and_tables()
+    await log_database_settings()
+    # The workers open their own connections
+    await dispose()
+
+
+def main() -> int:
+    """
+    Run the production server.
+
+    Returns
+    -------
+    int
+        The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m cli.serve",
+        description="Serve the API from several worker processes.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.server.workers,
+        help="worker processes, 0 for one per CPU",
+    )
+    parser.add_argument("--host", default=config.api.host)
+    parser.add_argument("--port", type=int, default=config.api.port)
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    asyncio.run(prepare())
+    app.state.prepared = True
+    share_caches()
+    sock = bind(args.host, args.port, config.server.backlog)
+    logger.info(
+        "Listening on http://{}:{} with {} workers.",
+        args.host,
+        args.port,
+        workers,
+    )
+    # Keep the preloaded objects out of the collector, so the workers
+    # share their pages instead of copying them
+    gc.freeze()
+    code = Supervisor(sock, workers).run()
+    sock.close()
+    logger.info("All workers stopped.")
+    logger.complete()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Command line tools for users.
+
+Run from ``src/api``::
+
+    python -m cli.users import members.json
+
+The file holds a JSON array of users, or one JSON object per line when it
+ends in ``.ndjson`` or ``.jsonl``, in the same shape as ``POST /users``.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from controllers.users_controller import create_users_controller
+from database import create_db_and_tables, dispose, engine
+from pydantic import ValidationError
+from schemas.users import UserCreate
+from sqlmodel.ext.asyncio.session import AsyncSession
+from utils.logging import logger
+from utils.passwords import password_hasher
+
+
+def read_users(path: Path) -> tuple[list[UserCreate], list[int], list[str]]:
+    """
+    Read and validate users from a JSON or NDJSON file.
+
+    Parameters
+    ----------
+    path : Path
+        The file to read.
+
+    Returns
+    -------
+    tuple[list[UserCreate], list[int], list[str]]
+        The valid users, their record numbers in the file and a message for
+        every invalid record.
+    """
+    text = path.read_text(encoding="utf-8")
+    if path.suffix in {".ndjson", ".jsonl"}:
+        records = [json.loads(line) for line in text.splitlines() if line]
+    else:
+        records = json.loads(text)
+    users: list[UserCreate] = []
+    numbers: list[int] = []
+    errors: list[str] = []
+    for number, record in enumerate(records, start=1):
+        try:
+            users.append(UserCreate.model_validate(record))
+            numbers.append(number)
+        except ValidationError as err:
+            errors.append(f"record {number}: {err.errors()[0]['msg']}")
+    return users, numbers, errors
+
+
+async def import_users(path: Path) -> int:
+    """
+    Import users from a file.
+
+    Parameters
+    ----------
+    path : Path
+        The file to import.
+
+    Returns
+    -------
+    int
+        The exit code, 1 if any record was not imported.
+    """
+    users, numbers, errors = read_users(path)
+    for error in errors:
+        logger.error("Invalid user, {}", error)
+    await create_db_and_tables()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        result = await create_users_controller(users, session)
+    await dispose()
+    password_hasher.shutdown()
+    for conflict in result.conflicts:
+        logger.warning(
+            "User {!r} (record {}) not imported: {}",
+            conflict.username,
+            numbers[conflict.index],
+            conflict.detail,
+        )
+    logger.info(
+        "Imported {} users from {}, {} conflicts, {} invalid.",
+        len(result.created),
+        path,
+        len(result.conflicts),
+        len(errors),
+    )
+    return 1 if errors or result.conflicts else 0
+
+
+def main() -> int:
+    """
+    Run the users command line interface.
+
+    Returns
+    -------
+    int
+        The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m cli.users", description="Manage users."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser(
+        "import", help="Import users from a JSON or NDJSON file."
+    )
+    import_parser.add_argument("path", type=Path)
+    args = parser.parse_args()
+    return asyncio.run(import_users(args.path))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""Controllers for the bookings endpoints."""
+
+from datetime import datetime
+
+from database import SessionDep, begin_immediate
+from database.cache.availability import (
+    CAPACITY,
+    BookingConflictError,
+    availability_index,
+    peak_units,
+    units_for,
+)
+from database.models.booking import BookedArea, Booking, Status
+from database.models.booking_series import BookingSeries
+from database.models.place import Place
+from database.recurrence import occurrences
+from schemas.bookings import BookingCreate, BookingRead, BookingUpdate
+from sqlmodel import select
+from utils.logging import logger
+
+
+async def _fits_in_database(
+    session: SessionDep,
+    place: Place,
+    start: datetime,
+    end: datetime,
+    area: BookedArea,
+    exclude: int | None = None,
+) -> bool:
+    """
+    Check if a booking fits against the bookings stored in the database.
+
+    Run inside a ``BEGIN IMMEDIATE`` transaction, this is the authoritative
+    check: no other writer can commit until the transaction ends.
+
+    Parameters
+    ----------
+    session : SessionDep
+        The database session.
+    place : Place
+        The place of the booking.
+    start : datetime
+        The start of the booking.
+    end : datetime
+        The end of the booking.
+    area : BookedArea
+        The booked area.
+    exclude : int | None, optional
+        The ID of a booking to leave out, e.g. the one being moved.
+
+    Returns
+    -------
+    bool
+        True if the booking fits.
+    """
+    partial = place.allow_partial_booking
+    statement = select(
+        Booking.start_time, Booking.end_time, Booking.booked_area
+    ).where(
+        Booking.place_id == place.id,
+        Booking.start_time < end,
+        Booking.end_time > start,
+        Booking.status == Status.active,
+    )
+    if exclude is not None:
+        statement = statement.where(Booking.id != exclude)
+    intervals = [
+        (booking_start, booking_end, units_for(booked_area, partial))
+        for booking_start, booking_end, booked_area in await session.exec(
+            statement
+        )
+    ]
+    series_statement = select(BookingSeries).where(
+        BookingSeries.place_id == place.id,
+        BookingSeries.status == Status.active,
+        BookingSeries.until >= start.date(),
+        BookingSeries.start_time < end,
+    )
+    for series in await session.exec(series_statement):
+        units = units_for(series.booked_area, partial)
+        intervals.extend(
+            (begin, finish, units)
+            for _, begin, finish in occurrences(series, start, end)
+        )
+    return (
+        peak_units(intervals, start, end) + units_for(area, partial)
+        <= CAPACITY
+    )
+
+
+async def create_booking_controller(
+    booking: BookingCreate, session: SessionDep
+) -> BookingRead:
+    """
+    Create a booking.
+
+    The capacity check runs against the stored bookings inside a
+    ``BEGIN IMMEDIATE`` transaction, which serialises booking writes, so
+    concurrent requests can not double-book.
+
+    Parameters
+    ----------
+    booking : BookingCreate
+        The booking to create.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    BookingRead
+        The created booking, or None if the place is not found.
+
+    Raises
+    ------
+    BookingConflictError
+        If the booking does not fit in the remaining capacity.
+    """
+    logger.debug("Creating booking for place with ID {}.", booking.place_id)
+    await begin_immediate(session)
+    await availability_index.sync(session)
+    db_place: Place | None = await session.get(
+        entity=Place, ident=booking.place_id
+    )
+    if db_place is None:
+        await session.rollback()
+        logger.warning(
+            "Place with ID {} not found in the database.",
+            booking.place_id,
+        )
+        return None
+    availability = availability_index.register_place(db_place)
+    if not availability.fits(
+        booking.start_time, booking.end_time, booking.booked_area
+    ) or not await _fits_in_database(
+        session,
+        db_place,
+        booking.start_time,
+        booking.end_time,
+        booking.booked_area,
+    ):
+        await session.rollback()
+        logger.warning(
+            "Booking does not fit at place with ID {}.", booking.place_id
+        )
+        raise BookingConflictError(booking.place_id)
+    db_booking = Booking(
+        user_id=booking.user_id,
+        place_id=booking.place_id,
+        start_time=booking.start_time,
+        end_time=booking.end_time,
+        booked_area=booking.booked_area,
+        status=Status.active,
+    )
+    session.add(instance=db_booking)
+    # Read back before committing, so the index is updated as soon as
+    # the commit returns, before a later write can commit and update it
+    await session.flush()
+    await session.refresh(instance=db_booking)
+    await session.commit()
+    availability_index.add(db_booking)
+    logger.debug("Booking created in the database: {}", db_booking.id)
+    return db_booking
+
+
+async def read_booking_controller(
+    booking_id: int, session: SessionDep
+) -> BookingRead:
+    """
+    Read a booking.
+
+    Parameters
+    ----------
+    booking_id : int
+        The booking ID.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    BookingRead
+        The booking, or None if it is not found.
+    """
+    logger.debug("Reading booking with ID {} from the database.", booking_id)
+    db_booking: Booking | None = await session.get(
+        entity=Booking, ident=booking_id
+    )
+    if db_booking is None:
+        logger.warning(
+            "Booking with ID {} not found in the database.", booking_id
+        )
+        return None
+    logger.debug("Fetched booking with ID {} from the database.", booking_id)
+    return db_booking
+
+
+async def update_booking_controller(
+    booking_id: int, booking: BookingUpdate, session: SessionDep
+) -> BookingRead:
+    """
+    Update a booking.
+
+    Moving, resizing or re-activating a booking is checked against the
+    remaining capacity, leaving out the booking's own current interval,
+    in the same kind of transaction as in creation.
+
+    Parameters
+    ----------
+    booking_id : int
+        The booking ID.
+    booking : BookingUpdate
+        The booking to update.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    BookingRead
+        The updated booking, or None if it is not found.
+
+    Raises
+    ------
+    BookingConflictError
+        If the updated booking does not fit in the remaining capacity.
+    ValueError
+        If the updated booking ends before it starts.
+    """
+    logger.debug("Updating booking with ID {} in the database.", booking_id)
+    place_id: int | None = (
+        await session.exec(
+            select(Booking.place_id).where(Booking.id == booking_id)
+        )
+    ).first()
+    if place_id is None:
+        logger.warning(
+            "Booking with ID {} not found in the database.", booking_id
+        )
+        return None
+    # End the read, so the write transaction can take the lock up front
+    await session.rollback()
+    await begin_immediate(session)
+    await availability_index.sync(session)
+    db_booking: Booking = await session.get(entity=Booking, ident=booking_id)
+    changes = booking.model_dump(exclude_unset=True)
+    start_time = changes.get("start_time", db_booking.start_time)
+    end_time = changes.get("end_time", db_booking.end_time)
+    booked_area = changes.get("booked_area", db_booking.booked_area)
+    if end_time <= start_time:
+        await session.rollback()
+        raise ValueError("end_time must be after start_time")
+    if changes.get("status", db_booking.status) == Status.active:
+        db_place: Place = await session.get(entity=Place, ident=place_id)
+        availability = availability_index.register_place(db_place)
+        if not availability.fits(
+            start_time, end_time, booked_area, exclude=db_booking.id
+        ) or not await _fits_in_database(
+            session,
+            db_place,
+            start_time,
+            end_time,
+            booked_area,
+            exclude=db_booking.id,
+        ):
+            await session.rollback()
+            logger.warning(
+                "Updated booking with ID {} does not fit.", booking_id
+            )
+            raise BookingConflictError(place_id)
+    for key, value in changes.items():
+        setattr(db_booking, key, value)
+    await session.flush()
+    await session.refresh(instance=db_booking)
+    await session.commit()
+    availability_index.add(db_booking)
+    logger.debug("Updated booking with ID {} in the database.", booking_id)
+    return db_booking
+
+
+async def cancel_booking_controller(
+    booking_id: int, session: SessionDep
+) -> BookingRead:
+    """
+    Cancel a booking.
+
+    Parameters
+    ----------
+    booking_id : int
+        The booking ID.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    BookingRead
+        The cancelled booking, or None if it is not found.
+    """
+    return await update_booking_controller(
+        booking_id, BookingUpdate(status=Status.cancelled), session
+    )
@@ -0,0 +1,287 @@
+"""Controllers for the places endpoints."""
+
+from datetime import date, datetime, time, timedelta
+
+from database import SessionDep
+from database.cache.availability import availability_index
+from database.cache.search import search_slots
+from database.models.booking import BookedArea
+from database.models.place import Place
+from schemas.bookings import to_naive_utc
+from schemas.places import (
+    BookingFit,
+    DayOccupancy,
+    FreeCapacity,
+    PlaceCreate,
+    PlaceOccupancy,
+    PlaceRead,
+    SlotCandidate,
+)
+from sqlalchemy import ScalarResult
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.sql._expression_select_cls import SelectOfScalar
+from utils.logging import logger
+
+
+async def create_place_controller(
+    place: PlaceCreate, session: SessionDep
+) -> PlaceRead:
+    """
+    Create a place.
+
+    Parameters
+    ----------
+    place : PlaceCreate
+        The place to create.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    PlaceRead
+        The created place.
+    """
+    logger.debug("Creating place in the database: {}", place.name)
+    db_place = Place(
+        name=place.name,
+        allow_partial_booking=place.allow_partial_booking,
+    )
+    try:
+        session.add(instance=db_place)
+        await session.commit()
+        await session.refresh(instance=db_place)
+        logger.debug("Place created in the database: {}", db_place.name)
+    except IntegrityError as err:
+        await session.rollback()
+        logger.error("IntegrityError while creating place: {}", err)
+        raise
+    availability_index.register_place(db_place)
+    return db_place
+
+
+async def read_places_controller(session: SessionDep) -> list[PlaceRead]:
+    """
+    Read all places.
+
+    Parameters
+    ----------
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    list[PlaceRead]
+        The places.
+    """
+    logger.debug("Reading all places from the database.")
+    statement: SelectOfScalar[Place] = select(Place)
+    result: ScalarResult[Place] = await session.exec(statement)
+    places = result.fetchall()
+    logger.debug("Fetched all places from the database.")
+    return places
+
+
+async def read_place_controller(
+    place_id: int, session: SessionDep
+) -> PlaceRead:
+    """
+    Read a place.
+
+    Parameters
+    ----------
+    place_id : int
+        The place ID.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    PlaceRead
+        The place, or None if it is not found.
+    """
+    logger.debug("Reading place with ID {} from the database.", place_id)
+    db_place: Place | None = await session.get(entity=Place, ident=place_id)
+    if db_place is None:
+        logger.warning("Place with ID {} not found in the database.", place_id)
+        return None
+    availability_index.register_place(db_place)
+    logger.debug("Fetched place with ID {} from the database.", place_id)
+    return db_place
+
+
+async def read_availability_controller(
+    place_id: int, start: datetime, end: datetime, session: SessionDep
+) -> list[FreeCapacity]:
+    """
+    Read the free capacity of a place between two points in time.
+
+    Parameters
+    ----------
+    place_id : int
+        The place ID.
+    start : datetime
+        The start of the window.
+    end : datetime
+        The end of the window.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    list[FreeCapacity]
+        The free capacity, or None if the place is not found.
+    """
+    db_place = await read_place_controller(place_id, session)
+    if db_place is None:
+        return None
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    logger.debug("Reading availability for place with ID {}.", place_id)
+    availability = await availability_index.window(
+        session, db_place, start, end
+    )
+    segments = availability.free(start, end)
+    return [
+        FreeCapacity(
+            start_time=segment_start,
+            end_time=segment_end,
+            free_units=free_units,
+        )
+        for segment_start, segment_end, free_units in segments
+    ]
+
+
+async def check_availability_controller(
+    place_id: int,
+    start: datetime,
+    end: datetime,
+    booked_area: BookedArea,
+    session: SessionDep,
+) -> BookingFit:
+    """
+    Check if a booking would fit at a place.
+
+    Parameters
+    ----------
+    place_id : int
+        The place ID.
+    start : datetime
+        The start of the booking.
+    end : datetime
+        The end of the booking.
+    booked_area : BookedArea
+        The area to book.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    BookingFit
+        Whether the booking fits, or None if the place is not found.
+    """
+    db_place = await read_place_controller(place_id, session)
+    if db_place is None:
+        return None
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    logger.debug("Checking availability for place with ID {}.", place_id)
+    availability = await availability_index.window(
+        session, db_place, start, end
+    )
+    fits = availability.fits(start, end, booked_area)
+    return BookingFit(fits=fits)
+
+
+async def read_occupancy_controller(
+    place_id: int, first: date, last: date, session: SessionDep
+) -> PlaceOccupancy:
+    """
+    Read the per-slot occupancy of a place over a range of days.
+
+    Parameters
+    ----------
+    place_id : int
+        The place ID.
+    first : date
+        The first day.
+    last : date
+        The last day, inclusive.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    PlaceOccupancy
+        The occupancy, or None if the place is not found.
+    """
+    db_place = await read_place_controller(place_id, session)
+    if db_place is None:
+        return None
+    logger.debug("Reading occupancy for place with ID {}.", place_id)
+    availability = await availability_index.window(
+        session,
+        db_place,
+        datetime.combine(first, time()),
+        datetime.combine(last + timedelta(days=1), time()),
+    )
+    occupancy = availability.occupancy
+    return PlaceOccupancy(
+        slot_minutes=occupancy.slot_minutes,
+        days=[
+            DayOccupancy(day=day, slots=slots)
+            for day, slots in occupancy.read(first, last)
+        ],
+    )
+
+
+async def search_slots_controller(
+    start: datetime,
+    end: datetime,
+    duration: timedelta,
+    booked_area: BookedArea,
+    limit: int,
+    session: SessionDep,
+) -> list[SlotCandidate]:
+    """
+    Find where and when a booking fits, earliest first.
+
+    Every place is checked at once against the in-memory occupancy, so the
+    database is only read if another worker changed some bookings.
+
+    Parameters
+    ----------
+    start : datetime
+        The earliest start.
+    end : datetime
+        The latest end.
+    duration : timedelta
+        The length of the booking.
+    booked_area : BookedArea
+        The area to book.
+    limit : int
+        The maximum number of candidates.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    list[SlotCandidate]
+        The candidates, ordered by start time, then place ID.
+    """
+    await availability_index.sync(session)
+    logger.debug("Searching slots for a {} booking.", booked_area.value)
+    candidates = search_slots(
+        availability_index,
+        to_naive_utc(start),
+        to_naive_utc(end),
+        duration,
+        booked_area,
+        limit,
+    )
+    return [
+        SlotCandidate(
+            place_id=place_id,
+            start_time=start_time,
+            end_time=start_time + duration,
+        )
+        for place_id, start_time in candidates
+    ]
@@ -0,0 +1,209 @@
+"""Controllers for the booking series endpoints."""
+
+from datetime import UTC, datetime
+
+from database import SessionDep, begin_immediate
+from database.cache.availability import (
+    SeriesConflictError,
+    availability_index,
+)
+from database.models.booking import Status
+from database.models.booking_series import BookingSeries
+from database.models.place import Place
+from database.recurrence import count_occurrences, occurrences
+from properties import config
+from schemas.bookings import (
+    BookingSeriesCreate,
+    BookingSeriesRead,
+    Occurrence,
+    to_naive_utc,
+)
+from utils.logging import logger
+
+
+async def create_series_controller(
+    series: BookingSeriesCreate, session: SessionDep
+) -> BookingSeriesRead:
+    """
+    Create a booking series.
+
+    Every upcoming occurrence is checked against the remaining capacity in
+    one pass over the place's usage, both in memory and as stored, inside
+    a ``BEGIN IMMEDIATE`` transaction. The series is
+    stored as one row and its occurrences are only tracked in memory.
+
+    Parameters
+    ----------
+    series : BookingSeriesCreate
+        The series to create.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    BookingSeriesRead
+        The created series, or None if the place is not found.
+
+    Raises
+    ------
+    SeriesConflictError
+        If any occurrence does not fit, with the days that clash.
+    ValueError
+        If the series has too many occurrences.
+    """
+    logger.debug("Creating series for place with ID {}.", series.place_id)
+    count = count_occurrences(
+        series.start_time, series.until, series.frequency
+    )
+    if count > config.api.series.max_occurrences:
+        raise ValueError(
+            f"A series can have at most {config.api.series.max_occurrences} "
+            f"occurrences, this one has {count}"
+        )
+    await begin_immediate(session)
+    await availability_index.sync(session)
+    db_place: Place | None = await session.get(
+        entity=Place, ident=series.place_id
+    )
+    if db_place is None:
+        await session.rollback()
+        logger.warning(
+            "Place with ID {} not found in the database.", series.place_id
+        )
+        return None
+    db_series = BookingSeries(
+        user_id=series.user_id,
+        place_id=series.place_id,
+        start_time=series.start_time,
+        end_time=series.end_time,
+        booked_area=series.booked_area,
+        frequency=series.frequency,
+        until=series.until,
+        exceptions=sorted({day.isoformat() for day in series.exceptions}),
+        status=Status.active,
+    )
+    now = datetime.now(UTC).replace(tzinfo=None)
+    intervals = [(begin, end) for _, begin, end in occurrences(db_series, now)]
+    availability = availability_index.register_place(db_place)
+    clashes = set(availability.clashes(intervals, series.booked_area))
+    if intervals:
+        # Checked against the stored bookings too, as another worker
+        # only counts its change for the sync after committing it
+        stored = await availability_index.from_database(
+            session, db_place, intervals[0][0], intervals[-1][1]
+        )
+        clashes.update(stored.clashes(intervals, series.booked_area))
+    if clashes:
+        await session.rollback()
+        logger.warning(
+            "{} occurrences do not fit at place with ID {}.",
+            len(clashes),
+            series.place_id,
+        )
+        raise SeriesConflictError(
+            series.place_id, sorted(begin.date() for begin, _ in clashes)
+        )
+    session.add(instance=db_series)
+    # Read back before committing, so the index is updated as soon as
+    # the commit returns, before a later write can commit and update it
+    await session.flush()
+    await session.refresh(instance=db_series)
+    await session.commit()
+    availability_index.add_series(db_series, now)
+    logger.debug("Series created in the database: {}", db_series.id)
+    return db_series
+
+
+async def read_series_controller(
+    series_id: int, session: SessionDep
+) -> BookingSeriesRead:
+    """
+    Read a booking series.
+
+    Parameters
+    ----------
+    series_id : int
+        The series ID.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    BookingSeriesRead
+        The series, or None if it is not found.
+    """
+    logger.debug("Reading series with ID {} from the database.", series_id)
+    db_series: BookingSeries | None = await session.get(
+        entity=BookingSeries, ident=series_id
+    )
+    if db_series is None:
+        logger.warning(
+            "Series with ID {} not found in the database.", series_id
+        )
+        return None
+    return db_series
+
+
+async def read_occurrences_controller(
+    series_id: int, start: datetime, end: datetime, session: SessionDep
+) -> list[Occurrence]:
+    """
+    Read the occurrences of a booking series within a window.
+
+    Parameters
+    ----------
+    series_id : int
+        The series ID.
+    start : datetime
+        The start of the window.
+    end : datetime
+        The end of the window.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    list[Occurrence]
+        The occurrences overlapping the window, or None if the series is not
+        found.
+    """
+    db_series = await read_series_controller(series_id, session)
+    if db_series is None:
+        return None
+    return [
+        Occurrence(number=number, start_time=begin, end_time=finish)
+        for number, begin, finish in occurrences(
+            db_series, to_naive_utc(start), to_naive_utc(end)
+        )
+    ]
+
+
+async def cancel_series_controller(
+    series_id: int, session: SessionDep
+) -> BookingSeriesRead:
+    """
+    Cancel a booking series and free all its occurrences.
+
+    Parameters
+    ----------
+    series_id : int
+        The series ID.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    BookingSeriesRead
+        The cancelled series, or None if it is not found.
+    """
+    await begin_immediate(session)
+    db_series = await read_series_controller(series_id, session)
+    if db_series is None:
+        return None
+    db_series.status = Status.cancelled
+    await session.flush()
+    await session.refresh(instance=db_series)
+    await session.commit()
+    availability_index.remove_series(db_series)
+    logger.debug("Cancelled series with ID {} in the database.", series_id)
+    return db_series
@@ -1,15 +1,32 @@
 """Controllers for the users endpoints."""
 
-from typing import Any
+import asyncio
+import json
+from collections.abc import AsyncGenerator
 
-from database import SessionDep
-from database.models.user import User
-from schemas.users import UserCreate, UserRead, UserUpdate
-from sqlalchemy import Result
+from database import SessionDep, read_engine
+from database.cache.usernames import username_index
+from database.cache.versions import user_versions
+from database.group_commit import apply_write
+from database.models.user import User, UserRole
+from properties import config
+from schemas.users import (
+    UserBulkConflict,
+    UserBulkResult,
+    UserCreate,
+    UserRead,
+    UserUpdate,
+)
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
-from sqlmodel.sql._expression_select_cls import SelectOfScalar
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
 from utils.logging import logger
+from utils.passwords import password_hasher
+
+# The columns behind the fields of ``UserRead``, the only ones ever read
+USER_FIELDS = {name: getattr(User, name) for name in UserRead.model_fields}
 
 
 async def create_user_controller(
@@ -30,74 +47,400 @@ async def create_user_controller(
     UserRead
         The created user.
     """
-    logger.debug(f"Creating user in the database: {user.username}")
-    db_user = User(
-        username=user.username,
-        password_hash=user.password_hash,
-        role=user.role,
-    )
-    try:
+    logger.debug("Creating user in the database: {}", user.username)
+    password_hash = await password_hasher.hash(user.password)
+
+    async def insert(session: AsyncSession) -> User:
+        """Insert the user."""
+        db_user = User(
+            username=user.username, password_hash=password_hash, role=user.role
+        )
         session.add(instance=db_user)
-        session.commit()
-        session.refresh(instance=db_user)
-        logger.debug(f"User created in the database: {db_user.username}")
+        await session.flush()
+        await session.refresh(instance=db_user)
+        return db_user
+
+    try:
+        db_user = await apply_write(session, insert)
     except IntegrityError as err:
-        session.rollback()
-        logger.error(f"IntegrityError while creating user: {err}")
+        logger.error("IntegrityError while creating user: {}", err)
         raise
+    user_versions.changed(db_user.id, db_user.version)
+    username_index.add(db_user.id, db_user.username, db_user.role)
+    logger.debug("User created in the database: {}", db_user.username)
     return db_user
 
 
-async def read_users_controller(session: SessionDep) -> list[UserRead]:
+async def create_users_controller(
+    users: list[UserCreate], session: SessionDep
+) -> UserBulkResult:
+    """
+    Create many users at once.
+
+    The users are inserted in chunks of ``config.database.bulk_chunk_size``,
+    one multi-row ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` statement
+    and one commit per chunk. A username that already exists, or appears
+    earlier in the batch, is reported as a conflict instead of aborting the
+    rest of the batch. The passwords of a chunk are hashed before its
+    transaction begins.
+
+    Parameters
+    ----------
+    users : list[UserCreate]
+        The users to create.
+    session : SessionDep
+        The database session.
+
+    Returns
+    -------
+    UserBulkResult
+        The created users and the conflicting rows.
+    """
+    logger.debug("Creating {} users in the database.", len(users))
+    chunk_size = config.database.bulk_chunk_size
+    created: list[UserRead] = []
+    conflicts: list[UserBulkConflict] = []
+    for offset in range(0, len(users), chunk_size):
+        chunk = users[offset : offset + chunk_size]
+        statement = (
+            insert(User)
+            .on_conflict_do_nothing(index_elements=[User.username])
+            .returning(User.id, User.username, User.role, User.version)
+        )
+        hashes = await asyncio.gather(
+            *(password_hasher.hash(user.password) for user in chunk)
+        )
+        rows = [
+            {
+                "username": user.username,
+                "password_hash": password_hash,
+                "role": user.role,
+            }
+            for user, password_hash in zip(chunk, hashes, strict=True)
+        ]
+        result = await session.exec(statement, params=rows)
+        inserted = {row.username: row for row in result.all()}
+        await session.commit()
+        for index, user in enumerate(chunk, start=offset):
+            row = inserted.pop(user.username, None)
+            if row is None:
+                conflicts.append(
+                    UserBulkConflict(
+                        index=index,
+                        username=user.username,
+                        detail="Username already exists",
+                    )
+                )
+            else:
+                user_versions.changed(row.id, row.version)
+                username_index.add(row.id, row.username, row.role)
+                created.append(
+                    UserRead(id=row.id, username=row.username, role=row.role)
+                )
+    logger.debug(
+        "Created {} users, {} conflicts.", len(created), len(conflicts)
+    )
+    return UserBulkResult(created=created, conflicts=conflicts)
+
+
+def _select_fields(fields: tuple[str, ...]) -> Select:
+    """
+    Select the ID and version of users, followed by some of their fields.
+
+    Parameters
+    ----------
+    fields : tuple[str, ...]
+        The names of the fields, keys of ``USER_FIELDS``.
+
+    Returns
+    -------
+    Select
+        The statement, selecting no other columns.
+    """
+    return select(
+        User.id, User.version, *(USER_FIELDS[name] for name in fields)
+    )
+
+
+def _to_json(fields: tuple[str, ...], values: tuple) -> dict:
+    """
+    Build a JSON-ready dict from the selected values of some fields.
+
+    Parameters
+    ----------
+    fields : tuple[str, ...]
+        The names of the fields.
+    values : tuple
+        The values of the fields, in the same order.
+
+    Returns
+    -------
+    dict
+        The fields by name.
+    """
+    user = dict(zip(fields, values, strict=True))
+    if "role" in user:
+        user["role"] = user["role"].value
+    return user
+
+
+async def read_users_controller(
+    session: SessionDep,
+    after: int | None = None,
+    limit: int | None = None,
+    role: UserRole | None = None,
+) -> list[UserRead]:
     """
-    Read all users.
+    Read a page of users, ordered by ID.
+
+    Only the columns of ``UserRead`` are selected, and the models are built
+    straight from the rows.
 
     Parameters
     ----------
     session : SessionDep
         The database session.
+    after : int | None, optional
+        Only read users with an ID above this one, by default None.
+    limit : int | None, optional
+        The maximum number of users to read, by default
+        ``config.api.pagination.default_limit``.
+    role : UserRole | None, optional
+        Only read users with this role, by default any.
 
     Returns
     -------
     list[UserRead]
         The users.
     """
-    logger.debug("Reading all users from the database.")
-    statement: SelectOfScalar[User] = select(User)
-    result: Result[Any] = session.exec(statement)
-    users = result.fetchall()
-    logger.debug("Fetched all users from the database.")
+    limit = limit or config.api.pagination.default_limit
+    logger.debug("Reading up to {} users after ID {}.", limit, after)
+    statement = (
+        select(User.id, User.version, User.username, User.role)
+        .order_by(User.id)
+        .limit(limit)
+    )
+    if after is not None:
+        statement = statement.where(User.id > after)
+    if role is not None:
+        statement = statement.where(User.role == role)
+    result = await session.exec(statement)
+    users = []
+    for user_id, version, username, role in result:
+        user_versions.set(user_id, version)
+        users.append(UserRead(id=user_id, username=username, role=role))
+    logger.debug("Fetched {} users from the database.", len(users))
     return users
 
 
-async def read_user_controller(user_id: int, session: SessionDep) -> UserRead:
+async def read_user_rows_controller(
+    session: SessionDep,
+    after: int | None = None,
+    limit: int | None = None,
+    fields: tuple[str, ...] = tuple(USER_FIELDS),
+    role: UserRole | None = None,
+) -> tuple[list[dict], int | None]:
+    """
+    Read a page of users as plain dicts, ordered by ID.
+
+    Only the columns of the requested fields are selected and returned as
+    JSON-ready dicts, without building ``User`` objects or validating
+    ``UserRead`` models, for responses that skip the response model.
+
+    Parameters
+    ----------
+    session : SessionDep
+        The database session.
+    after : int | None, optional
+        Only read users with an ID above this one, by default None.
+    limit : int | None, optional
+        The maximum number of users to read, by default
+        ``config.api.pagination.default_limit``.
+    fields : tuple[str, ...], optional
+        The fields to return, by default all fields of ``UserRead``.
+    role : UserRole | None, optional
+        Only read users with this role, by default any.
+
+    Returns
+    -------
+    tuple[list[dict], int | None]
+        The users, with the requested fields as keys, and the ID of the
+        last one, None if there are none.
+    """
+    limit = limit or config.api.pagination.default_limit
+    logger.debug("Reading up to {} user rows after ID {}.", limit, after)
+    statement = _select_fields(fields).order_by(User.id).limit(limit)
+    if after is not None:
+        statement = statement.where(User.id > after)
+    if role is not None:
+        statement = statement.where(User.role == role)
+    result = await session.exec(statement)
+    users = []
+    user_id = None
+    for user_id, version, *values in result:
+        user_versions.set(user_id, version)
+        users.append(_to_json(fields, values))
+    logger.debug("Fetched {} user rows from the database.", len(users))
+    return users, user_id
+
+
+async def stream_users_controller(
+    after: int | None = None,
+    fields: tuple[str, ...] = tuple(USER_FIELDS),
+    role: UserRole | None = None,
+) -> AsyncGenerator[bytes]:
+    """
+    Stream all users as newline-delimited JSON, ordered by ID.
+
+    The rows are fetched from a server-side cursor in batches of
+    ``config.api.pagination.stream_batch_size``, so memory use does not
+    grow with the size of the table. The stream opens its own session, as
+    it outlives the request's session dependency.
+
+    Parameters
+    ----------
+    after : int | None, optional
+        Only stream users with an ID above this one, by default None.
+    fields : tuple[str, ...], optional
+        The fields to stream, by default all fields of ``UserRead``.
+    role : UserRole | None, optional
+        Only stream users with this role, by default any.
+
+    Yields
+    ------
+    AsyncGenerator[bytes]
+        One chunk of JSON lines per batch of users.
+    """
+    logger.debug("Streaming users after ID {}.", after)
+    batch_size = config.api.pagination.stream_batch_size
+    statement = (
+        _select_fields(fields)
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if after is not None:
+        statement = statement.where(User.id > after)
+    if role is not None:
+        statement = statement.where(User.role == role)
+    streamed = 0
+    async with AsyncSession(read_engine) as session:
+        result = await session.stream(statement)
+        async for partition in result.partitions():
+            streamed += len(partition)
+            yield b"".join(
+                json.dumps(
+                    _to_json(fields, values), separators=(",", ":")
+                ).encode()
+                + b"\n"
+                for _, _, *values in partition
+            )
+    logger.debug("Streamed {} users from the database.", streamed)
+
+
+async def sync_user_caches(session: SessionDep) -> None:
+    """
+    Catch the user caches up with the writes of other processes.
+
+    The writes of other worker processes are counted in the shared
+    generations. Users imported from the command line are not, so the
+    highest user ID is read as well, and new users found that way change
+    the collection's ETag.
+
+    Parameters
+    ----------
+    session : SessionDep
+        The database session.
+    """
+    await username_index.sync(session)
+    if await username_index.load_new(session):
+        logger.debug("Found users added outside the API.")
+        user_versions.touch()
+
+
+async def search_users_controller(
+    session: SessionDep,
+    prefix: str,
+    limit: int | None = None,
+    role: UserRole | None = None,
+    fields: tuple[str, ...] = tuple(USER_FIELDS),
+) -> list[dict]:
+    """
+    Find the users whose username starts with a prefix.
+
+    The users are looked up in the in-memory ``username_index`` instead
+    of the database, which is only read to catch up with the writes of
+    other worker processes.
+
+    Parameters
+    ----------
+    session : SessionDep
+        The database session.
+    prefix : str
+        The start of the usernames, matched regardless of case.
+    limit : int | None, optional
+        The maximum number of users to return, by default
+        ``config.api.pagination.default_limit``.
+    role : UserRole | None, optional
+        Only return users with this role, by default any.
+    fields : tuple[str, ...], optional
+        The fields to return, by default all fields of ``UserRead``.
+
+    Returns
+    -------
+    list[dict]
+        The users as JSON-ready dicts with the requested fields as keys,
+        ordered by case-folded username.
+    """
+    limit = limit or config.api.pagination.default_limit
+    logger.debug("Searching up to {} users starting with {!r}.", limit, prefix)
+    await username_index.sync(session)
+    users = []
+    for user_id, username, user_role in username_index.search(
+        prefix, limit, role
+    ):
+        user = {"id": user_id, "username": username, "role": user_role}
+        users.append(_to_json(fields, tuple(user[name] for name in fields)))
+    logger.debug("Found {} users in the username index.", len(users))
+    return users
+
+
+async def read_user_controller(
+    user_id: int,
+    session: SessionDep,
+    fields: tuple[str, ...] = tuple(USER_FIELDS),
+) -> tuple[dict, int] | None:
     """
     Read a user.
 
+    Only the columns of the requested fields are selected.
+
     Parameters
     ----------
     user_id : int
         The user ID.
     session : SessionDep
         The database session.
+    fields : tuple[str, ...], optional
+        The fields to return, by default all fields of ``UserRead``.
 
     Returns
     -------
-    UserRead
-        The user.
-
-    Raises
-    ------
-    HTTPException
-        If the user is not found.
+    tuple[dict, int] | None
+        The user as a JSON-ready dict with the requested fields as keys,
+        and its version, or None if the user is not found.
     """
-    logger.debug(f"Reading user with ID {user_id} from the database.")
-    db_user: User | None = session.get(entity=User, ident=user_id)
-    if db_user is None:
-        logger.warning(f"User with ID {user_id} not found in the database.")
+    logger.debug("Reading user with ID {} from the database.", user_id)
+    result = await session.exec(
+        _select_fields(fields).where(User.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        logger.warning("User with ID {} not found in the database.", user_id)
         return None
-    logger.debug(f"Fetched user with ID {user_id} from the database.")
-    return db_user
+    _, version, *values = row
+    user_versions.set(user_id, version)
+    logger.debug("Fetched user with ID {} from the database.", user_id)
+    return _to_json(fields, values), version
 
 
 async def update_user_controller(
@@ -125,14 +468,31 @@ async def update_user_controller(
     HTTPException
         If the user is not found.
     """
-    logger.debug(f"Updating user with ID {user_id} in the database.")
-    db_user: User | None = session.get(entity=User, ident=user_id)
+    logger.debug("Updating user with ID {} in the database.", user_id)
+    changes = user.model_dump(exclude_unset=True)
+    if "password" in changes:
+        # Hashed before the write lock is taken, as it takes a while
+        changes["password_hash"] = await password_hasher.hash(
+            changes.pop("password")
+        )
+
+    async def update(session: AsyncSession) -> User | None:
+        """Apply the changes to the user, if it exists."""
+        db_user: User | None = await session.get(entity=User, ident=user_id)
+        if db_user is None:
+            return None
+        for key, value in changes.items():
+            setattr(db_user, key, value)
+        db_user.version = User.version + 1
+        await session.flush()
+        await session.refresh(instance=db_user)
+        return db_user
+
+    db_user = await apply_write(session, update)
     if db_user is None:
-        logger.warning(f"User with ID {user_id} not found in the database.")
+        logger.warning("User with ID {} not found in the database.", user_id)
         return None
-    for key, value in user.model_dump(exclude_unset=True).items():
-        setattr(db_user, key, value)
-    session.commit()
-    session.refresh(instance=db_user)
-    logger.debug(f"Updated user with ID {user_id} in the database.")
+    user_versions.changed(db_user.id, db_user.version)
+    username_index.add(db_user.id, db_user.username, db_user.role)
+    logger.debug("Updated user with ID {} in the database.", user_id)
     return db_user
@@ -1,60 +1,342 @@
 """Handle the database connection and session management."""
 
-from collections.abc import Generator
+import time
+from collections.abc import AsyncGenerator
 from typing import Annotated, Any
 
 from fastapi import Depends
 from properties import config
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import Connection, event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from utils.logging import logger
 
+from database.cache.availability import availability_index
+from database.cache.usernames import username_index
+from database.cache.versions import user_versions
+from database.metrics import instrument, session_duration
 from database.models.booking import Booking
+from database.models.booking_series import BookingSeries
 from database.models.place import Place
 from database.models.user import User
+from database.plans import verify_query_plans
+
+# The PRAGMA statements applied to every new SQLite connection
+SQLITE_PRAGMAS = (
+    "journal_mode",
+    "synchronous",
+    "cache_size",
+    "mmap_size",
+    "busy_timeout",
+    "temp_store",
+)
 
 connect_args = {"check_same_thread": False}
-engine = create_engine(
-    config.database.url, echo=config.database.echo, connect_args=connect_args
+url = make_url(config.database.url)
+# An in-memory database lives in a single connection, so its pool can not
+# be sized and it can not be opened a second time, read-only
+in_memory = url.database in {None, "", ":memory:"}
+
+
+def pool_options(prefix: str = "") -> dict[str, int]:
+    """
+    Get the pool sizing of an engine.
+
+    Parameters
+    ----------
+    prefix : str, optional
+        The prefix of the pool settings in ``config.database.sqlite``, e.g.
+        "read_", by default none for the write pool.
+
+    Returns
+    -------
+    dict[str, int]
+        The keyword arguments of ``create_async_engine``.
+    """
+    if in_memory:
+        return {}
+    return {
+        "pool_size": config.database.sqlite[f"{prefix}pool_size"],
+        "max_overflow": config.database.sqlite[f"{prefix}max_overflow"],
+        "pool_timeout": config.database.sqlite.pool_timeout,
+    }
+
+
+engine: AsyncEngine = create_async_engine(
+    url,
+    echo=config.database.echo,
+    connect_args=connect_args,
+    **pool_options(),
+)
+# Reads get their own pool of read-only connections, which WAL lets run
+# alongside the writer
+read_engine: AsyncEngine = (
+    engine
+    if in_memory
+    else create_async_engine(
+        url.set(
+            database=f"file:{url.database}",
+            query={"mode": "ro", "uri": "true"},
+        ),
+        echo=config.database.echo,
+        connect_args=connect_args,
+        **pool_options("read_"),
+    )
 )
+if config.metrics.enabled:
+    instrument(engine.sync_engine, config.metrics.max_statements, "write")
+    if read_engine is not engine:
+        instrument(
+            read_engine.sync_engine, config.metrics.max_statements, "read"
+        )
+
+
+def configure_connection(dbapi_connection: Any, read_only: bool) -> None:
+    """
+    Apply the configured PRAGMA statements to a new connection.
+
+    Parameters
+    ----------
+    dbapi_connection : Any
+        The new DBAPI connection.
+    read_only : bool
+        If the connection is read-only. Its journal mode is left as the
+        writer set it, and ``query_only`` is turned on.
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        if read_only and pragma == "journal_mode":
+            continue
+        cursor.execute(f"PRAGMA {pragma} = {config.database.sqlite[pragma]}")
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+    # Stop the driver from starting transactions on its own, so that
+    # begin_transaction decides how each one begins
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def apply_sqlite_pragmas(dbapi_connection: Any, _: Any) -> None:
+    """
+    Configure a new connection of the write pool.
+
+    Parameters
+    ----------
+    dbapi_connection : Any
+        The new DBAPI connection.
+    _ : Any
+        The pool record of the connection, unused.
+    """
+    configure_connection(dbapi_connection, read_only=False)
+
+
+def begin_transaction(connection: Connection) -> None:
+    """
+    Begin a transaction, taking the write lock up front if asked to.
+
+    Parameters
+    ----------
+    connection : Connection
+        The connection beginning a transaction.
+    """
+    immediate = connection.get_execution_options().get("sqlite_immediate")
+    connection.exec_driver_sql(
+        "BEGIN IMMEDIATE" if immediate else "BEGIN DEFERRED"
+    )
+
+
+event.listen(engine.sync_engine, "begin", begin_transaction)
+if read_engine is not engine:
+
+    @event.listens_for(read_engine.sync_engine, "connect")
+    def apply_read_pragmas(dbapi_connection: Any, _: Any) -> None:
+        """
+        Configure a new connection of the read pool.
+
+        Parameters
+        ----------
+        dbapi_connection : Any
+            The new DBAPI connection.
+        _ : Any
+            The pool record of the connection, unused.
+        """
+        configure_connection(dbapi_connection, read_only=True)
+
+    event.listen(read_engine.sync_engine, "begin", begin_transaction)
+
+
+async def begin_immediate(session: AsyncSession) -> None:
+    """
+    Begin the session's transaction with ``BEGIN IMMEDIATE``.
 
+    The database write lock is taken before anything is read, so a check
+    made in the transaction still holds when its write is committed. Must
+    be called before the session runs any statement.
 
-def create_db_and_tables() -> None:
+    Parameters
+    ----------
+    session : AsyncSession
+        The database session.
+    """
+    await session.connection(execution_options={"sqlite_immediate": True})
+
+
+async def log_database_settings() -> None:
+    """Log the SQLite settings in effect on a pooled connection."""
+    async with engine.connect() as connection:
+        for pragma in SQLITE_PRAGMAS:
+            value = await connection.exec_driver_sql(f"PRAGMA {pragma}")
+            logger.info("SQLite {} = {}", pragma, value.scalar())
+    logger.info("Connection pool: {}", engine.sync_engine.pool.status())
+    if read_engine is not engine:
+        logger.info(
+            "Read-only connection pool: {}",
+            read_engine.sync_engine.pool.status(),
+        )
+
+
+async def create_db_and_tables() -> None:
     """Create the database and tables."""
-    with engine.connect() as connection:
-        existing_tables = connection.dialect.has_table(
-            connection, "user"
+    async with engine.begin() as connection:
+        existing_tables = await connection.run_sync(
+            engine.dialect.has_table, "user"
         )  # Check for one of the tables
         if existing_tables:
             logger.info("Database and tables already exist.")
+            # Only creates the tables added since the database was made
+            await connection.run_sync(SQLModel.metadata.create_all)
+            await connection.run_sync(create_missing_columns)
+            await connection.run_sync(create_missing_indexes)
         else:
             logger.info("Creating database and tables...")
-            SQLModel.metadata.create_all(engine)
+            await connection.run_sync(SQLModel.metadata.create_all)
             logger.info("Database and tables created.")
+        if config.database.verify_query_plans:
+            await connection.run_sync(verify_query_plans)
+            logger.info("Hot queries are served by indexes.")
 
 
-def get_session() -> Generator[Session, Any]:
+def create_missing_columns(connection: Connection) -> None:
     """
-    Get a database session.
+    Add the columns declared on the models but missing in the database.
+
+    Only columns that are nullable or have a server default can be added
+    this way, which is how new columns are declared.
+
+    Parameters
+    ----------
+    connection : Connection
+        The database connection.
+    """
+    inspector = inspect(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {
+            column["name"] for column in inspector.get_columns(table.name)
+        }
+        for column in table.columns:
+            if column.name not in existing:
+                logger.info(
+                    "Adding missing column {}.{}...", table.name, column.name
+                )
+                definition = CreateColumn(column).compile(
+                    dialect=connection.dialect
+                )
+                connection.exec_driver_sql(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN {definition}'
+                )
+
+
+def create_missing_indexes(connection: Connection) -> None:
+    """
+    Create the indexes declared on the models but missing in the database.
+
+    Parameters
+    ----------
+    connection : Connection
+        The database connection.
+    """
+    inspector = inspect(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {
+            index["name"] for index in inspector.get_indexes(table.name)
+        }
+        for index in table.indexes:
+            if index.name not in existing:
+                logger.info("Creating missing index {}...", index.name)
+                index.create(connection)
+
+
+async def build_caches() -> None:
+    """Build the in-memory indexes from the database."""
+    logger.info("Building the in-memory indexes...")
+    async with AsyncSession(engine) as session:
+        await availability_index.rebuild(session)
+        await username_index.rebuild(session)
+    logger.info("In-memory indexes built.")
+
+
+def share_caches() -> None:
+    """
+    Share the change counters of the in-memory caches with forked workers.
+
+    Must be called before the worker processes are forked.
+    """
+    availability_index.generations.share()
+    user_versions.generations.share()
+    username_index.generations.share()
+
+
+async def get_session() -> AsyncGenerator[AsyncSession, Any]:
+    """
+    Get a database session for a request that writes.
 
     Yields
     ------
-    Generator[Session, Any]
+    AsyncGenerator[AsyncSession, Any]
         A database session.
     """
     logger.info("Creating a new database session...")
-    with Session(engine) as session:
+    started = time.perf_counter()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         try:
             yield session
         finally:
             logger.info("Closing the database session...")
+    session_duration.observe(time.perf_counter() - started, ("write",))
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, Any]:
+    """
+    Get a read-only database session.
+
+    Yields
+    ------
+    AsyncGenerator[AsyncSession, Any]
+        A database session on the read pool.
+    """
+    logger.info("Creating a new read-only database session...")
+    started = time.perf_counter()
+    async with AsyncSession(read_engine, expire_on_commit=False) as session:
+        try:
+            yield session
+        finally:
+            logger.info("Closing the read-only database session...")
+    session_duration.observe(time.perf_counter() - started, ("read",))
 
 
-def dispose() -> None:
-    """Dispose of the engine."""
+async def dispose() -> None:
+    """Dispose of the engines."""
     logger.info("Disposing of the engine...")
-    engine.dispose()
+    await engine.dispose()
+    await read_engine.dispose()
     logger.info("Engine disposed.")
 
 
-# Define a type alias for the database session dependency
-SessionDep = Annotated[Session, Depends(get_session)]
+# Define type aliases for the database session dependencies
+WriteSessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+SessionDep = WriteSessionDep
@@ -0,0 +1 @@
+"""In-memory indexes mirroring database state."""
@@ -0,0 +1,904 @@
+"""Per-place interval index of booked capacity."""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Hashable, ItemsView, Iterable
+from datetime import UTC, date, datetime, time, timedelta
+
+from properties import config
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database.cache.generations import Generations
+from database.cache.occupancy import Occupancy
+from database.models.booking import BookedArea, Booking, Status
+from database.models.booking_series import BookingSeries
+from database.models.place import Place
+from database.recurrence import occurrences
+
+# A place is split into quarters, so it has four units of capacity
+CAPACITY = 4
+AREA_UNITS = {
+    BookedArea.full: 4,
+    BookedArea.half: 2,
+    BookedArea.quarter: 1,
+}
+
+
+class BookingConflictError(Exception):
+    """Raised when a booking does not fit in the remaining capacity."""
+
+
+class SeriesConflictError(BookingConflictError):
+    """Raised when occurrences of a booking series do not fit."""
+
+    def __init__(self, place_id: int, clashes: list[date]) -> None:
+        """
+        Create the error.
+
+        Parameters
+        ----------
+        place_id : int
+            The place of the series.
+        clashes : list[date]
+            The days of the occurrences that do not fit.
+        """
+        super().__init__(place_id)
+        self.clashes = clashes
+
+
+def units_for(area: BookedArea, allow_partial_booking: bool) -> int:
+    """
+    Get the quarter units a booking occupies.
+
+    Parameters
+    ----------
+    area : BookedArea
+        The booked area.
+    allow_partial_booking : bool
+        Whether the place can be shared. If not, every booking takes the
+        whole place.
+
+    Returns
+    -------
+    int
+        The number of quarter units used.
+    """
+    return AREA_UNITS[area] if allow_partial_booking else CAPACITY
+
+
+def peak_units(
+    intervals: Iterable[tuple[datetime, datetime, int]],
+    start: datetime,
+    end: datetime,
+) -> int:
+    """
+    Get the highest number of units in use at once during a window.
+
+    Parameters
+    ----------
+    intervals : Iterable[tuple[datetime, datetime, int]]
+        The ``(start, end, units)`` of the bookings, in any order.
+    start : datetime
+        The start of the window.
+    end : datetime
+        The end of the window.
+
+    Returns
+    -------
+    int
+        The peak usage in quarter units.
+    """
+    events = []
+    for interval_start, interval_end, units in intervals:
+        interval_start = max(interval_start, start)
+        interval_end = min(interval_end, end)
+        if interval_start < interval_end:
+            events.append((interval_start, units))
+            events.append((interval_end, -units))
+    # At equal times ends sort before starts, so touching bookings do not
+    # add up
+    events.sort()
+    peak = used = 0
+    for _, change in events:
+        used += change
+        peak = max(peak, used)
+    return peak
+
+
+class PlaceAvailability:
+    """
+    Capacity used over time for one place.
+
+    The usage is a step function kept as two parallel lists: ``_times``
+    holds the sorted breakpoints and ``_used[i]`` the units in use from
+    ``_times[i]`` up to ``_times[i + 1]``. The last segment is always empty.
+    Lookups bisect into the breakpoints and only visit the segments that
+    overlap the requested interval.
+
+    The days touched by every change are also recomputed in ``occupancy``,
+    so per-slot views of the usage are ready to read.
+    """
+
+    def __init__(self, allow_partial_booking: bool, slot_minutes: int) -> None:
+        """
+        Create an empty availability index for a place.
+
+        Parameters
+        ----------
+        allow_partial_booking : bool
+            Whether the place can be shared.
+        slot_minutes : int
+            The length of the occupancy slots in minutes.
+        """
+        self.allow_partial_booking = allow_partial_booking
+        self.occupancy = Occupancy(slot_minutes)
+        self._times: list[datetime] = []
+        self._used: list[int] = []
+        self._intervals: dict[Hashable, tuple[datetime, datetime, int]] = {}
+
+    def __len__(self) -> int:
+        """
+        Get the number of intervals in the index.
+
+        Returns
+        -------
+        int
+            The number of intervals.
+        """
+        return len(self._intervals)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Check if an interval is in the index.
+
+        Parameters
+        ----------
+        key : Hashable
+            The interval key.
+
+        Returns
+        -------
+        bool
+            True if the interval is in the index.
+        """
+        return key in self._intervals
+
+    def add(
+        self, key: Hashable, start: datetime, end: datetime, area: BookedArea
+    ) -> None:
+        """
+        Add an interval to the index.
+
+        Parameters
+        ----------
+        key : Hashable
+            The interval key, e.g. the booking ID.
+        start : datetime
+            The start of the interval.
+        end : datetime
+            The end of the interval.
+        area : BookedArea
+            The booked area.
+        """
+        if key in self._intervals:
+            self.remove(key)
+        units = units_for(area, self.allow_partial_booking)
+        first = self._split(start)
+        last = self._split(end)
+        for index in range(first, last):
+            self._used[index] += units
+        self._intervals[key] = (start, end, units)
+        self._refresh_occupancy(start, end)
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Remove an interval from the index, if present.
+
+        Parameters
+        ----------
+        key : Hashable
+            The interval key.
+        """
+        interval = self._intervals.pop(key, None)
+        if interval is None:
+            return
+        start, end, units = interval
+        # Compaction may have dropped the interval's own breakpoints where
+        # the usage did not change, so they are restored first
+        first = self._split(start)
+        last = self._split(end)
+        for index in range(first, last):
+            self._used[index] -= units
+        self._compact(first, last)
+        self._refresh_occupancy(start, end)
+
+    def max_used(
+        self, start: datetime, end: datetime, exclude: Hashable = None
+    ) -> int:
+        """
+        Get the highest number of units in use during an interval.
+
+        Parameters
+        ----------
+        start : datetime
+            The start of the interval.
+        end : datetime
+            The end of the interval.
+        exclude : Hashable, optional
+            Key of an interval to leave out, e.g. the booking being moved.
+
+        Returns
+        -------
+        int
+            The peak usage in quarter units.
+        """
+        own_start, own_end, own_units = self._intervals.get(
+            exclude, (None, None, 0)
+        )
+        peak = 0
+        index = max(bisect_right(self._times, start) - 1, 0)
+        while index < len(self._times) and self._times[index] < end:
+            used = self._used[index]
+            if own_units:
+                # Compaction may merge segments across the excluded
+                # interval's ends, so a segment can be only partly its own
+                segment_start = max(self._times[index], start)
+                segment_end = end
+                if index + 1 < len(self._times):
+                    segment_end = min(self._times[index + 1], end)
+                if segment_start < own_end and own_start < segment_end:
+                    peak = max(peak, used - own_units)
+                if segment_start < own_start or own_end < segment_end:
+                    peak = max(peak, used)
+            else:
+                peak = max(peak, used)
+            index += 1
+        return peak
+
+    def fits(
+        self,
+        start: datetime,
+        end: datetime,
+        area: BookedArea,
+        exclude: Hashable = None,
+    ) -> bool:
+        """
+        Check if a booking fits in the remaining capacity.
+
+        Parameters
+        ----------
+        start : datetime
+            The start of the booking.
+        end : datetime
+            The end of the booking.
+        area : BookedArea
+            The booked area.
+        exclude : Hashable, optional
+            Key of an interval to leave out, e.g. the booking being moved.
+
+        Returns
+        -------
+        bool
+            True if the booking fits.
+        """
+        units = units_for(area, self.allow_partial_booking)
+        return self.max_used(start, end, exclude) + units <= CAPACITY
+
+    def clashes(
+        self,
+        intervals: Iterable[tuple[datetime, datetime]],
+        area: BookedArea,
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        Find which of many bookings would not fit, in a single pass.
+
+        The intervals are checked against the current usage, not against
+        each other, and must be sorted by start. The breakpoints are walked
+        once for all of them instead of bisected for each.
+
+        Parameters
+        ----------
+        intervals : Iterable[tuple[datetime, datetime]]
+            The ``(start, end)`` of each booking, sorted by start.
+        area : BookedArea
+            The area every booking takes.
+
+        Returns
+        -------
+        list[tuple[datetime, datetime]]
+            The intervals that do not fit.
+        """
+        units = units_for(area, self.allow_partial_booking)
+        clashing = []
+        index = 0
+        for start, end in intervals:
+            while index < len(self._times) and self._times[index] <= start:
+                index += 1
+            peak = self._used[index - 1] if index else 0
+            probe = index
+            while probe < len(self._times) and self._times[probe] < end:
+                peak = max(peak, self._used[probe])
+                probe += 1
+            if peak + units > CAPACITY:
+                clashing.append((start, end))
+        return clashing
+
+    def free(
+        self, start: datetime, end: datetime
+    ) -> list[tuple[datetime, datetime, int]]:
+        """
+        Get the free capacity between two points in time.
+
+        Parameters
+        ----------
+        start : datetime
+            The start of the window.
+        end : datetime
+            The end of the window.
+
+        Returns
+        -------
+        list[tuple[datetime, datetime, int]]
+            Consecutive ``(start, end, free_units)`` segments covering the
+            window.
+        """
+        segments: list[tuple[datetime, datetime, int]] = []
+        index = bisect_right(self._times, start) - 1
+        cursor = start
+        while cursor < end:
+            if index + 1 < len(self._times):
+                segment_end = min(self._times[index + 1], end)
+            else:
+                segment_end = end
+            used = self._used[index] if index >= 0 else 0
+            free = CAPACITY - used
+            if segments and segments[-1][2] == free:
+                segments[-1] = (segments[-1][0], segment_end, free)
+            else:
+                segments.append((cursor, segment_end, free))
+            cursor = segment_end
+            index += 1
+        return segments
+
+    def _refresh_occupancy(self, start: datetime, end: datetime) -> None:
+        """
+        Recompute the occupancy of the days touched by an interval.
+
+        Parameters
+        ----------
+        start : datetime
+            The start of the interval.
+        end : datetime
+            The end of the interval.
+        """
+        for day in self.occupancy.days(start, end):
+            midnight = datetime.combine(day, time())
+            segments = self.free(midnight, midnight + timedelta(days=1))
+            self.occupancy.refresh(
+                day,
+                (
+                    (segment_start, segment_end, CAPACITY - free_units)
+                    for segment_start, segment_end, free_units in segments
+                ),
+            )
+
+    def _split(self, moment: datetime) -> int:
+        """
+        Make sure there is a breakpoint at a point in time.
+
+        Parameters
+        ----------
+        moment : datetime
+            The point in time.
+
+        Returns
+        -------
+        int
+            The index of the breakpoint.
+        """
+        index = bisect_left(self._times, moment)
+        if index < len(self._times) and self._times[index] == moment:
+            return index
+        used = self._used[index - 1] if index > 0 else 0
+        self._times.insert(index, moment)
+        self._used.insert(index, used)
+        return index
+
+    def _compact(self, first: int, last: int) -> None:
+        """
+        Drop breakpoints that no longer change the usage.
+
+        Parameters
+        ----------
+        first : int
+            The index of the first breakpoint to look at.
+        last : int
+            The index of the last breakpoint to look at.
+        """
+        for index in range(min(last, len(self._times) - 1), first - 1, -1):
+            previous = self._used[index - 1] if index > 0 else 0
+            if self._used[index] == previous:
+                del self._times[index]
+                del self._used[index]
+
+
+class AvailabilityIndex:
+    """
+    Availability of every place, kept in sync with the bookings.
+
+    Changes are counted per stripe of places in ``generations``. When the
+    counters are shared by several worker processes, ``sync`` reloads the
+    places whose bookings another process changed.
+    """
+
+    def __init__(
+        self, slot_minutes: int, stripes: int, history_days: int
+    ) -> None:
+        """
+        Create an empty availability index.
+
+        Parameters
+        ----------
+        slot_minutes : int
+            The length of the occupancy slots in minutes.
+        stripes : int
+            The number of stripes places are counted in.
+        history_days : int
+            The number of past days loaded by a rebuild.
+        """
+        self.slot_minutes = slot_minutes
+        self.history_days = history_days
+        self.generations = Generations(stripes)
+        self._seen = self.generations.snapshot()
+        self._places: dict[int, PlaceAvailability] = {}
+        # Bookings ending before this are not loaded, set by each rebuild
+        self.since = self._horizon()
+
+    def _horizon(self) -> datetime:
+        """
+        Get the start of the bookings a rebuild loads.
+
+        Returns
+        -------
+        datetime
+            Midnight UTC, ``history_days`` before today.
+        """
+        today = datetime.now(UTC).date()
+        return datetime.combine(
+            today - timedelta(days=self.history_days), time()
+        )
+
+    def _changed(self, place_id: int) -> None:
+        """
+        Count a change to the bookings of a place.
+
+        Parameters
+        ----------
+        place_id : int
+            The place ID.
+        """
+        stripe = self.generations.stripe(place_id)
+        # If another process changed the stripe first, it stays behind and
+        # is reloaded by the next sync
+        if self.generations.bump(stripe) == self._seen[stripe]:
+            self._seen[stripe] += 1
+
+    def _register(self, place: Place) -> PlaceAvailability:
+        """
+        Track a place without counting it as a change.
+
+        Parameters
+        ----------
+        place : Place
+            The place to track.
+
+        Returns
+        -------
+        PlaceAvailability
+            The availability of the place.
+        """
+        availability = self._places.get(place.id)
+        if availability is None:
+            availability = PlaceAvailability(
+                place.allow_partial_booking, self.slot_minutes
+            )
+            self._places[place.id] = availability
+        return availability
+
+    def register_place(self, place: Place) -> PlaceAvailability:
+        """
+        Make sure a place is tracked by the index.
+
+        Parameters
+        ----------
+        place : Place
+            The place to track.
+
+        Returns
+        -------
+        PlaceAvailability
+            The availability of the place.
+        """
+        if place.id not in self._places:
+            self._changed(place.id)
+        return self._register(place)
+
+    def __len__(self) -> int:
+        """
+        Get the number of places in the index.
+
+        Returns
+        -------
+        int
+            The number of places.
+        """
+        return len(self._places)
+
+    def items(self) -> ItemsView[int, PlaceAvailability]:
+        """
+        Get the availability of every place.
+
+        Returns
+        -------
+        ItemsView[int, PlaceAvailability]
+            Pairs of place ID and availability.
+        """
+        return self._places.items()
+
+    def __getitem__(self, place_id: int) -> PlaceAvailability:
+        """
+        Get the availability of a place.
+
+        Parameters
+        ----------
+        place_id : int
+            The place ID.
+
+        Returns
+        -------
+        PlaceAvailability
+            The availability of the place.
+        """
+        return self._places[place_id]
+
+    def _add(self, booking: Booking) -> None:
+        """
+        Track or untrack a booking without counting it as a change.
+
+        Parameters
+        ----------
+        booking : Booking
+            The booking. Its place must be registered.
+        """
+        availability = self._places[booking.place_id]
+        if booking.status == Status.active:
+            availability.add(
+                booking.id,
+                booking.start_time,
+                booking.end_time,
+                booking.booked_area,
+            )
+        else:
+            availability.remove(booking.id)
+
+    def add(self, booking: Booking) -> None:
+        """
+        Track a booking, or stop tracking it if it is no longer active.
+
+        Parameters
+        ----------
+        booking : Booking
+            The booking to track. Its place must be registered.
+        """
+        self._add(booking)
+        self._changed(booking.place_id)
+
+    def remove(self, booking: Booking) -> None:
+        """
+        Stop tracking a booking.
+
+        Parameters
+        ----------
+        booking : Booking
+            The booking to remove.
+        """
+        availability = self._places.get(booking.place_id)
+        if availability is not None:
+            availability.remove(booking.id)
+            self._changed(booking.place_id)
+
+    def _add_series(self, series: BookingSeries, start: datetime) -> None:
+        """
+        Track the occurrences of a series without counting it as a change.
+
+        Parameters
+        ----------
+        series : BookingSeries
+            The active series. Its place must be registered.
+        start : datetime
+            Only track occurrences ending after this.
+        """
+        availability = self._places[series.place_id]
+        for number, begin, end in occurrences(series, start):
+            availability.add(
+                ("series", series.id, number), begin, end, series.booked_area
+            )
+
+    def add_series(
+        self, series: BookingSeries, start: datetime | None = None
+    ) -> None:
+        """
+        Track the occurrences of a series, or stop if it is not active.
+
+        Parameters
+        ----------
+        series : BookingSeries
+            The series to track. Its place must be registered.
+        start : datetime | None, optional
+            Only track occurrences ending after this, by default all.
+        """
+        if series.status != Status.active:
+            self.remove_series(series)
+            return
+        self._add_series(series, start)
+        self._changed(series.place_id)
+
+    def remove_series(self, series: BookingSeries) -> None:
+        """
+        Stop tracking the occurrences of a series.
+
+        Parameters
+        ----------
+        series : BookingSeries
+            The series to remove.
+        """
+        availability = self._places.get(series.place_id)
+        if availability is None:
+            return
+        for number, _, _ in occurrences(series):
+            availability.remove(("series", series.id, number))
+        self._changed(series.place_id)
+
+    async def _load(
+        self, session: AsyncSession, stripes: set[int] | None = None
+    ) -> None:
+        """
+        Load places with their active bookings and series since ``since``.
+
+        Everything is read before the index is touched, and the loaded
+        places are swapped in without awaiting in between, so concurrent
+        requests never see a place missing or half loaded.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The database session.
+        stripes : set[int] | None, optional
+            Only reload the places in these stripes, by default all and
+            from a new ``since``.
+        """
+        count = len(self.generations)
+        since = self.since if stripes is not None else self._horizon()
+        place_filter, booking_filter, series_filter = True, True, True
+        if stripes is not None:
+            place_filter = (Place.id % count).in_(stripes)
+            booking_filter = (Booking.place_id % count).in_(stripes)
+            series_filter = (BookingSeries.place_id % count).in_(stripes)
+        statement = select(Booking).where(
+            Booking.status == Status.active,
+            Booking.end_time > since,
+            booking_filter,
+        )
+        bookings = (await session.exec(statement)).all()
+        statement = select(BookingSeries).where(
+            BookingSeries.status == Status.active,
+            BookingSeries.until >= since.date(),
+            series_filter,
+        )
+        series_list = (await session.exec(statement)).all()
+        # Read last, so the places of every booking and series read are in
+        places = (await session.exec(select(Place).where(place_filter))).all()
+        loaded = self._build(places, bookings, series_list, since)
+        if stripes is None:
+            self._places = loaded
+            self.since = since
+            return
+        for place_id in list(self._places):
+            if self.generations.stripe(place_id) in stripes:
+                del self._places[place_id]
+        self._places.update(loaded)
+
+    def _build(
+        self,
+        places: Iterable[Place],
+        bookings: Iterable[Booking],
+        series_list: Iterable[BookingSeries],
+        since: datetime,
+    ) -> dict[int, PlaceAvailability]:
+        """
+        Build the availability of places apart from the index.
+
+        Parameters
+        ----------
+        places : Iterable[Place]
+            The places.
+        bookings : Iterable[Booking]
+            The active bookings of the places.
+        series_list : Iterable[BookingSeries]
+            The active series of the places.
+        since : datetime
+            Only track occurrences ending after this.
+
+        Returns
+        -------
+        dict[int, PlaceAvailability]
+            The availability of each place, by place ID.
+        """
+        loaded = {
+            place.id: PlaceAvailability(
+                place.allow_partial_booking, self.slot_minutes
+            )
+            for place in places
+        }
+        for booking in bookings:
+            loaded[booking.place_id].add(
+                booking.id,
+                booking.start_time,
+                booking.end_time,
+                booking.booked_area,
+            )
+        for series in series_list:
+            availability = loaded[series.place_id]
+            for number, begin, end in occurrences(series, since):
+                availability.add(
+                    ("series", series.id, number),
+                    begin,
+                    end,
+                    series.booked_area,
+                )
+        return loaded
+
+    async def window(
+        self,
+        session: AsyncSession,
+        place: Place,
+        start: datetime,
+        end: datetime,
+    ) -> PlaceAvailability:
+        """
+        Get the availability of a place for reading a window.
+
+        Windows from ``since`` on are read from the index, synced first.
+        The bookings of a window reaching further back are not tracked, so
+        they are read from the database into a separate availability.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The database session.
+        place : Place
+            The place. It must be registered.
+        start : datetime
+            The start of the window.
+        end : datetime
+            The end of the window.
+
+        Returns
+        -------
+        PlaceAvailability
+            The availability of the place, complete within the window.
+        """
+        if start >= self.since:
+            await self.sync(session)
+            return self._places[place.id]
+        return await self.from_database(session, place, start, end)
+
+    async def from_database(
+        self,
+        session: AsyncSession,
+        place: Place,
+        start: datetime,
+        end: datetime,
+    ) -> PlaceAvailability:
+        """
+        Read the availability of a place during a window from the database.
+
+        The result is separate from the index. Inside a ``BEGIN IMMEDIATE``
+        transaction it is authoritative, as no other writer can commit
+        until the transaction ends.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The database session.
+        place : Place
+            The place.
+        start : datetime
+            The start of the window.
+        end : datetime
+            The end of the window.
+
+        Returns
+        -------
+        PlaceAvailability
+            The active bookings and occurrences overlapping the window.
+        """
+        availability = PlaceAvailability(
+            place.allow_partial_booking, self.slot_minutes
+        )
+        statement = select(Booking).where(
+            Booking.place_id == place.id,
+            Booking.status == Status.active,
+            Booking.start_time < end,
+            Booking.end_time > start,
+        )
+        for booking in await session.exec(statement):
+            availability.add(
+                booking.id,
+                booking.start_time,
+                booking.end_time,
+                booking.booked_area,
+            )
+        statement = select(BookingSeries).where(
+            BookingSeries.place_id == place.id,
+            BookingSeries.status == Status.active,
+            BookingSeries.until >= start.date(),
+            BookingSeries.start_time < end,
+        )
+        for series in await session.exec(statement):
+            for number, begin, finish in occurrences(series, start, end):
+                availability.add(
+                    ("series", series.id, number),
+                    begin,
+                    finish,
+                    series.booked_area,
+                )
+        return availability
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        """
+        Rebuild the index from the places and recent active bookings.
+
+        Both single bookings and the occurrences of series are tracked.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The database session.
+        """
+        # Read before loading, so changes made meanwhile are synced later
+        self._seen = self.generations.snapshot()
+        await self._load(session)
+
+    async def sync(self, session: AsyncSession) -> None:
+        """
+        Reload the places whose bookings another process changed.
+
+        Without other processes sharing ``generations``, nothing is ever
+        reloaded.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The database session.
+        """
+        current = self.generations.snapshot()
+        stale = {
+            stripe
+            for stripe, (now, seen) in enumerate(
+                zip(current, self._seen, strict=True)
+            )
+            if now != seen
+        }
+        if not stale:
+            return
+        await self._load(session, stale)
+        for stripe in stale:
+            self._seen[stripe] = current[stripe]
+
+
+availability_index = AvailabilityIndex(
+    config.api.occupancy.slot_minutes,
+    config.server.cache_stripes,
+    config.api.occupancy.max_days,
+)
@@ -0,0 +1,110 @@
+"""Change counters keeping the caches of several processes coherent."""
+
+import multiprocessing
+
+
+class Generations:
+    """
+    A change counter per stripe of keys, shareable with forked processes.
+
+    Every write to a cached row bumps the counter of the row's stripe. A
+    cache remembers the counters as it last saw them, so a counter that
+    moved on without it tells which stripes another process changed.
+
+    The counters live in the process until ``share`` moves them to shared
+    memory, which must happen before the worker processes are forked.
+    """
+
+    def __init__(self, stripes: int) -> None:
+        """
+        Create the counters.
+
+        Parameters
+        ----------
+        stripes : int
+            The number of stripes.
+        """
+        self._counters = [0] * max(stripes, 1)
+        self._lock = None
+
+    def __len__(self) -> int:
+        """
+        Get the number of stripes.
+
+        Returns
+        -------
+        int
+            The number of stripes.
+        """
+        return len(self._counters)
+
+    def __getitem__(self, stripe: int) -> int:
+        """
+        Read the counter of a stripe.
+
+        Parameters
+        ----------
+        stripe : int
+            The stripe.
+
+        Returns
+        -------
+        int
+            The counter.
+        """
+        return self._counters[stripe]
+
+    def share(self) -> None:
+        """Move the counters to memory shared with forked processes."""
+        self._lock = multiprocessing.Lock()
+        self._counters = multiprocessing.RawArray("q", self._counters)
+
+    def stripe(self, key: int) -> int:
+        """
+        Get the stripe of a key.
+
+        Parameters
+        ----------
+        key : int
+            The key, e.g. a place ID.
+
+        Returns
+        -------
+        int
+            The stripe.
+        """
+        return key % len(self._counters)
+
+    def bump(self, stripe: int) -> int:
+        """
+        Count a change in a stripe.
+
+        Parameters
+        ----------
+        stripe : int
+            The stripe.
+
+        Returns
+        -------
+        int
+            The counter before the change.
+        """
+        if self._lock is None:
+            before = self._counters[stripe]
+            self._counters[stripe] = before + 1
+            return before
+        with self._lock:
+            before = self._counters[stripe]
+            self._counters[stripe] = before + 1
+        return before
+
+    def snapshot(self) -> list[int]:
+        """
+        Read all counters.
+
+        Returns
+        -------
+        list[int]
+            The counter of each stripe.
+        """
+        return self._counters[:]
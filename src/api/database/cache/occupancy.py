@@ -0,0 +1,133 @@
+"""Per-day occupancy of a place in fixed time slots."""
+
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta
+
+MINUTES_PER_DAY = 24 * 60
+
+# Maps the units in a slot to the ASCII digit shown for it
+_DIGITS = bytes.maketrans(bytes(range(10)), b"0123456789")
+
+
+class Occupancy:
+    """
+    Quarter units in use per time slot, one ``bytearray`` per day.
+
+    Each byte holds the peak number of units (0-4) used at any moment
+    within its slot. Days are UTC calendar days, and only days with at
+    least one used slot are stored.
+    """
+
+    def __init__(self, slot_minutes: int) -> None:
+        """
+        Create an empty occupancy.
+
+        Parameters
+        ----------
+        slot_minutes : int
+            The length of a slot in minutes, a divisor of a day.
+        """
+        if slot_minutes <= 0 or MINUTES_PER_DAY % slot_minutes:
+            raise ValueError(
+                f"Slots of {slot_minutes} minutes do not fit a day"
+            )
+        self.slot_minutes = slot_minutes
+        self.slots_per_day = MINUTES_PER_DAY // slot_minutes
+        self._slot = timedelta(minutes=slot_minutes)
+        self._days: dict[date, bytearray] = {}
+
+    def days(self, start: datetime, end: datetime) -> list[date]:
+        """
+        Get the days touched by an interval.
+
+        Parameters
+        ----------
+        start : datetime
+            The start of the interval.
+        end : datetime
+            The end of the interval, exclusive.
+
+        Returns
+        -------
+        list[date]
+            Every day from the one holding ``start`` up to the one holding
+            the last moment before ``end``.
+        """
+        first = start.date()
+        last = (end - timedelta.resolution).date()
+        return [
+            first + timedelta(days=offset)
+            for offset in range((last - first).days + 1)
+        ]
+
+    def refresh(
+        self,
+        day: date,
+        segments: Iterable[tuple[datetime, datetime, int]],
+    ) -> None:
+        """
+        Recompute one day from the usage of the place during that day.
+
+        Parameters
+        ----------
+        day : date
+            The day to recompute.
+        segments : Iterable[tuple[datetime, datetime, int]]
+            Consecutive ``(start, end, used_units)`` segments covering the
+            day.
+        """
+        midnight = datetime.combine(day, time())
+        slots = bytearray(self.slots_per_day)
+        for start, end, used in segments:
+            if not used:
+                continue
+            first = (start - midnight) // self._slot
+            last = -((midnight - end) // self._slot)
+            for index in range(first, last):
+                slots[index] = max(slots[index], used)
+        if any(slots):
+            self._days[day] = slots
+        else:
+            self._days.pop(day, None)
+
+    def get(self, day: date) -> bytearray | None:
+        """
+        Get the slots of one day.
+
+        Parameters
+        ----------
+        day : date
+            The day.
+
+        Returns
+        -------
+        bytearray | None
+            The units used per slot, or None if nothing is booked that day.
+        """
+        return self._days.get(day)
+
+    def read(self, first: date, last: date) -> list[tuple[date, str]]:
+        """
+        Get the occupancy of a range of days.
+
+        Parameters
+        ----------
+        first : date
+            The first day.
+        last : date
+            The last day, inclusive.
+
+        Returns
+        -------
+        list[tuple[date, str]]
+            The slots of each day as a string of digits, one per slot.
+        """
+        empty = "0" * self.slots_per_day
+        result = []
+        for offset in range((last - first).days + 1):
+            day = first + timedelta(days=offset)
+            slots = self._days.get(day)
+            result.append(
+                (day, slots.translate(_DIGITS).decode() if slots else empty)
+            )
+        return result
@@ -0,0 +1,277 @@
+"""Sorted index of usernames, for prefix search without the database."""
+
+from bisect import bisect_left, insort
+
+from properties import config
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database.cache.generations import Generations
+from database.models.user import User, UserRole
+
+
+class UsernameIndex:
+    """
+    Every user's username and role, sorted by case-folded username.
+
+    The usernames are kept in ``_keys`` as sorted ``(folded, username)``
+    pairs, so the users whose username starts with a prefix, in any case,
+    are a contiguous run found by bisecting for the folded prefix. Adding,
+    renaming or looking up a user costs a bisection and, for a change, a
+    shift of the list, instead of a query.
+
+    Changes are counted per stripe of user IDs in ``generations``. When
+    the counters are shared by several worker processes, ``sync`` reloads
+    the users another process changed. Users added by a process that does
+    not share them, e.g. an import from the command line, are found by
+    ``load_new`` instead.
+    """
+
+    def __init__(self, stripes: int) -> None:
+        """
+        Create an empty username index.
+
+        Parameters
+        ----------
+        stripes : int
+            The number of stripes user IDs are counted in.
+        """
+        self.generations = Generations(stripes)
+        self._seen = self.generations.snapshot()
+        self._keys: list[tuple[str, str]] = []
+        # The ID and role of each user, by username
+        self._users: dict[str, tuple[int, UserRole]] = {}
+        # The username of each user, by ID
+        self._usernames: dict[int, str] = {}
+        # The highest user ID loaded, as new users get higher ones
+        self._max_id = 0
+
+    def __len__(self) -> int:
+        """
+        Get the number of users in the index.
+
+        Returns
+        -------
+        int
+            The number of users.
+        """
+        return len(self._users)
+
+    def _changed(self, user_id: int) -> None:
+        """
+        Count a change to a user.
+
+        Parameters
+        ----------
+        user_id : int
+            The user ID.
+        """
+        stripe = self.generations.stripe(user_id)
+        # If another process changed the stripe first, it stays behind and
+        # is reloaded by the next sync
+        if self.generations.bump(stripe) == self._seen[stripe]:
+            self._seen[stripe] += 1
+
+    def _remove(self, user_id: int) -> None:
+        """
+        Stop tracking a user without counting it as a change.
+
+        Parameters
+        ----------
+        user_id : int
+            The user ID.
+        """
+        username = self._usernames.pop(user_id, None)
+        if username is None:
+            return
+        del self._users[username]
+        key = (username.casefold(), username)
+        del self._keys[bisect_left(self._keys, key)]
+
+    def _add(self, user_id: int, username: str, role: UserRole) -> None:
+        """
+        Track a user without counting it as a change.
+
+        Parameters
+        ----------
+        user_id : int
+            The user ID.
+        username : str
+            The user's username.
+        role : UserRole
+            The user's role.
+        """
+        if self._usernames.get(user_id) != username:
+            self._remove(user_id)
+            # A username freed by a user in a stale stripe
+            taken = self._users.get(username)
+            if taken is not None:
+                self._remove(taken[0])
+            insort(self._keys, (username.casefold(), username))
+            self._usernames[user_id] = username
+        self._users[username] = (user_id, role)
+        self._max_id = max(self._max_id, user_id)
+
+    def add(self, user_id: int, username: str, role: UserRole) -> None:
+        """
+        Track a created or updated user.
+
+        Parameters
+        ----------
+        user_id : int
+            The user ID.
+        username : str
+            The user's current username.
+        role : UserRole
+            The user's current role.
+        """
+        self._add(user_id, username, role)
+        self._changed(user_id)
+
+    def search(
+        self, prefix: str, limit: int, role: UserRole | None = None
+    ) -> list[tuple[int, str, UserRole]]:
+        """
+        Find the users whose username starts with a prefix.
+
+        The prefix is matched regardless of case.
+
+        Parameters
+        ----------
+        prefix : str
+            The start of the usernames.
+        limit : int
+            The most users to return.
+        role : UserRole | None, optional
+            Only return users with this role, by default any.
+
+        Returns
+        -------
+        list[tuple[int, str, UserRole]]
+            The ID, username and role of the users, ordered by case-folded
+            username.
+        """
+        folded = prefix.casefold()
+        found = []
+        index = bisect_left(self._keys, (folded,))
+        while index < len(self._keys) and len(found) < limit:
+            key, username = self._keys[index]
+            if not key.startswith(folded):
+                break
+            user_id, user_role = self._users[username]
+            if role is None or user_role == role:
+                found.append((user_id, username, user_role))
+            index += 1
+        return found
+
+    async def _load(
+        self, session: AsyncSession, stripes: set[int] | None = None
+    ) -> None:
+        """
+        Load the users.
+
+        The users are read before the index is touched and applied without
+        awaiting in between, so concurrent searches never miss them.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The database session.
+        stripes : set[int] | None, optional
+            Only reload the users in these stripes, by default all.
+        """
+        statement = select(User.id, User.username, User.role)
+        if stripes is None:
+            # Plain rows, skipping the ORM's row processing
+            connection = await session.connection()
+            rows = (await connection.execute(statement)).all()
+            self._users = {
+                username: (user_id, role) for user_id, username, role in rows
+            }
+            self._usernames = {
+                user_id: username for user_id, username, _ in rows
+            }
+            # Sorted once, instead of inserting every user in order
+            self._keys = sorted(
+                (username.casefold(), username) for username in self._users
+            )
+            self._max_id = max(self._usernames, default=0)
+            return
+        statement = statement.where(
+            (User.id % len(self.generations)).in_(stripes)
+        )
+        rows = (await session.exec(statement)).all()
+        for user_id in list(self._usernames):
+            if self.generations.stripe(user_id) in stripes:
+                self._remove(user_id)
+        for user_id, username, role in rows:
+            self._add(user_id, username, role)
+
+    async def load_new(self, session: AsyncSession) -> bool:
+        """
+        Load the users added with an ID above every one loaded so far.
+
+        Unlike ``sync``, this reads the database on every call, though only
+        the highest user ID unless there are new users.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The database session.
+
+        Returns
+        -------
+        bool
+            True if any user was loaded.
+        """
+        newest = (await session.exec(select(func.max(User.id)))).one()
+        if newest is None or newest <= self._max_id:
+            return False
+        statement = select(User.id, User.username, User.role).where(
+            User.id > self._max_id
+        )
+        for user_id, username, role in await session.exec(statement):
+            self._add(user_id, username, role)
+        return True
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        """
+        Rebuild the index from the users.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The database session.
+        """
+        # Read before loading, so changes made meanwhile are synced later
+        self._seen = self.generations.snapshot()
+        await self._load(session)
+
+    async def sync(self, session: AsyncSession) -> None:
+        """
+        Reload the users another process changed.
+
+        Without other processes sharing ``generations``, nothing is ever
+        reloaded.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The database session.
+        """
+        current = self.generations.snapshot()
+        stale = {
+            stripe
+            for stripe, (now, seen) in enumerate(
+                zip(current, self._seen, strict=True)
+            )
+            if now != seen
+        }
+        if not stale:
+            return
+        await self._load(session, stale)
+        for stripe in stale:
+            self._seen[stripe] = current[stripe]
+
+
+username_index = UsernameIndex(config.server.cache_stripes)
@@ -0,0 +1,140 @@
+"""Row versions of recently seen users, for conditional requests."""
+
+import secrets
+from collections import OrderedDict
+
+from properties import config
+
+from database.cache.generations import Generations
+
+
+class VersionCache:
+    """
+    Bounded map from row ID to the row's last known version.
+
+    The cache only ever holds versions read from or written to the
+    database by this process, and keeps the highest one seen per row, so
+    an entry is either current or missing.
+    The least recently used entries are evicted beyond ``max_size``.
+
+    Changes to the collection as a whole, e.g. creating a row, bump
+    ``generations``. Combined with a token drawn at startup, it identifies
+    the state of the collection without reading it. When the generation is
+    shared by several worker processes and moves on without this process,
+    another process wrote a row, so the cached versions are forgotten. A
+    read racing such a write can still cache the older version, until the
+    next write.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Create an empty cache.
+
+        Parameters
+        ----------
+        max_size : int
+            The maximum number of rows to remember.
+        """
+        self.max_size = max_size
+        self.generations = Generations(1)
+        self._seen = 0
+        self._token = secrets.token_hex(4)
+        self._versions: OrderedDict[int, int] = OrderedDict()
+
+    def _sync(self) -> None:
+        """Forget the cached versions if another process wrote a row."""
+        generation = self.generations[0]
+        if generation != self._seen:
+            self._versions.clear()
+            self._seen = generation
+
+    def get(self, row_id: int) -> int | None:
+        """
+        Get the version of a row.
+
+        Parameters
+        ----------
+        row_id : int
+            The row ID.
+
+        Returns
+        -------
+        int | None
+            The version, or None if the row is not cached.
+        """
+        self._sync()
+        version = self._versions.get(row_id)
+        if version is not None:
+            self._versions.move_to_end(row_id)
+        return version
+
+    def set(self, row_id: int, version: int) -> None:
+        """
+        Remember the version of a row.
+
+        Parameters
+        ----------
+        row_id : int
+            The row ID.
+        version : int
+            The row's version.
+        """
+        # Versions only grow, so a slow reader can not overwrite a newer one
+        self._versions[row_id] = max(version, self._versions.get(row_id, 0))
+        self._versions.move_to_end(row_id)
+        if len(self._versions) > self.max_size:
+            self._versions.popitem(last=False)
+
+    def touch(self) -> None:
+        """Record a change to the collection, e.g. rows added elsewhere."""
+        before = self.generations.bump(0)
+        if before != self._seen:
+            self._versions.clear()
+        self._seen = before + 1
+
+    def changed(self, row_id: int, version: int) -> None:
+        """
+        Record a write to a row, which also changes the collection.
+
+        Parameters
+        ----------
+        row_id : int
+            The row ID.
+        version : int
+            The row's new version.
+        """
+        self.touch()
+        self.set(row_id, version)
+
+    def collection_tag(self) -> str:
+        """
+        Get a strong ETag for the current state of the collection.
+
+        Returns
+        -------
+        str
+            The quoted entity tag.
+        """
+        return f'"{self._token}-{self.generations[0]}"'
+
+    @staticmethod
+    def row_tag(row_id: int, version: int) -> str:
+        """
+        Get a strong ETag for a version of a row.
+
+        Parameters
+        ----------
+        row_id : int
+            The row ID.
+        version : int
+            The row's version.
+
+        Returns
+        -------
+        str
+            The quoted entity tag.
+        """
+        return f'"{row_id}-{version}"'
+
+
+user_versions = VersionCache(config.api.etag.cache_size)
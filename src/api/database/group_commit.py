@@ -0,0 +1,224 @@
+"""Concurrent writes applied together, one commit per batch."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from properties import config
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from utils.logging import logger
+
+from database import begin_immediate, engine
+
+# A write, run in the transaction of the session it is given
+type Write[T] = Callable[[AsyncSession], Awaitable[T]]
+
+
+class GroupCommitWriter:
+    """
+    Apply concurrent writes in shared transactions.
+
+    Writes are queued and applied by a single background task. The first
+    write of a batch waits up to ``max_wait`` seconds for more, up to
+    ``max_batch`` in total, then all of them run in one ``BEGIN
+    IMMEDIATE`` transaction, each in its own savepoint, and are committed
+    together. A write that raises, e.g. an ``IntegrityError``, is rolled
+    back to its savepoint and its caller gets the exception, while the
+    rest of the batch is still committed. If the commit itself fails,
+    every caller of the batch gets the exception.
+
+    The writer is started on first use.
+    """
+
+    def __init__(
+        self, engine: AsyncEngine, max_batch: int, max_wait: float
+    ) -> None:
+        """
+        Create a writer.
+
+        Parameters
+        ----------
+        engine : AsyncEngine
+            The engine to write with.
+        max_batch : int
+            The most writes committed together.
+        max_wait : float
+            The longest time in seconds a write waits for others to join.
+        """
+        self.engine = engine
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue[tuple[Write, asyncio.Future]] | None = None
+        self._task: asyncio.Task | None = None
+
+    async def submit[T](self, write: Write[T]) -> T:
+        """
+        Queue a write and wait until its batch is committed.
+
+        Parameters
+        ----------
+        write : Write[T]
+            The write, only adding or changing rows through the session it
+            is given. It must not commit.
+
+        Returns
+        -------
+        T
+            The result of the write.
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((write, future))
+        return await future
+
+    async def _collect(self) -> list[tuple[Write, asyncio.Future]]:
+        """
+        Wait for a batch of writes.
+
+        Returns
+        -------
+        list[tuple[Write, asyncio.Future]]
+            The writes with the futures of their callers.
+        """
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except TimeoutError:
+                    break
+            else:
+                batch.append(self._queue.get_nowait())
+        return batch
+
+    @staticmethod
+    async def _run_writes(
+        session: AsyncSession, batch: list[tuple[Write, asyncio.Future]]
+    ) -> list[tuple[asyncio.Future, Any]]:
+        """
+        Run each write of a batch in its own savepoint.
+
+        A write that raises is rolled back and its caller gets the
+        exception straight away.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            The session of the batch's transaction.
+        batch : list[tuple[Write, asyncio.Future]]
+            The writes with the futures of their callers.
+
+        Returns
+        -------
+        list[tuple[asyncio.Future, Any]]
+            The futures of the writes that succeeded, with their results.
+        """
+        results = []
+        for write, future in batch:
+            # The caller gave up, e.g. the client disconnected
+            if future.done():
+                continue
+            try:
+                async with session.begin_nested():
+                    result = await write(session)
+            except Exception as err:
+                future.set_exception(err)
+            else:
+                results.append((future, result))
+        return results
+
+    async def _apply(self, batch: list[tuple[Write, asyncio.Future]]) -> None:
+        """
+        Run a batch of writes in one transaction and commit it.
+
+        Parameters
+        ----------
+        batch : list[tuple[Write, asyncio.Future]]
+            The writes with the futures of their callers.
+        """
+        try:
+            async with AsyncSession(
+                self.engine, expire_on_commit=False
+            ) as session:
+                await begin_immediate(session)
+                results = await self._run_writes(session, batch)
+                await session.commit()
+        except Exception as err:
+            logger.error("Group commit of {} writes failed.", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+        else:
+            logger.debug("Committed {} writes together.", len(results))
+            for future, result in results:
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _run(self) -> None:
+        """Apply the queued writes batch by batch."""
+        while True:
+            await self._apply(await self._collect())
+
+    async def close(self) -> None:
+        """Wait for the queued writes to be committed, then stop."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        self._task = None
+
+
+async def apply_write[T](session: AsyncSession, write: Write[T]) -> T:
+    """
+    Apply a write, through the group commit writer if it is enabled.
+
+    Without the writer, the write runs in the given session in a ``BEGIN
+    IMMEDIATE`` transaction of its own.
+
+    Parameters
+    ----------
+    session : AsyncSession
+        The request's database session.
+    write : Write[T]
+        The write, only adding or changing rows through the session it is
+        given. It must not commit.
+
+    Returns
+    -------
+    T
+        The result of the write.
+    """
+    if group_commit is not None:
+        return await group_commit.submit(write)
+    await begin_immediate(session)
+    try:
+        result = await write(session)
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    return result
+
+
+group_commit = (
+    GroupCommitWriter(
+        engine,
+        config.database.group_commit.max_batch,
+        config.database.group_commit.max_wait_ms / 1000,
+    )
+    if config.database.group_commit.enabled
+    else None
+)
@@ -0,0 +1,197 @@
+"""Time the SQL statements and track the connection pool."""
+
+import re
+import time
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.metrics import registry
+
+# Seconds, SQLite statements mostly take well under a millisecond
+STATEMENT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    1.0,
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETERS = re.compile(r"\?(?:, \?)+")
+_ROWS = re.compile(r"(\([^()]*\))(?:, \1)+")
+
+statement_duration = registry.histogram(
+    "db_statement_duration_seconds",
+    "Time to execute an SQL statement, by normalised statement.",
+    ("statement",),
+    STATEMENT_BUCKETS,
+)
+statement_errors = registry.counter(
+    "db_statement_errors_total",
+    "SQL statements that raised an error, by normalised statement.",
+    ("statement",),
+)
+session_duration = registry.histogram(
+    "db_session_duration_seconds",
+    "Time a request holds a database session, by pool.",
+    ("pool",),
+)
+connection_duration = registry.histogram(
+    "db_connection_checkout_seconds",
+    "Time a connection is checked out of its pool.",
+    ("pool",),
+)
+pool_connections = registry.gauge(
+    "db_pool_connections",
+    "Connections of the pools by state.",
+    ("pool", "state"),
+)
+
+
+@lru_cache(maxsize=1024)
+def normalise(statement: str) -> str:
+    """
+    Reduce an SQL statement to its shape.
+
+    Literals become ``?``, and lists of parameters or rows of any length
+    become one element followed by ``...``, so statements differing only
+    in their values are counted together.
+
+    Parameters
+    ----------
+    statement : str
+        The SQL statement.
+
+    Returns
+    -------
+    str
+        The normalised statement.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _LITERALS.sub("?", statement)
+    statement = _PARAMETERS.sub("?, ...", statement)
+    return _ROWS.sub(r"\1, ...", statement)
+
+
+def _stop_timer(
+    connection: Any,
+    cursor: Any,
+    statement: str | None,
+    max_statements: int,
+    failed: bool,
+) -> None:
+    """
+    Record how long a statement took, if it was timed.
+
+    Parameters
+    ----------
+    connection : Any
+        The connection the statement ran on, None for an error on
+        connecting.
+    cursor : Any
+        The cursor the statement ran on, None for an error outside a
+        statement.
+    statement : str | None
+        The SQL statement.
+    max_statements : int
+        The most statements timed separately.
+    failed : bool
+        If the statement raised an error.
+    """
+    if connection is None or cursor is None:
+        return
+    started = connection.info.get("statement_started", {}).pop(
+        id(cursor), None
+    )
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    labels = (normalise(statement),)
+    if (
+        labels not in statement_duration
+        and len(statement_duration) >= max_statements
+    ):
+        labels = ("other",)
+    statement_duration.observe(elapsed, labels)
+    if failed:
+        statement_errors.inc(labels)
+
+
+def instrument(engine: Engine, max_statements: int, pool: str) -> None:
+    """
+    Record the statement timings and pool usage of an engine.
+
+    Parameters
+    ----------
+    engine : Engine
+        The synchronous engine, e.g. ``AsyncEngine.sync_engine``.
+    max_statements : int
+        The most statements timed separately, the rest are counted as
+        ``other``.
+    pool : str
+        The name of the engine's pool in the metrics, e.g. "read".
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(connection: Any, cursor: Any, *_: Any) -> None:
+        """Note when a statement starts."""
+        # By cursor, so a statement that fails can not be mistaken for
+        # another one
+        connection.info.setdefault("statement_started", {})[id(cursor)] = (
+            time.perf_counter()
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def statement_done(
+        connection: Any, cursor: Any, statement: str, *_: Any
+    ) -> None:
+        """Record a statement that succeeded."""
+        _stop_timer(connection, cursor, statement, max_statements, False)
+
+    @event.listens_for(engine, "handle_error")
+    def statement_failed(context: Any) -> None:
+        """Record a statement that raised an error."""
+        # The context's own cursor attribute is never set
+        _stop_timer(
+            context.connection,
+            getattr(context.execution_context, "cursor", None),
+            context.statement,
+            max_statements,
+            True,
+        )
+
+    @event.listens_for(engine, "checkout")
+    def connection_out(_: Any, record: Any, __: Any) -> None:
+        """Note when a connection leaves the pool."""
+        record.info["checked_out"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def connection_in(_: Any, record: Any) -> None:
+        """Record how long a connection was out of the pool."""
+        started = record.info.pop("checked_out", None)
+        if started is not None:
+            connection_duration.observe(time.perf_counter() - started, (pool,))
+
+    @registry.collector
+    def read_pool() -> None:
+        """Read the pool usage into its gauge."""
+        connections = engine.pool
+        # Only a queue pool, used for database files, has a size
+        if not hasattr(connections, "checkedout"):
+            return
+        pool_connections.set(connections.size(), (pool, "size"))
+        pool_connections.set(connections.checkedout(), (pool, "checked_out"))
+        pool_connections.set(connections.checkedin(), (pool, "idle"))
+        pool_connections.set(
+            max(connections.overflow(), 0), (pool, "overflow")
+        )
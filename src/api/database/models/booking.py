@@ -3,6 +3,7 @@
 from datetime import datetime
 from enum import Enum
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -46,6 +47,15 @@ class Booking(SQLModel, table=True):
         Base model for SQLModel.
     """
 
+    __table_args__ = (
+        # Bookings at a place overlapping a time window
+        Index("ix_booking_place_time", "place_id", "start_time", "end_time"),
+        # Bookings of a user from a point in time
+        Index("ix_booking_user_start", "user_id", "start_time"),
+        # Active bookings that have not ended yet
+        Index("ix_booking_status_end", "status", "end_time"),
+    )
+
     id: int = Field(primary_key=True, index=True)
     user_id: int = Field(foreign_key="user.id")
     place_id: int = Field(foreign_key="place.id")
@@ -0,0 +1,61 @@
+"""Model for booking series."""
+
+from datetime import date, datetime
+from enum import Enum
+
+from sqlalchemy import JSON, Column, Index
+from sqlmodel import Field, SQLModel
+
+from database.models.booking import BookedArea, Status
+
+
+class Frequency(Enum):
+    """
+    Types of recurrence.
+
+    Parameters
+    ----------
+    Enum : enum.Enum
+        Base class for creating enumerated constants.
+    """
+
+    weekly = "weekly"
+    biweekly = "biweekly"
+
+
+class BookingSeries(SQLModel, table=True):
+    """
+    Model for a recurring booking.
+
+    The first occurrence is ``start_time`` to ``end_time``, and the next
+    ones follow at the interval given by ``frequency`` up to and including
+    the day ``until``. Days listed in ``exceptions`` are skipped. The
+    occurrences themselves are never stored.
+
+    Parameters
+    ----------
+    SQLModel : sqlmodel.SQLModel
+        Base model for SQLModel.
+    """
+
+    __tablename__ = "booking_series"
+    __table_args__ = (
+        # Active series that have not ended yet
+        Index("ix_booking_series_status_until", "status", "until"),
+        # Series at a place that have not ended yet
+        Index("ix_booking_series_place_until", "place_id", "until"),
+    )
+
+    id: int = Field(primary_key=True, index=True)
+    user_id: int = Field(foreign_key="user.id")
+    place_id: int = Field(foreign_key="place.id")
+    start_time: datetime
+    end_time: datetime
+    booked_area: BookedArea
+    frequency: Frequency
+    until: date
+    # ISO dates of the skipped occurrences
+    exceptions: list[str] = Field(
+        default_factory=list, sa_column=Column(JSON, nullable=False)
+    )
+    status: Status
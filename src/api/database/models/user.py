@@ -34,4 +34,6 @@ class User(SQLModel, table=True):
     id: int = Field(primary_key=True, index=True)
     username: str = Field(max_length=50, unique=True)
     password_hash: str = Field(max_length=100)
-    role: UserRole
+    role: UserRole = Field(index=True)
+    # Bumped on every write, used for ETags
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
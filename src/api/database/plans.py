@@ -0,0 +1,100 @@
+"""Check that the hot queries are served by indexes."""
+
+from datetime import datetime
+
+from sqlalchemy import Connection
+from sqlalchemy.sql import Select
+from sqlmodel import select
+
+from database.models.booking import Booking, Status
+from database.models.booking_series import BookingSeries
+from database.models.place import Place
+from database.models.user import User, UserRole
+
+_MOMENT = datetime(2000, 1, 1)
+
+# The queries run on every request or at startup, by name
+HOT_QUERIES: dict[str, Select] = {
+    "user by id": select(User).where(User.id == 1),
+    "user by username": select(User).where(User.username == "name"),
+    "users page": select(User).where(User.id > 1).order_by(User.id).limit(1),
+    "users page by role": select(User)
+    .where(User.role == UserRole.user, User.id > 1)
+    .order_by(User.id)
+    .limit(1),
+    "place by name": select(Place).where(Place.name == "name"),
+    "bookings of a place in a window": select(Booking).where(
+        Booking.place_id == 1,
+        Booking.start_time < _MOMENT,
+        Booking.end_time > _MOMENT,
+    ),
+    "bookings of a user": select(Booking).where(
+        Booking.user_id == 1, Booking.start_time >= _MOMENT
+    ),
+    "upcoming active bookings": select(Booking).where(
+        Booking.status == Status.active, Booking.end_time > _MOMENT
+    ),
+    "series of a place": select(BookingSeries).where(
+        BookingSeries.place_id == 1,
+        BookingSeries.status == Status.active,
+        BookingSeries.until >= _MOMENT.date(),
+        BookingSeries.start_time < _MOMENT,
+    ),
+    "upcoming active series": select(BookingSeries).where(
+        BookingSeries.status == Status.active,
+        BookingSeries.until >= _MOMENT.date(),
+    ),
+}
+
+
+class FullScanError(RuntimeError):
+    """A hot query scans a whole table instead of using an index."""
+
+
+def query_plan(connection: Connection, statement: Select) -> list[str]:
+    """
+    Get the SQLite query plan of a statement.
+
+    Parameters
+    ----------
+    connection : Connection
+        The database connection.
+    statement : Select
+        The statement to explain.
+
+    Returns
+    -------
+    list[str]
+        The detail of each step of the plan, e.g. "SCAN booking".
+    """
+    compiled = statement.compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    result = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+    return [row.detail for row in result]
+
+
+def verify_query_plans(connection: Connection) -> None:
+    """
+    Check that none of the ``HOT_QUERIES`` scans a whole table.
+
+    Parameters
+    ----------
+    connection : Connection
+        The database connection.
+
+    Raises
+    ------
+    FullScanError
+        If any of the queries scans a whole table.
+    """
+    scans = []
+    for name, statement in HOT_QUERIES.items():
+        plan = query_plan(connection, statement)
+        scans.extend(
+            f"{name}: {step}" for step in plan if step.startswith("SCAN ")
+        )
+    if scans:
+        raise FullScanError(
+            "Queries scanning a whole table: " + "; ".join(scans)
+        )
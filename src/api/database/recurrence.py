@@ -0,0 +1,80 @@
+"""Expansion of booking series into occurrences."""
+
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+
+from database.models.booking_series import BookingSeries, Frequency
+
+STEPS = {
+    Frequency.weekly: timedelta(weeks=1),
+    Frequency.biweekly: timedelta(weeks=2),
+}
+
+
+def count_occurrences(
+    start_time: datetime, until: date, frequency: Frequency
+) -> int:
+    """
+    Count the occurrences of a series, exceptions included.
+
+    Parameters
+    ----------
+    start_time : datetime
+        The start of the first occurrence.
+    until : date
+        The last day an occurrence may start on.
+    frequency : Frequency
+        The recurrence.
+
+    Returns
+    -------
+    int
+        The number of occurrences.
+    """
+    days = (until - start_time.date()).days
+    return max(days // STEPS[frequency].days + 1, 0)
+
+
+def occurrences(
+    series: BookingSeries,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Iterator[tuple[int, datetime, datetime]]:
+    """
+    Generate the occurrences of a series, lazily and in order.
+
+    Occurrences before ``start`` are jumped over rather than generated, so
+    reading a window far into a long series costs only the window.
+
+    Parameters
+    ----------
+    series : BookingSeries
+        The series.
+    start : datetime | None, optional
+        Only occurrences ending after this, by default from the first one.
+    end : datetime | None, optional
+        Only occurrences starting before this, by default up to the last
+        one.
+
+    Yields
+    ------
+    Iterator[tuple[int, datetime, datetime]]
+        The number of the occurrence, counting skipped ones, its start and
+        its end.
+    """
+    step = STEPS[series.frequency]
+    duration = series.end_time - series.start_time
+    skipped = set(series.exceptions)
+    number = 0
+    if start is not None and start > series.end_time:
+        number = (start - series.end_time) // step
+    while True:
+        begin = series.start_time + number * step
+        if begin.date() > series.until or (end is not None and begin >= end):
+            return
+        finish = begin + duration
+        if (start is None or finish > start) and (
+            begin.date().isoformat() not in skipped
+        ):
+            yield number, begin, finish
+        number += 1
@@ -7,12 +7,23 @@ from datetime import UTC, datetime
 from typing import Any
 
 import uvicorn
-from database import create_db_and_tables, dispose
+from database import (
+    build_caches,
+    create_db_and_tables,
+    dispose,
+    log_database_settings,
+)
+from database.group_commit import group_commit
 from fastapi import FastAPI
 from properties import config, settings
-from routers import users
-from utils.logging import logger
+from routers import bookings, metrics, places, series, users
+from utils.logging import logger, logger_instance
 from utils.logging.helpers import seconds_elapsed
+from utils.logging.sampling import LogSamplingMiddleware
+from utils.metrics import registry
+from utils.metrics.middleware import MetricsMiddleware
+from utils.passwords import password_hasher
+from utils.responses import ORJSON_AVAILABLE
 
 
 @asynccontextmanager
@@ -35,14 +46,24 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[Any]:
     """
     start_time = datetime.now(UTC)
     logger.info("Starting the application.")
-    create_db_and_tables()
+    # The launcher prepares the database once, before forking the workers
+    if not getattr(app.state, "prepared", False):
+        await create_db_and_tables()
+        await log_database_settings()
+    await build_caches()
+    if config.api.json.fast and not ORJSON_AVAILABLE:
+        logger.warning("orjson is not installed, using the standard encoder.")
     yield
     # close the database engine on shutdown
     logger.info("Shutting down the application.")
-    dispose()
+    if group_commit is not None:
+        await group_commit.close()
+    await dispose()
+    password_hasher.shutdown()
     # logger.info("Application shutdown complete.")
     logger.info("Application shutdown complete.")
-    logger.info(f"Time elapsed: {seconds_elapsed(start_time)} seconds.")
+    logger.info("Time elapsed: {} seconds.", seconds_elapsed(start_time))
+    logger_instance.flush()
 
 
 # Create FastAPI app instance after logging configuration
@@ -83,11 +104,29 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Sample the request logs if enabled in the configuration
+if logger_instance.sampler is not None:
+    app.add_middleware(LogSamplingMiddleware, sampler=logger_instance.sampler)
+# Record the request metrics, added last to time the other middleware too
+if config.metrics.enabled:
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
 # add routers to the FastAPI app
 logger.info("Including users router.")
 app.include_router(users.router)
+logger.info("Including places router.")
+app.include_router(places.router)
+# Before the bookings router, so /bookings/series is not read as an ID
+logger.info("Including booking series router.")
+app.include_router(series.router)
+logger.info("Including bookings router.")
+app.include_router(bookings.router)
+if config.metrics.enabled:
+    logger.info("Including metrics router.")
+    app.include_router(metrics.router)
 
 
+# A single process for development, python -m cli.serve runs the workers
 if __name__ == "__main__":
     uvicorn.run(
         app=f"{__name__}:app",
@@ -1,21 +1,86 @@
 """Helper functions for finding a file."""
 
 import os
+from functools import lru_cache
 
+# Directories that never hold project files and can be large, e.g. the git
+# objects, virtual environments, built documentation and log archives
+PRUNED_DIRECTORIES = frozenset(
+    {
+        ".git",
+        ".venv",
+        "venv",
+        ".tox",
+        ".nox",
+        "node_modules",
+        "__pycache__",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".ruff_cache",
+        "site",
+        "docs",
+        "logs",
+    }
+)
 
-def _walk_to_root(path: str):
+
+def environment_variable(filename: str) -> str:
+    """
+    Get the name of the environment variable overriding a file's path.
+
+    Parameters
+    ----------
+    filename : str
+        The name of the file, e.g. "configuration.toml".
+
+    Returns
+    -------
+    str
+        The variable name, e.g. "SJENK_CONFIGURATION".
+    """
+    stem = os.path.splitext(filename)[0]
+    return f"SJENK_{stem.upper()}"
+
+
+def _walk_to_root(path: str, filename: str) -> tuple[str | None, str]:
+    """
+    Look for a file in a directory and its parents up to the project root.
+
+    Parameters
+    ----------
+    path : str
+        The directory to start from.
+    filename : str
+        The name of the file to find.
+
+    Returns
+    -------
+    tuple[str | None, str]
+        The project root, None if there is no ``.git`` above ``path``, and
+        the full path to the file, empty string if it is not found.
+    """
     while True:
+        candidate = os.path.join(path, filename)
+        if os.path.isfile(candidate):
+            return path, candidate
         if os.path.exists(os.path.join(path, ".git")):
-            return path
-        path = os.path.dirname(path)
-        if path == "/":
-            return None
+            return path, ""
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None, ""
+        path = parent
 
 
+@lru_cache
 def find(filename: str) -> str:
     """
     Find a file in the project.
 
+    The environment variable named by ``environment_variable`` takes
+    precedence. Otherwise the directories from this package up to the
+    project root are checked, and only then is the project walked, skipping
+    the ``PRUNED_DIRECTORIES``. The result is cached.
+
     Parameters
     ----------
     filename : str
@@ -26,12 +91,18 @@ def find(filename: str) -> str:
     str
         The full path to the file. Empty string if not found.
     """
-    root = _walk_to_root(os.path.dirname(__file__))
-    if root is None:
-        return ""
-    for current_root, _, files in os.walk(root):
+    override = os.environ.get(environment_variable(filename))
+    if override:
+        return override
+    root, path = _walk_to_root(os.path.dirname(__file__), filename)
+    if path or root is None:
+        return path
+    for current_root, directories, files in os.walk(root):
         if filename in files:
             return os.path.join(current_root, filename)
-        if filename in files:
-            return os.path.join(root, filename)
+        directories[:] = [
+            directory
+            for directory in directories
+            if directory not in PRUNED_DIRECTORIES
+        ]
     return ""
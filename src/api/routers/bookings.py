@@ -0,0 +1,190 @@
+"""Booking API routes."""
+
+from controllers.bookings_controller import (
+    cancel_booking_controller,
+    create_booking_controller,
+    read_booking_controller,
+    update_booking_controller,
+)
+from database import SessionDep
+from database.cache.availability import BookingConflictError
+from fastapi import APIRouter, HTTPException, status
+from schemas.bookings import BookingCreate, BookingRead, BookingUpdate
+from utils.logging import logger
+
+router = APIRouter(
+    prefix="/bookings",
+    tags=["bookings"],
+)
+
+
+@router.post(
+    "", response_model=BookingRead, status_code=status.HTTP_201_CREATED
+)
+async def create_booking(
+    booking: BookingCreate, session: SessionDep
+) -> BookingRead:
+    """
+    Create a booking.
+
+    Parameters
+    ----------
+    booking : BookingCreate
+
+        The booking to create.
+
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    BookingRead
+
+        The created booking.
+    """
+    logger.info("Creating booking for place with ID: {}", booking.place_id)
+    try:
+        created_booking = await create_booking_controller(booking, session)
+    except BookingConflictError as err:
+        logger.warning("Booking conflicts with existing bookings: {}", err)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The place is already booked in that period",
+        ) from err
+    if created_booking is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Place with place id {booking.place_id} not found",
+        )
+    logger.info("Booking created successfully: {}", created_booking.id)
+    return created_booking
+
+
+@router.get(
+    "/{booking_id}",
+    response_model=BookingRead,
+    status_code=status.HTTP_200_OK,
+)
+async def read_booking(booking_id: int, session: SessionDep) -> BookingRead:
+    """
+    Read a booking.
+
+    Parameters
+    ----------
+    booking_id : int
+
+        The booking ID.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    BookingRead
+
+        The booking.
+    """
+    logger.info("Fetching booking with ID: {}", booking_id)
+    db_booking = await read_booking_controller(booking_id, session)
+    if db_booking is None:
+        logger.warning("Booking with ID {} not found.", booking_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Booking with booking id {booking_id} not found",
+        )
+    logger.info("Fetched booking with ID: {} successfully.", booking_id)
+    return db_booking
+
+
+@router.put(
+    "/{booking_id}",
+    response_model=BookingRead,
+    status_code=status.HTTP_200_OK,
+)
+async def update_booking(
+    booking_id: int, booking: BookingUpdate, session: SessionDep
+) -> BookingRead:
+    """
+    Update a booking.
+
+    Parameters
+    ----------
+    booking_id : int
+
+        The booking ID.
+    booking : BookingUpdate
+
+        The booking to update.
+    session : SessionDep
+
+        The database session
+
+    Returns
+    -------
+    BookingRead
+
+        The updated booking.
+    """
+    logger.info("Updating booking with ID: {}", booking_id)
+    try:
+        db_booking = await update_booking_controller(
+            booking_id, booking, session
+        )
+    except BookingConflictError as err:
+        logger.warning("Booking conflicts with existing bookings: {}", err)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The place is already booked in that period",
+        ) from err
+    except ValueError as err:
+        raise HTTPException(
+            status_code=422,
+            detail=str(err),
+        ) from err
+    if db_booking is None:
+        logger.warning("Booking with ID {} not found.", booking_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Booking with booking id {booking_id} not found",
+        )
+    logger.info("Updated booking with ID: {} successfully.", booking_id)
+    return db_booking
+
+
+@router.delete(
+    "/{booking_id}",
+    response_model=BookingRead,
+    status_code=status.HTTP_200_OK,
+)
+async def cancel_booking(booking_id: int, session: SessionDep) -> BookingRead:
+    """
+    Cancel a booking.
+
+    The booking is kept with status `cancelled` and frees its capacity.
+
+    Parameters
+    ----------
+    booking_id : int
+
+        The booking ID.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    BookingRead
+
+        The cancelled booking.
+    """
+    logger.info("Cancelling booking with ID: {}", booking_id)
+    db_booking = await cancel_booking_controller(booking_id, session)
+    if db_booking is None:
+        logger.warning("Booking with ID {} not found.", booking_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Booking with booking id {booking_id} not found",
+        )
+    logger.info("Cancelled booking with ID: {} successfully.", booking_id)
+    return db_booking
@@ -0,0 +1,25 @@
+"""Metrics API route."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from properties import config
+from utils.metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+# The version of the Prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get(config.metrics.path, include_in_schema=False)
+async def read_metrics() -> PlainTextResponse:
+    """
+    Read the request and database metrics in the Prometheus text format.
+
+    Returns
+    -------
+    PlainTextResponse
+
+        The metrics.
+    """
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,384 @@
+"""Place API routes."""
+
+from datetime import date, datetime, timedelta
+from typing import Annotated
+
+from controllers.places_controller import (
+    check_availability_controller,
+    create_place_controller,
+    read_availability_controller,
+    read_occupancy_controller,
+    read_place_controller,
+    read_places_controller,
+    search_slots_controller,
+)
+from database import SessionDep
+from database.models.booking import BookedArea
+from fastapi import APIRouter, HTTPException, Query, status
+from properties import config
+from schemas.bookings import to_naive_utc
+from schemas.places import (
+    BookingFit,
+    FreeCapacity,
+    PlaceCreate,
+    PlaceOccupancy,
+    PlaceRead,
+    SlotCandidate,
+)
+from sqlalchemy.exc import IntegrityError
+from utils.logging import logger
+
+router = APIRouter(
+    prefix="/places",
+    tags=["places"],
+)
+
+# Query parameters for a time window, shared by the availability routes
+FromQuery = Annotated[datetime, Query(alias="from")]
+ToQuery = Annotated[datetime, Query(alias="to")]
+FromDayQuery = Annotated[date, Query(alias="from")]
+ToDayQuery = Annotated[date, Query(alias="to")]
+
+
+def _check_window(start: datetime, end: datetime) -> tuple[datetime, datetime]:
+    """
+    Normalise a time window and reject one that ends before it starts.
+
+    Parameters
+    ----------
+    start : datetime
+        The start of the window, naive UTC or with a time zone.
+    end : datetime
+        The end of the window, naive UTC or with a time zone.
+
+    Returns
+    -------
+    tuple[datetime, datetime]
+        The start and end as naive UTC, so they can be compared even if
+        only one of them was given with a time zone.
+
+    Raises
+    ------
+    HTTPException
+        If the window is empty.
+    """
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    if end <= start:
+        raise HTTPException(
+            status_code=422,
+            detail="'to' must be after 'from'",
+        )
+    return start, end
+
+
+def _place_not_found(place_id: int) -> HTTPException:
+    """
+    Build the error for a missing place.
+
+    Parameters
+    ----------
+    place_id : int
+        The place ID.
+
+    Returns
+    -------
+    HTTPException
+        The not found error.
+    """
+    logger.warning("Place with ID {} not found.", place_id)
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Place with place id {place_id} not found",
+    )
+
+
+@router.post("", response_model=PlaceRead, status_code=status.HTTP_201_CREATED)
+async def create_place(place: PlaceCreate, session: SessionDep) -> PlaceRead:
+    """
+    Create a place.
+
+    Parameters
+    ----------
+    place : PlaceCreate
+
+        The place to create.
+
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    PlaceRead
+
+        The created place.
+    """
+    logger.info("Creating place with name: {}", place.name)
+    try:
+        created_place = await create_place_controller(place, session)
+        logger.info("Place created successfully: {}", created_place.name)
+        return created_place
+    except IntegrityError as err:
+        logger.error("Failed to create place: {}", err)
+        raise HTTPException(
+            status_code=400, detail="Place name already exists"
+        ) from err
+
+
+@router.get("", response_model=list[PlaceRead], status_code=status.HTTP_200_OK)
+async def read_places(session: SessionDep) -> list[PlaceRead]:
+    """
+    Read all places.
+
+    Parameters
+    ----------
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    list[PlaceRead]
+
+        The places.
+    """
+    logger.info("Fetching all places.")
+    places = await read_places_controller(session)
+    logger.info("Fetched all places successfully.")
+    return places
+
+
+@router.get(
+    "/search",
+    response_model=list[SlotCandidate],
+    status_code=status.HTTP_200_OK,
+)
+async def search_slots(
+    start: FromQuery,
+    end: ToQuery,
+    duration: Annotated[int, Query(ge=1, le=24 * 60)],
+    booked_area: BookedArea,
+    session: SessionDep,
+    limit: Annotated[int, Query(ge=1, le=config.api.search.max_limit)] = 20,
+) -> list[SlotCandidate]:
+    """
+    Find places and start times where a booking fits, earliest first.
+
+    Starts are aligned to the occupancy slots, and a slot that is only
+    partly booked counts as booked, so the candidates always fit.
+
+    Parameters
+    ----------
+    start : datetime
+
+        The earliest start, given as `from`.
+    end : datetime
+
+        The latest end, given as `to`.
+    duration : int
+
+        The length of the booking in minutes.
+    booked_area : BookedArea
+
+        The area to book.
+    session : SessionDep
+
+        The database session.
+    limit : int
+
+        The maximum number of candidates.
+
+    Returns
+    -------
+    list[SlotCandidate]
+
+        The candidates, ordered by start time, then place ID.
+    """
+    start, end = _check_window(start, end)
+    if end - start > timedelta(days=config.api.search.max_days):
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"Search windows cover at most {config.api.search.max_days} "
+                "days"
+            ),
+        )
+    logger.info("Searching slots for {} minutes.", duration)
+    candidates = await search_slots_controller(
+        start, end, timedelta(minutes=duration), booked_area, limit, session
+    )
+    logger.info("Found {} slot candidates.", len(candidates))
+    return candidates
+
+
+@router.get(
+    "/{place_id}", response_model=PlaceRead, status_code=status.HTTP_200_OK
+)
+async def read_place(place_id: int, session: SessionDep) -> PlaceRead:
+    """
+    Read a place.
+
+    Parameters
+    ----------
+    place_id : int
+
+        The place ID.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    PlaceRead
+
+        The place.
+    """
+    logger.info("Fetching place with ID: {}", place_id)
+    db_place = await read_place_controller(place_id, session)
+    if db_place is None:
+        raise _place_not_found(place_id)
+    logger.info("Fetched place with ID: {} successfully.", place_id)
+    return db_place
+
+
+@router.get(
+    "/{place_id}/availability",
+    response_model=list[FreeCapacity],
+    status_code=status.HTTP_200_OK,
+)
+async def read_availability(
+    place_id: int, start: FromQuery, end: ToQuery, session: SessionDep
+) -> list[FreeCapacity]:
+    """
+    Read the free capacity of a place between two points in time.
+
+    Parameters
+    ----------
+    place_id : int
+
+        The place ID.
+    start : datetime
+
+        The start of the window, given as `from`.
+    end : datetime
+
+        The end of the window, given as `to`.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    list[FreeCapacity]
+
+        Consecutive periods with the number of free quarter units.
+    """
+    start, end = _check_window(start, end)
+    logger.info("Fetching availability for place with ID: {}", place_id)
+    free = await read_availability_controller(place_id, start, end, session)
+    if free is None:
+        raise _place_not_found(place_id)
+    logger.info("Fetched availability for place with ID: {}.", place_id)
+    return free
+
+
+@router.get(
+    "/{place_id}/availability/check",
+    response_model=BookingFit,
+    status_code=status.HTTP_200_OK,
+)
+async def check_availability(
+    place_id: int,
+    start: FromQuery,
+    end: ToQuery,
+    booked_area: BookedArea,
+    session: SessionDep,
+) -> BookingFit:
+    """
+    Check if a booking would fit at a place.
+
+    Parameters
+    ----------
+    place_id : int
+
+        The place ID.
+    start : datetime
+
+        The start of the booking, given as `from`.
+    end : datetime
+
+        The end of the booking, given as `to`.
+    booked_area : BookedArea
+
+        The area to book.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    BookingFit
+
+        Whether the booking fits.
+    """
+    start, end = _check_window(start, end)
+    logger.info("Checking availability for place with ID: {}", place_id)
+    fit = await check_availability_controller(
+        place_id, start, end, booked_area, session
+    )
+    if fit is None:
+        raise _place_not_found(place_id)
+    logger.info("Checked availability for place with ID: {}.", place_id)
+    return fit
+
+
+@router.get(
+    "/{place_id}/occupancy",
+    response_model=PlaceOccupancy,
+    status_code=status.HTTP_200_OK,
+)
+async def read_occupancy(
+    place_id: int, first: FromDayQuery, last: ToDayQuery, session: SessionDep
+) -> PlaceOccupancy:
+    """
+    Read the occupancy of a place per time slot, for a calendar view.
+
+    Days are UTC calendar days. Each day is a string with one digit per
+    slot, the peak number of quarter units in use during that slot.
+
+    Parameters
+    ----------
+    place_id : int
+
+        The place ID.
+    first : date
+
+        The first day, given as `from`.
+    last : date
+
+        The last day, inclusive, given as `to`.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    PlaceOccupancy
+
+        The slot length and the slots of each day.
+    """
+    days = (last - first).days + 1
+    if not 0 < days <= config.api.occupancy.max_days:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                "'to' must be on or after 'from', covering at most "
+                f"{config.api.occupancy.max_days} days"
+            ),
+        )
+    logger.info("Fetching occupancy for place with ID: {}", place_id)
+    occupancy = await read_occupancy_controller(place_id, first, last, session)
+    if occupancy is None:
+        raise _place_not_found(place_id)
+    logger.info("Fetched occupancy for place with ID: {}.", place_id)
+    return occupancy
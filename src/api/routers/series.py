@@ -0,0 +1,201 @@
+"""Booking series API routes."""
+
+from datetime import datetime
+from typing import Annotated
+
+from controllers.series_controller import (
+    cancel_series_controller,
+    create_series_controller,
+    read_occurrences_controller,
+    read_series_controller,
+)
+from database import SessionDep
+from database.cache.availability import SeriesConflictError
+from fastapi import APIRouter, HTTPException, Query, status
+from schemas.bookings import BookingSeriesCreate, BookingSeriesRead, Occurrence
+from utils.logging import logger
+
+router = APIRouter(
+    prefix="/bookings/series",
+    tags=["bookings"],
+)
+
+
+def _series_not_found(series_id: int) -> HTTPException:
+    """
+    Build the error for a missing series.
+
+    Parameters
+    ----------
+    series_id : int
+        The series ID.
+
+    Returns
+    -------
+    HTTPException
+        The not found error.
+    """
+    logger.warning("Series with ID {} not found.", series_id)
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Series with series id {series_id} not found",
+    )
+
+
+@router.post(
+    "", response_model=BookingSeriesRead, status_code=status.HTTP_201_CREATED
+)
+async def create_series(
+    series: BookingSeriesCreate, session: SessionDep
+) -> BookingSeriesRead:
+    """
+    Create a recurring booking.
+
+    All upcoming occurrences are checked at once. If any of them does not
+    fit, nothing is created and the clashing days are listed under
+    `clashes`, so they can be added to `exceptions`.
+
+    Parameters
+    ----------
+    series : BookingSeriesCreate
+
+        The series to create.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    BookingSeriesRead
+
+        The created series.
+    """
+    logger.info("Creating series for place with ID: {}", series.place_id)
+    try:
+        created_series = await create_series_controller(series, session)
+    except SeriesConflictError as err:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "The place is already booked on some days",
+                "clashes": [day.isoformat() for day in err.clashes],
+            },
+        ) from err
+    except ValueError as err:
+        raise HTTPException(status_code=422, detail=str(err)) from err
+    if created_series is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Place with place id {series.place_id} not found",
+        )
+    logger.info("Series created successfully: {}", created_series.id)
+    return created_series
+
+
+@router.get(
+    "/{series_id}",
+    response_model=BookingSeriesRead,
+    status_code=status.HTTP_200_OK,
+)
+async def read_series(
+    series_id: int, session: SessionDep
+) -> BookingSeriesRead:
+    """
+    Read a booking series.
+
+    Parameters
+    ----------
+    series_id : int
+
+        The series ID.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    BookingSeriesRead
+
+        The series.
+    """
+    logger.info("Fetching series with ID: {}", series_id)
+    db_series = await read_series_controller(series_id, session)
+    if db_series is None:
+        raise _series_not_found(series_id)
+    return db_series
+
+
+@router.get(
+    "/{series_id}/occurrences",
+    response_model=list[Occurrence],
+    status_code=status.HTTP_200_OK,
+)
+async def read_occurrences(
+    series_id: int,
+    start: Annotated[datetime, Query(alias="from")],
+    end: Annotated[datetime, Query(alias="to")],
+    session: SessionDep,
+) -> list[Occurrence]:
+    """
+    Read the occurrences of a booking series between two points in time.
+
+    Parameters
+    ----------
+    series_id : int
+
+        The series ID.
+    start : datetime
+
+        The start of the window, given as `from`.
+    end : datetime
+
+        The end of the window, given as `to`.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    list[Occurrence]
+
+        The occurrences overlapping the window, without the exceptions.
+    """
+    logger.info("Fetching occurrences of series with ID: {}", series_id)
+    found = await read_occurrences_controller(series_id, start, end, session)
+    if found is None:
+        raise _series_not_found(series_id)
+    return found
+
+
+@router.delete(
+    "/{series_id}",
+    response_model=BookingSeriesRead,
+    status_code=status.HTTP_200_OK,
+)
+async def cancel_series(
+    series_id: int, session: SessionDep
+) -> BookingSeriesRead:
+    """
+    Cancel a booking series.
+
+    Parameters
+    ----------
+    series_id : int
+
+        The series ID.
+    session : SessionDep
+
+        The database session.
+
+    Returns
+    -------
+    BookingSeriesRead
+
+        The cancelled series.
+    """
+    logger.info("Cancelling series with ID: {}", series_id)
+    db_series = await cancel_series_controller(series_id, session)
+    if db_series is None:
+        raise _series_not_found(series_id)
+    logger.info("Cancelled series with ID: {} successfully.", series_id)
+    return db_series
@@ -1,16 +1,29 @@
 """User API routes."""
 
+from typing import Annotated
+
 from controllers.users_controller import (
+    USER_FIELDS,
     create_user_controller,
+    create_users_controller,
     read_user_controller,
+    read_user_rows_controller,
     read_users_controller,
+    search_users_controller,
+    stream_users_controller,
+    sync_user_caches,
     update_user_controller,
 )
-from database import SessionDep
-from fastapi import APIRouter, HTTPException, status
-from schemas.users import UserCreate, UserRead, UserUpdate
+from database import ReadSessionDep, SessionDep
+from database.cache.versions import user_versions
+from database.models.user import UserRole
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from properties import config
+from schemas.users import UserBulkResult, UserCreate, UserRead, UserUpdate
 from sqlalchemy.exc import IntegrityError
 from utils.logging import logger
+from utils.responses import FastJSONResponse
 
 router = APIRouter(
     prefix="/users",
@@ -18,6 +31,101 @@ router = APIRouter(
 )
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check if the request's If-None-Match header matches an ETag.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request.
+    etag : str
+        The current ETag of the resource.
+
+    Returns
+    -------
+    bool
+        True if the client already has the current representation.
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...] | None:
+    """
+    Parse a comma-separated list of user fields.
+
+    Parameters
+    ----------
+    fields : str | None
+        The `fields` query parameter.
+
+    Returns
+    -------
+    tuple[str, ...] | None
+        The fields in the order of ``UserRead``, or None if not given.
+
+    Raises
+    ------
+    HTTPException
+        If a field is unknown or none is given.
+    """
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(",")} - {""}
+    unknown = names - USER_FIELDS.keys()
+    if unknown or not names:
+        problem = (
+            f"Unknown fields: {', '.join(sorted(unknown))}"
+            if unknown
+            else "No fields given"
+        )
+        raise HTTPException(
+            status_code=422,
+            detail=f"{problem}, choose from {', '.join(USER_FIELDS)}",
+        )
+    return tuple(name for name in USER_FIELDS if name in names)
+
+
+def _not_modified(etag: str) -> Response:
+    """
+    Build a 304 response.
+
+    Parameters
+    ----------
+    etag : str
+        The current ETag of the resource.
+
+    Returns
+    -------
+    Response
+        An empty response telling the client to use its cached copy.
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+    )
+
+
+def _username_taken(err: IntegrityError) -> bool:
+    """
+    Check if an integrity error is a username already in use.
+
+    Parameters
+    ----------
+    err : IntegrityError
+        The error raised by the write.
+
+    Returns
+    -------
+    bool
+        True if the unique constraint on the username failed.
+    """
+    return "UNIQUE constraint failed: user.username" in str(err.orig)
+
+
 @router.post("", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def create_user(user: UserCreate, session: SessionDep) -> UserRead:
     """
@@ -39,56 +147,216 @@ async def create_user(user: UserCreate, session: SessionDep) -> UserRead:
 
         The created user.
     """
-    logger.info(f"Creating user with username: {user.username}")
+    logger.info("Creating user with username: {}", user.username)
     try:
         created_user = await create_user_controller(user, session)
-        logger.info(f"User created successfully: {created_user.username}")
+        logger.info("User created successfully: {}", created_user.username)
         return created_user
     except IntegrityError as err:
-        logger.error(f"Failed to create user: {err}")
+        if not _username_taken(err):
+            raise
+        logger.error("Failed to create user: {}", err)
         raise HTTPException(
             status_code=400, detail="Username already exists"
         ) from err
 
 
-@router.get("", response_model=list[UserRead], status_code=status.HTTP_200_OK)
-async def read_users(session: SessionDep) -> list[UserRead]:
+@router.post(
+    "/bulk", response_model=UserBulkResult, status_code=status.HTTP_200_OK
+)
+async def create_users(
+    users: list[UserCreate], session: SessionDep
+) -> UserBulkResult:
     """
-    Read all users.
+    Create many users at once.
+
+    Users whose username is already taken are listed under `conflicts`
+    with their position in the request, the rest are created.
 
     Parameters
     ----------
+    users : list[UserCreate]
+
+        The users to create.
+
     session : SessionDep
 
         The database session.
 
+    Returns
+    -------
+    UserBulkResult
+
+        The created users and the conflicting rows.
+    """
+    logger.info("Creating {} users in bulk.", len(users))
+    result = await create_users_controller(users, session)
+    logger.info(
+        "Created {} users in bulk, {} conflicts.",
+        len(result.created),
+        len(result.conflicts),
+    )
+    return result
+
+
+@router.get("", response_model=list[UserRead], status_code=status.HTTP_200_OK)
+async def read_users(
+    request: Request,
+    response: Response,
+    session: ReadSessionDep,
+    after: Annotated[int | None, Query(ge=0)] = None,
+    limit: Annotated[
+        int | None, Query(ge=1, le=config.api.pagination.max_limit)
+    ] = None,
+    stream: bool = False,
+    fields: str | None = None,
+    role: UserRole | None = None,
+    q: Annotated[str | None, Query(min_length=1, max_length=50)] = None,
+) -> list[UserRead]:
+    """
+    Read users, one page at a time.
+
+    Users are ordered by ID. When a page is full, a `Link` header with
+    `rel="next"` points to the next page. With `stream=true` every user
+    after `after` is sent as newline-delimited JSON instead, and `limit`
+    is ignored.
+
+    With `fields`, e.g. `fields=id,username`, only those fields are read
+    and returned. The page is then built from plain column tuples and
+    encoded directly, skipping the response model, as it also is with
+    `api.json.fast` enabled.
+
+    With `role`, only users with that role are returned. With `q`, only
+    users whose username starts with `q`, in any case, are returned,
+    ordered by username instead of ID. They are looked up in an
+    in-memory index without querying the database, and only the first
+    `limit` are returned, so `q` can not be combined with `after` or
+    `stream`.
+
+    The `ETag` changes whenever a user is created or updated, so a
+    matching `If-None-Match` gets a 304 after only reading the highest
+    user ID, which is how users imported from the command line are
+    noticed.
+
+    Parameters
+    ----------
+    request : Request
+
+        The incoming request.
+    response : Response
+
+        The outgoing response.
+    session : ReadSessionDep
+
+        The read-only database session.
+    after : int | None
+
+        Only read users with an ID above this one.
+    limit : int | None
+
+        The maximum number of users in the page.
+    stream : bool
+
+        Stream all users as newline-delimited JSON.
+    fields : str | None
+
+        The comma-separated fields to return, by default all.
+    role : UserRole | None
+
+        Only return users with this role.
+    q : str | None
+
+        Only return users whose username starts with this.
+
     Returns
     -------
     list[UserRead]
 
         The users.
     """
-    logger.info("Fetching all users.")
-    users = await read_users_controller(session)
-    logger.info("Fetched all users successfully.")
-    return users
+    selected = _parse_fields(fields)
+    if q is not None and (after is not None or stream):
+        raise HTTPException(
+            status_code=422,
+            detail="q can not be combined with after or stream",
+        )
+    await sync_user_caches(session)
+    etag = user_versions.collection_tag()
+    if _etag_matches(request, etag):
+        logger.info("Users not modified.")
+        return _not_modified(etag)
+    if stream:
+        logger.info("Streaming users after ID: {}", after)
+        return StreamingResponse(
+            stream_users_controller(
+                after, selected or tuple(USER_FIELDS), role
+            ),
+            media_type="application/x-ndjson",
+            headers={"ETag": etag},
+        )
+    limit = limit or config.api.pagination.default_limit
+    plain = selected is not None or config.api.json.fast
+    if q is not None:
+        logger.info("Searching users starting with: {}", q)
+        users = await search_users_controller(
+            session, q, limit, role, selected or tuple(USER_FIELDS)
+        )
+        # The best matches only, there is no next page
+        last_id = None
+    elif plain:
+        logger.info("Fetching users after ID: {}", after)
+        users, last_id = await read_user_rows_controller(
+            session, after, limit, selected or tuple(USER_FIELDS), role
+        )
+    else:
+        logger.info("Fetching users after ID: {}", after)
+        users = await read_users_controller(session, after, limit, role)
+        last_id = users[-1].id if users else None
+    if plain:
+        response = FastJSONResponse(users)
+    if last_id is not None and len(users) == limit:
+        next_url = request.url.include_query_params(after=last_id, limit=limit)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    response.headers["ETag"] = etag
+    logger.info("Fetched {} users successfully.", len(users))
+    return response if plain else users
 
 
 @router.get(
     "/{user_id}", response_model=UserRead, status_code=status.HTTP_200_OK
 )
-async def read_user(user_id: int, session: SessionDep) -> UserRead:
+async def read_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    session: ReadSessionDep,
+    fields: str | None = None,
+) -> UserRead:
     """
     Read a user.
 
+    The `ETag` is derived from the user's version. When `If-None-Match`
+    matches a version already known to this process, a 304 is returned
+    without reading the database. With `fields`, e.g. `fields=username`,
+    only those fields are read and returned.
+
     Parameters
     ----------
     user_id : int
 
         The user ID.
-    session : SessionDep
+    request : Request
 
-        The database session.
+        The incoming request.
+    response : Response
+
+        The outgoing response.
+    session : ReadSessionDep
+
+        The read-only database session.
+    fields : str | None
+
+        The comma-separated fields to return, by default all.
 
     Returns
     -------
@@ -96,23 +364,40 @@ async def read_user(user_id: int, session: SessionDep) -> UserRead:
 
         The user.
     """
-    logger.info(f"Fetching user with ID: {user_id}")
-    db_user = await read_user_controller(user_id, session)
-    if db_user is None:
-        logger.warning(f"User with ID {user_id} not found.")
+    logger.info("Fetching user with ID: {}", user_id)
+    selected = _parse_fields(fields)
+    version = user_versions.get(user_id)
+    if version is not None:
+        etag = user_versions.row_tag(user_id, version)
+        if _etag_matches(request, etag):
+            logger.info("User with ID {} not modified.", user_id)
+            return _not_modified(etag)
+    found = await read_user_controller(
+        user_id, session, selected or tuple(USER_FIELDS)
+    )
+    if found is None:
+        logger.warning("User with ID {} not found.", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with user id {user_id} not found",
         )
-    logger.info(f"Fetched user with ID: {user_id} successfully.")
-    return db_user
+    user, version = found
+    etag = user_versions.row_tag(user_id, version)
+    if _etag_matches(request, etag):
+        logger.info("User with ID {} not modified.", user_id)
+        return _not_modified(etag)
+    logger.info("Fetched user with ID: {} successfully.", user_id)
+    if selected is not None:
+        return FastJSONResponse(user, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return user
 
 
 @router.put(
     "/{user_id}", response_model=UserRead, status_code=status.HTTP_200_OK
 )
 async def update_user(
-    user_id: int, user: UserUpdate, session: SessionDep
+    user_id: int, user: UserUpdate, response: Response, session: SessionDep
 ) -> UserRead:
     """
     Update a user.
@@ -125,6 +410,9 @@ async def update_user(
     user : UserUpdate
 
         The user to update.
+    response : Response
+
+        The outgoing response.
     session : SessionDep
 
         The database session
@@ -135,13 +423,24 @@ async def update_user(
 
         The updated user.
     """
-    logger.info(f"Updating user with ID: {user_id}")
-    db_user = await update_user_controller(user_id, user, session)
+    logger.info("Updating user with ID: {}", user_id)
+    try:
+        db_user = await update_user_controller(user_id, user, session)
+    except IntegrityError as err:
+        if not _username_taken(err):
+            raise
+        logger.error("Failed to update user: {}", err)
+        raise HTTPException(
+            status_code=400, detail="Username already exists"
+        ) from err
     if db_user is None:
-        logger.warning(f"User with ID {user_id} not found.")
+        logger.warning("User with ID {} not found.", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with user id {user_id} not found",
         )
-    logger.info(f"Updated user with ID: {user_id} successfully.")
+    response.headers["ETag"] = user_versions.row_tag(
+        db_user.id, db_user.version
+    )
+    logger.info("Updated user with ID: {} successfully.", user_id)
     return db_user
@@ -0,0 +1,210 @@
+"""Booking schemas."""
+
+from datetime import UTC, date, datetime, timedelta
+from typing import Self
+
+from database.models.booking import BookedArea, Status
+from database.models.booking_series import Frequency
+from pydantic import BaseModel, field_validator, model_validator
+
+
+def to_naive_utc(value: datetime | None) -> datetime | None:
+    """
+    Convert a datetime to naive UTC, the way bookings are stored.
+
+    Parameters
+    ----------
+    value : datetime | None
+        The datetime to convert. Naive values are assumed to be UTC.
+
+    Returns
+    -------
+    datetime | None
+        The naive UTC datetime.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+def not_null(value: object) -> object:
+    """
+    Reject an explicit null for a field that can only be left out.
+
+    Parameters
+    ----------
+    value : object
+        The value sent for the field.
+
+    Returns
+    -------
+    object
+        The value, if not None.
+
+    Raises
+    ------
+    ValueError
+        If the value is None.
+    """
+    if value is None:
+        raise ValueError("may be left out, but not null")
+    return value
+
+
+class BookingBase(BaseModel):
+    """
+    Base model for booking.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    user_id: int
+    place_id: int
+    start_time: datetime
+    end_time: datetime
+    booked_area: BookedArea
+
+
+class BookingCreate(BookingBase):
+    """
+    Model for creating booking.
+
+    Parameters
+    ----------
+    BookingBase : BookingBase
+        Base model for booking.
+    """
+
+    naive_utc = field_validator("start_time", "end_time")(to_naive_utc)
+
+    @model_validator(mode="after")
+    def check_period(self) -> Self:
+        """
+        Check that the booking ends after it starts.
+
+        Returns
+        -------
+        Self
+            The validated booking.
+        """
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        return self
+
+
+class BookingUpdate(BaseModel):
+    """
+    Model for updating booking.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    start_time: datetime | None = None
+    end_time: datetime | None = None
+    booked_area: BookedArea | None = None
+    status: Status | None = None
+
+    # Left out keeps the stored value, null would clear a required column
+    present = field_validator(
+        "start_time", "end_time", "booked_area", "status", mode="before"
+    )(not_null)
+    naive_utc = field_validator("start_time", "end_time")(to_naive_utc)
+
+
+class BookingRead(BookingBase):
+    """
+    Model for reading booking.
+
+    Parameters
+    ----------
+    BookingBase : BookingBase
+        Base model for booking.
+    """
+
+    id: int
+    status: Status
+
+    class Config:
+        """Pydantic configuration."""
+
+        from_attributes = True
+
+
+class BookingSeriesCreate(BookingBase):
+    """
+    Model for creating a booking series.
+
+    ``start_time`` and ``end_time`` are those of the first occurrence.
+
+    Parameters
+    ----------
+    BookingBase : BookingBase
+        Base model for booking.
+    """
+
+    frequency: Frequency
+    until: date
+    exceptions: list[date] = []
+
+    naive_utc = field_validator("start_time", "end_time")(to_naive_utc)
+
+    @model_validator(mode="after")
+    def check_period(self) -> Self:
+        """
+        Check that occurrences end after they start and do not overlap.
+
+        Returns
+        -------
+        Self
+            The validated series.
+        """
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        if self.end_time - self.start_time > timedelta(days=1):
+            raise ValueError("an occurrence can last at most one day")
+        if self.until < self.start_time.date():
+            raise ValueError("until must not be before start_time")
+        return self
+
+
+class BookingSeriesRead(BookingBase):
+    """
+    Model for reading a booking series.
+
+    Parameters
+    ----------
+    BookingBase : BookingBase
+        Base model for booking.
+    """
+
+    id: int
+    frequency: Frequency
+    until: date
+    exceptions: list[date]
+    status: Status
+
+    class Config:
+        """Pydantic configuration."""
+
+        from_attributes = True
+
+
+class Occurrence(BaseModel):
+    """
+    Model for one occurrence of a booking series.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    number: int
+    start_time: datetime
+    end_time: datetime
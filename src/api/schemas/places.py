@@ -0,0 +1,124 @@
+"""Place schemas."""
+
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+
+class PlaceBase(BaseModel):
+    """
+    Base model for place.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    name: str
+    allow_partial_booking: bool
+
+
+class PlaceCreate(PlaceBase):
+    """
+    Model for creating place.
+
+    Parameters
+    ----------
+    PlaceBase : PlaceBase
+        Base model for place.
+    """
+
+    pass
+
+
+class PlaceRead(PlaceBase):
+    """
+    Model for reading place.
+
+    Parameters
+    ----------
+    PlaceBase : PlaceBase
+        Base model for place.
+    """
+
+    id: int
+
+    class Config:
+        """Pydantic configuration."""
+
+        from_attributes = True
+
+
+class FreeCapacity(BaseModel):
+    """
+    Model for the free capacity of a place during a period.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    start_time: datetime
+    end_time: datetime
+    free_units: int
+
+
+class BookingFit(BaseModel):
+    """
+    Model for whether a booking fits at a place.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    fits: bool
+
+
+class DayOccupancy(BaseModel):
+    """
+    Model for the occupancy of a place during one day.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    day: date
+    slots: str
+
+
+class PlaceOccupancy(BaseModel):
+    """
+    Model for the occupancy of a place over a range of days.
+
+    Each day's ``slots`` holds one digit per slot, from midnight UTC, with
+    the peak number of quarter units in use during that slot.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    slot_minutes: int
+    days: list[DayOccupancy]
+
+
+class SlotCandidate(BaseModel):
+    """
+    Model for a place and time where a booking would fit.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    place_id: int
+    start_time: datetime
+    end_time: datetime
@@ -1,7 +1,9 @@
 """User schemas."""
 
 from database.models.user import UserRole
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+
+from schemas.bookings import not_null
 
 
 class UserBase(BaseModel):
@@ -15,7 +17,6 @@ class UserBase(BaseModel):
     """
 
     username: str
-    password_hash: str
     role: UserRole
 
 
@@ -23,13 +24,15 @@ class UserCreate(UserBase):
     """
     Model for creating user.
 
+    The password is hashed by the server, it is never stored.
+
     Parameters
     ----------
     UserBase : UserBase
         Base model for user.
     """
 
-    pass
+    password: str
 
 
 class UserUpdate(BaseModel):
@@ -43,9 +46,14 @@ class UserUpdate(BaseModel):
     """
 
     username: str | None = None
-    password_hash: str | None = None
+    password: str | None = None
     role: UserRole | None = None
 
+    # Left out keeps the stored value, null would clear a required column
+    present = field_validator("username", "password", "role", mode="before")(
+        not_null
+    )
+
 
 class UserRead(BaseModel):
     """
@@ -67,6 +75,35 @@ class UserRead(BaseModel):
         from_attributes = True
 
 
+class UserBulkConflict(BaseModel):
+    """
+    Model for a user that could not be created in a bulk import.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    index: int
+    username: str
+    detail: str
+
+
+class UserBulkResult(BaseModel):
+    """
+    Model for the result of a bulk import.
+
+    Parameters
+    ----------
+    BaseModel : pydantic.BaseModel
+        Base model for Pydantic.
+    """
+
+    created: list[UserRead]
+    conflicts: list[UserBulkConflict]
+
+
 class UserDelete(UserBase):
     """
     Model for deleting user.
@@ -1,7 +1,8 @@
 """Logging configuration."""
 
+import copy
 import logging
-import os
+import shutil
 import uuid
 from sys import stderr
 from typing import TYPE_CHECKING, Self
@@ -10,6 +11,9 @@ from colorama import Fore, Style
 from loguru import logger
 from properties import config
 
+from utils.logging.sampling import RequestSampler
+from utils.logging.sinks import BackgroundFileSink
+
 if TYPE_CHECKING:
     from loguru import Logger
 else:
@@ -92,34 +96,120 @@ class LoggerConstructor:
         # Set logger instance to use and remove default handler
         self._logger = logger
         self._logger.remove(0)
+        # Sample the low-level records of requests if enabled
+        self.sampler = (
+            RequestSampler(
+                config.logging.sampling.rate,
+                self._logger.level(config.logging.sampling.level).no,
+            )
+            if config.logging.sampling.enabled
+            else None
+        )
+        sink_filter = RequestSampler.filter if self.sampler else None
+        # Keep a copy without handlers for the background file writers,
+        # taken before the patcher is set, so records are only patched once
+        file_writer = copy.deepcopy(self._logger)
+        self._logger.configure(patcher=self._patch_record)
         # Set log ID
         self._log_id = str(uuid.uuid4())[:8]
+        # Build the fixed part of the formats once instead of per record
+        self._console_base_format = (
+            f"<green>{{time:{config.logging.time_fmt}}}</green> "
+            f"│ <magenta>{self._log_id: <{config.logging.log_id_len}}</magenta> "  # noqa: E501
+            f"│ <level>{{level: <{config.logging.level_len}}}</level> "
+            f"│ <level>{{line: <{config.logging.line_len}}}</level> "
+            f"│ <level>{{name: <{config.logging.name_len}}}</level> "
+            f"│ <level>{{function: <{config.logging.function_len}}}</level> "
+            f"│ <level>{{message: <{config.logging.message_len}}}</level>"
+        )
+        self._file_base_format = (
+            f"{{time:{config.logging.time_fmt}}} "
+            f"│ {self._log_id: <{config.logging.log_id_len}} "
+            f"│ {{level: <{config.logging.level_len}}} "
+            f"│ {{line: <{config.logging.line_len}}} "
+            f"│ {{name: <{config.logging.name_len}}} "
+            f"│ {{function: <{config.logging.function_len}}} "
+            f"│ {{message: <{config.logging.message_len}}}"
+        )
 
         # Add console handler
         self._logger.add(
             sink=stderr,
             level=level,
             format=self._console_format,
+            filter=sink_filter,
         )
         # Set console format category
         self.__set_console_format_category()
 
         # Add trace.log file handler
         log_file_type = "json" if config.logging.file.serialize else "log"
+        file_options = {
+            "rotation": config.logging.file.rotation,
+            "retention": config.logging.file.retention,
+            "compression": config.logging.file.compression,
+        }
+        self._background_sinks: list[BackgroundFileSink] = []
         for level in config.logging.file.levels:
-            self._logger.add(
-                sink=(
-                    f"{config.logging.path + '/' + str(level).lower()}.{
-                        log_file_type
-                    }"
-                ),
-                level=level,
-                format=self._file_format,
-                serialize=config.logging.file.serialize,
-                rotation=config.logging.file.rotation,
-                retention=config.logging.file.retention,
-                compression=config.logging.file.compression,
+            path = (
+                f"{config.logging.path}/{str(level).lower()}.{log_file_type}"
+            )
+            if config.logging.file.multiprocess:
+                # Forked workers queue the records for the launcher's
+                # writer thread, as background sinks do not survive a fork
+                self._logger.add(
+                    sink=path,
+                    level=level,
+                    format=self._file_format,
+                    filter=sink_filter,
+                    serialize=config.logging.file.serialize,
+                    enqueue=True,
+                    **file_options,
+                )
+            elif config.logging.file.background:
+                # Write from a thread with its own handler-less logger
+                sink = BackgroundFileSink(
+                    copy.deepcopy(file_writer),
+                    path,
+                    queue_size=config.logging.file.queue_size,
+                    overflow=config.logging.file.overflow,
+                    batch_size=config.logging.file.batch_size,
+                    flush_interval=config.logging.file.flush_interval,
+                    **file_options,
+                )
+                self._background_sinks.append(sink)
+                self._logger.add(
+                    sink=sink,
+                    level=level,
+                    format=self._file_format,
+                    filter=sink_filter,
+                    serialize=config.logging.file.serialize,
+                )
+            else:
+                self._logger.add(
+                    sink=path,
+                    level=level,
+                    format=self._file_format,
+                    filter=sink_filter,
+                    serialize=config.logging.file.serialize,
+                    **file_options,
+                )
+
+    def flush(self) -> None:
+        """Write out the records still queued for background file sinks."""
+        if self.sampler is not None and self.sampler.suppressed:
+            self._logger.info(
+                "Suppressed {} sampled log records: {}",
+                self.sampler.suppressed.total(),
+                dict(self.sampler.suppressed),
+            )
+        dropped = sum(sink.dropped for sink in self._background_sinks)
+        if dropped:
+            self._logger.warning(
+                "Dropped {} log records, the log queue was full.", dropped
             )
+        for sink in self._background_sinks:
+            sink.drain()
 
     def _console_format(self, record: dict) -> str:
         """
@@ -135,18 +225,7 @@ class LoggerConstructor:
         str
             The formatted log record
         """
-        if config.logging.temp_filter in record["message"]:
-            self.__process_temp_filter(record)
-
-        _format = (
-            f"<green>{{time:{config.logging.time_fmt}}}</green> "
-            f"│ <magenta>{self._log_id: <{config.logging.log_id_len}}</magenta> "  # noqa: E501
-            f"│ <level>{{level: <{config.logging.level_len}}}</level> "
-            f"│ <level>{{line: <{config.logging.line_len}}}</level> "
-            f"│ <level>{{name: <{config.logging.name_len}}}</level> "
-            f"│ <level>{{function: <{config.logging.function_len}}}</level> "
-            f"│ <level>{{message: <{config.logging.message_len}}}</level>"
-        )
+        _format = self._console_base_format
 
         if record["extra"]:
             _format += " │ <cyan>{extra}</cyan>"
@@ -172,15 +251,7 @@ class LoggerConstructor:
         str
             The formatted log record
         """
-        _format = (
-            f"{{time:{config.logging.time_fmt}}} "
-            f"│ {self._log_id: <{config.logging.log_id_len}} "
-            f"│ {{level: <{config.logging.level_len}}} "
-            f"│ {{line: <{config.logging.line_len}}} "
-            f"│ {{name: <{config.logging.name_len}}} "
-            f"│ {{function: <{config.logging.function_len}}} "
-            f"│ {{message: <{config.logging.message_len}}}"
-        )
+        _format = self._file_base_format
 
         if record["extra"]:
             _format += " │ {extra}"
@@ -192,43 +263,36 @@ class LoggerConstructor:
 
         return _format
 
-    def __process_temp_filter(self, record):
+    def _patch_record(self, record: dict) -> None:
         """
-        Process the temp filter in the log record.
+        Patch every log record once, before it reaches the sinks.
 
         Parameters
         ----------
         record : dict
-            The log record to process
+            The log record to patch
         """
-        # split message into 2 parts, temp and message
-        temp, message = record["message"].split(config.logging.temp_filter)[
-            1:3
-        ]
-        record["message"] = message
-
-        # clean and convert temp to a dictionary
-        temp = dict(
-            item.split(":")
-            for item in temp.replace(" ", "")
-            .replace("{", "")
-            .replace("}", "")
-            .replace("'", "")
-            .split(",")
-        )
+        self._patch_intercepted(record)
+        if self.sampler is not None:
+            self.sampler.patch(record)
 
-        # update record with temp values
-        record.update(
-            {
-                key: value.replace('"', "")
-                for key, value in temp.items()
-                if key in ["function", "name", "line"]
-            }
-        )
+    @staticmethod
+    def _patch_intercepted(record: dict) -> None:
+        """
+        Move the origin of an intercepted record into the record itself.
+
+        Parameters
+        ----------
+        record : dict
+            The log record to patch
+        """
+        intercepted = record["extra"].pop("intercepted", None)
+        if intercepted is not None:
+            record["name"], record["function"], record["line"] = intercepted
 
     def __set_console_format_category(self):
         """Set the console format category."""
-        console_remaining_space = os.get_terminal_size().columns - (
+        console_remaining_space = shutil.get_terminal_size().columns - (
             len(config.logging.time_fmt)
             + config.logging.log_id_len
             + config.logging.level_len
@@ -284,26 +348,8 @@ class LoggerConstructor:
             except ValueError:
                 level = record.levelno
 
-            # Find caller to get correct stack depth
-            frame, depth = logging.currentframe(), 2
-            while (
-                frame.f_back and frame.f_code.co_filename == logging.__file__
-            ):
-                frame = frame.f_back
-                depth += 1
-
-            # Make a dictionary with the items we want to pass to the console
-            temp = {
-                "function": record.funcName,
-                "name": record.name,
-                "line": record.lineno,
-            }
-
-            # Add the temp dictionary to the message
-            logger_message = f"{config.logging.temp_filter}{temp}{config.logging.temp_filter}{record.getMessage()}"
-
-            # Prepend log message with the values from the temp dictionary
-            logger.opt(depth=depth, exception=record.exc_info).log(
-                level,
-                logger_message,
-            )
+            # Pass the origin of the record as structured extra, which
+            # _patch_intercepted moves into the record before it is formatted
+            logger.bind(
+                intercepted=(record.name, record.funcName, record.lineno)
+            ).opt(exception=record.exc_info).log(level, record.getMessage())
@@ -0,0 +1,129 @@
+"""Sampling of per-request log records."""
+
+import itertools
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Any
+
+# Whether the records of the current request are kept
+_sampled: ContextVar[bool] = ContextVar("log_sampled", default=True)
+
+
+class RequestSampler:
+    """
+    Keep the low-level log records of only 1 in N requests.
+
+    Every request is counted, and only each ``rate``-th one keeps its
+    records below ``level``. Records at or above ``level``, e.g. warnings
+    and errors, are always kept, as are records logged outside a request.
+    Suppressed records are counted per level in ``suppressed``.
+    """
+
+    def __init__(self, rate: int, level_no: int) -> None:
+        """
+        Create a sampler.
+
+        Parameters
+        ----------
+        rate : int
+            Keep the records of 1 in ``rate`` requests.
+        level_no : int
+            The severity from which records are always kept.
+        """
+        self.rate = max(rate, 1)
+        self.level_no = level_no
+        self.suppressed: Counter[str] = Counter()
+        self._requests = itertools.count()
+
+    def start_request(self) -> Token[bool]:
+        """
+        Decide if the records of a new request are kept.
+
+        Returns
+        -------
+        Token[bool]
+            The token to pass to ``end_request``.
+        """
+        return _sampled.set(next(self._requests) % self.rate == 0)
+
+    def end_request(self, token: Token[bool]) -> None:
+        """
+        Restore the sampling decision from before the request.
+
+        Parameters
+        ----------
+        token : Token[bool]
+            The token returned by ``start_request``.
+        """
+        _sampled.reset(token)
+
+    def patch(self, record: dict) -> None:
+        """
+        Mark a record as kept or suppressed, once for all sinks.
+
+        Parameters
+        ----------
+        record : dict
+            The log record to mark.
+        """
+        keep = _sampled.get() or record["level"].no >= self.level_no
+        if not keep:
+            self.suppressed[record["level"].name] += 1
+        record["sampled"] = keep
+
+    @staticmethod
+    def filter(record: dict) -> bool:
+        """
+        Filter out the records marked as suppressed.
+
+        Parameters
+        ----------
+        record : dict
+            The log record to filter.
+
+        Returns
+        -------
+        bool
+            True if the record is kept.
+        """
+        return record.get("sampled", True)
+
+
+class LogSamplingMiddleware:
+    """ASGI middleware making the sampling decision for each request."""
+
+    def __init__(self, app: Any, sampler: RequestSampler) -> None:
+        """
+        Wrap an ASGI app.
+
+        Parameters
+        ----------
+        app : Any
+            The ASGI app.
+        sampler : RequestSampler
+            The sampler deciding which requests are logged.
+        """
+        self.app = app
+        self.sampler = sampler
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        """
+        Handle a request with its sampling decision in context.
+
+        Parameters
+        ----------
+        scope : dict
+            The ASGI connection scope.
+        receive : Any
+            The ASGI receive channel.
+        send : Any
+            The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = self.sampler.start_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.sampler.end_request(token)
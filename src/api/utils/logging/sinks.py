@@ -0,0 +1,125 @@
+"""Log sinks that keep file I/O off the logging thread."""
+
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+class BackgroundFileSink:
+    """
+    File sink that writes from a background thread.
+
+    Formatted records are put on a bounded queue and a writer thread appends
+    them to the file in batches, so rotation, retention and compression
+    happen on the writer thread instead of in whichever request logged the
+    record. The file itself is handled by a private loguru logger, so the
+    usual ``rotation``, ``retention`` and ``compression`` options apply.
+
+    When the queue is full, ``overflow="block"`` makes the logging call wait
+    for space and ``overflow="drop"`` discards the record and counts it in
+    ``dropped``.
+    """
+
+    def __init__(
+        self,
+        writer: "Logger",
+        path: str,
+        *,
+        queue_size: int,
+        overflow: str,
+        batch_size: int,
+        flush_interval: float,
+        **file_options: Any,
+    ) -> None:
+        """
+        Create the sink and start its writer thread.
+
+        Parameters
+        ----------
+        writer : Logger
+            A loguru logger without handlers, used only by this sink.
+        path : str
+            The file to write to.
+        queue_size : int
+            The maximum number of records waiting to be written.
+        overflow : str
+            What to do when the queue is full, "block" or "drop".
+        batch_size : int
+            The maximum number of records written at once.
+        flush_interval : float
+            The longest time in seconds a record waits for a batch to fill.
+        **file_options : Any
+            Options for the loguru file handler, e.g. ``rotation``.
+        """
+        if overflow not in {"block", "drop"}:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self._writer = writer
+        self._handler_id = writer.add(
+            path, format="{message}", level=0, **file_options
+        )
+        self._queue: queue.Queue[str | None] = queue.Queue(maxsize=queue_size)
+        self._block = overflow == "block"
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self.dropped = 0
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-{Path(path).stem}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        """
+        Queue a formatted record for writing.
+
+        Parameters
+        ----------
+        message : str
+            The formatted record.
+        """
+        if self._block:
+            self._queue.put(message)
+            return
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def drain(self) -> None:
+        """Wait until every queued record has been written."""
+        self._queue.join()
+
+    def stop(self) -> None:
+        """Write the remaining records and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._writer.remove(self._handler_id)
+
+    def _run(self) -> None:
+        """Write batches of records until the stop marker is queued."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._flush_interval
+            while batch[-1] is not None and len(batch) < self._batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is None
+            if stopping:
+                batch.pop()
+            if batch:
+                self._writer.opt(raw=True).log("TRACE", "".join(batch))
+            for _ in range(len(batch) + stopping):
+                self._queue.task_done()
+            if stopping:
+                return
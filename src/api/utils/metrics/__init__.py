@@ -0,0 +1,5 @@
+"""Initializes the metrics registry for the API."""
+
+from utils.metrics.registry import Registry
+
+registry = Registry()
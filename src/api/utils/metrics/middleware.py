@@ -0,0 +1,80 @@
+"""ASGI middleware recording request metrics."""
+
+import time
+from typing import Any
+
+from utils.metrics.registry import Registry
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing requests and counting them by status.
+
+    Requests are labelled by the path template of the matched route, e.g.
+    ``/users/{user_id}``, so the number of series stays bounded. Requests
+    matching no route share the ``unmatched`` label.
+    """
+
+    def __init__(self, app: Any, registry: Registry) -> None:
+        """
+        Wrap an ASGI app and register the request metrics.
+
+        Parameters
+        ----------
+        app : Any
+            The ASGI app.
+        registry : Registry
+            The registry to add the metrics to.
+        """
+        self.app = app
+        self.requests = registry.counter(
+            "http_requests_total",
+            "HTTP requests by method, route and status code.",
+            ("method", "route", "status"),
+        )
+        self.duration = registry.histogram(
+            "http_request_duration_seconds",
+            "Time to serve an HTTP request, body included.",
+            ("method", "route"),
+        )
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "HTTP requests being served."
+        )
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        """
+        Handle a request and record its metrics.
+
+        Parameters
+        ----------
+        scope : dict
+            The ASGI connection scope.
+        receive : Any
+            The ASGI receive channel.
+        send : Any
+            The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Unless a response is started, the request failed
+        status = 500
+
+        async def send_with_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight.inc(amount=-1)
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            self.requests.inc((method, route, str(status)))
+            self.duration.observe(elapsed, (method, route))
@@ -0,0 +1,439 @@
+"""Counters, gauges and histograms in the Prometheus text format."""
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+
+# Seconds, from a cached read to a slow write
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a label value.
+
+    Parameters
+    ----------
+    value : str
+        The label value.
+
+    Returns
+    -------
+    str
+        The value with backslashes, quotes and newlines escaped.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    """
+    A named value per combination of label values.
+
+    Label values are passed as a tuple in the order of ``labels``, so
+    recording a sample is a single dictionary lookup.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labels: tuple[str, ...] = ()
+    ) -> None:
+        """
+        Create a metric.
+
+        Parameters
+        ----------
+        name : str
+            The metric name.
+        documentation : str
+            The help text.
+        labels : tuple[str, ...], optional
+            The label names, by default none.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def __len__(self) -> int:
+        """
+        Get the number of label combinations recorded.
+
+        Returns
+        -------
+        int
+            The number of series.
+        """
+        return len(self._values)
+
+    def __contains__(self, values: tuple[str, ...]) -> bool:
+        """
+        Check if a label combination has been recorded.
+
+        Parameters
+        ----------
+        values : tuple[str, ...]
+            The label values.
+
+        Returns
+        -------
+        bool
+            True if the series exists.
+        """
+        return values in self._values
+
+    def _selector(self, values: tuple[str, ...], extra: str = "") -> str:
+        """
+        Format the label selector of a series.
+
+        Parameters
+        ----------
+        values : tuple[str, ...]
+            The label values.
+        extra : str, optional
+            An extra formatted label, e.g. ``le="0.1"``, by default none.
+
+        Returns
+        -------
+        str
+            The selector including braces, or an empty string.
+        """
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.labels, values, strict=True)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterator[str]:
+        """
+        Format the samples of every series.
+
+        Yields
+        ------
+        str
+            One sample line.
+        """
+        for values, value in self._values.items():
+            yield f"{self.name}{self._selector(values)} {value}"
+
+    def render(self) -> str:
+        """
+        Format the metric with its help and type.
+
+        Returns
+        -------
+        str
+            The metric in the Prometheus text format.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, values: tuple[str, ...] = (), amount: float = 1) -> None:
+        """
+        Increase the counter.
+
+        Parameters
+        ----------
+        values : tuple[str, ...], optional
+            The label values, by default none.
+        amount : float, optional
+            The increase, by default 1.
+        """
+        self._values[values] = self._values.get(values, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, values: tuple[str, ...] = ()) -> None:
+        """
+        Set the gauge.
+
+        Parameters
+        ----------
+        value : float
+            The new value.
+        values : tuple[str, ...], optional
+            The label values, by default none.
+        """
+        self._values[values] = value
+
+    def inc(self, values: tuple[str, ...] = (), amount: float = 1) -> None:
+        """
+        Increase the gauge, or decrease it with a negative amount.
+
+        Parameters
+        ----------
+        values : tuple[str, ...], optional
+            The label values, by default none.
+        amount : float, optional
+            The change, by default 1.
+        """
+        self._values[values] = self._values.get(values, 0) + amount
+
+
+class Histogram(Metric):
+    """
+    The distribution of observed values over fixed buckets.
+
+    Only the bucket an observation falls into is counted, the buckets are
+    made cumulative when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        """
+        Create a histogram.
+
+        Parameters
+        ----------
+        name : str
+            The metric name.
+        documentation : str
+            The help text.
+        labels : tuple[str, ...], optional
+            The label names, by default none.
+        buckets : tuple[float, ...], optional
+            The upper bounds of the buckets in ascending order, by default
+            ``LATENCY_BUCKETS``.
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        # Per series, the count of each bucket then +Inf, then the sum
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def __len__(self) -> int:
+        """
+        Get the number of label combinations recorded.
+
+        Returns
+        -------
+        int
+            The number of series.
+        """
+        return len(self._series)
+
+    def __contains__(self, values: tuple[str, ...]) -> bool:
+        """
+        Check if a label combination has been recorded.
+
+        Parameters
+        ----------
+        values : tuple[str, ...]
+            The label values.
+
+        Returns
+        -------
+        bool
+            True if the series exists.
+        """
+        return values in self._series
+
+    def observe(self, value: float, values: tuple[str, ...] = ()) -> None:
+        """
+        Record an observation.
+
+        Parameters
+        ----------
+        value : float
+            The observed value.
+        values : tuple[str, ...], optional
+            The label values, by default none.
+        """
+        series = self._series.get(values)
+        if series is None:
+            series = self._series[values] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        """
+        Format the buckets, sum and count of every series.
+
+        Yields
+        ------
+        str
+            One sample line.
+        """
+        for values, series in self._series.items():
+            total = 0
+            for bound, count in zip(
+                (*self.buckets, "+Inf"), series[:-1], strict=True
+            ):
+                total += count
+                selector = self._selector(values, f'le="{bound}"')
+                yield f"{self.name}_bucket{selector} {total}"
+            selector = self._selector(values)
+            yield f"{self.name}_sum{selector} {series[-1]}"
+            yield f"{self.name}_count{selector} {total}"
+
+
+class Registry:
+    """The metrics exposed together, with callbacks run before each scrape."""
+
+    def __init__(self) -> None:
+        """Create an empty registry."""
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric.
+
+        Parameters
+        ----------
+        metric : Metric
+            The metric to add.
+
+        Returns
+        -------
+        Metric
+            The metric.
+
+        Raises
+        ------
+        ValueError
+            If a metric with the same name is already registered.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labels: tuple[str, ...] = ()
+    ) -> Counter:
+        """
+        Create and register a counter.
+
+        Parameters
+        ----------
+        name : str
+            The metric name.
+        documentation : str
+            The help text.
+        labels : tuple[str, ...], optional
+            The label names, by default none.
+
+        Returns
+        -------
+        Counter
+            The counter.
+        """
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(
+        self, name: str, documentation: str, labels: tuple[str, ...] = ()
+    ) -> Gauge:
+        """
+        Create and register a gauge.
+
+        Parameters
+        ----------
+        name : str
+            The metric name.
+        documentation : str
+            The help text.
+        labels : tuple[str, ...], optional
+            The label names, by default none.
+
+        Returns
+        -------
+        Gauge
+            The gauge.
+        """
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """
+        Create and register a histogram.
+
+        Parameters
+        ----------
+        name : str
+            The metric name.
+        documentation : str
+            The help text.
+        labels : tuple[str, ...], optional
+            The label names, by default none.
+        buckets : tuple[float, ...], optional
+            The upper bounds of the buckets, by default ``LATENCY_BUCKETS``.
+
+        Returns
+        -------
+        Histogram
+            The histogram.
+        """
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run a callback before each scrape, e.g. to read a gauge's source.
+
+        Can be used as a decorator.
+
+        Parameters
+        ----------
+        callback : Callable[[], None]
+            The callback.
+
+        Returns
+        -------
+        Callable[[], None]
+            The callback.
+        """
+        self._collectors.append(callback)
+        return callback
+
+    def render(self) -> str:
+        """
+        Format all metrics.
+
+        Returns
+        -------
+        str
+            The metrics in the Prometheus text format.
+        """
+        for callback in self._collectors:
+            callback()
+        return "".join(metric.render() for metric in self._metrics.values())
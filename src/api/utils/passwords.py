@@ -0,0 +1,247 @@
+"""Password hashing and verification off the event loop."""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import partial
+from multiprocessing import get_context
+
+from properties import config
+
+# The first field of an encoded hash
+SCHEME = "scrypt"
+
+
+def _scrypt(
+    password: str, salt: bytes, n: int, r: int, p: int, length: int
+) -> partial:
+    """
+    Prepare an scrypt derivation to run in an executor.
+
+    Only the built-in ``hashlib.scrypt`` is sent to a worker process, so
+    the workers do not import the API.
+
+    Parameters
+    ----------
+    password : str
+        The password.
+    salt : bytes
+        The salt.
+    n : int
+        The CPU and memory cost, a power of 2.
+    r : int
+        The block size.
+    p : int
+        The parallelisation.
+    length : int
+        The length of the key in bytes.
+
+    Returns
+    -------
+    partial
+        The derivation, taking no arguments.
+    """
+    return partial(
+        hashlib.scrypt,
+        password.encode(),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        # The memory OpenSSL needs for these costs
+        maxmem=128 * r * (n + p + 2),
+        dklen=length,
+    )
+
+
+class PasswordHasher:
+    """
+    Hash and verify passwords with scrypt in a bounded pool.
+
+    Deriving a key is deliberately slow, so it runs in a pool of
+    ``workers`` threads or processes instead of the event loop, and at
+    most ``workers`` derivations run at once while the rest wait. As
+    ``hashlib.scrypt`` releases the GIL, threads do not hold up the event
+    loop. The pool is started on first use.
+
+    Hashes are encoded as ``scrypt$n$r$p$salt$key`` with the salt and key
+    in base64, so a hash made with other cost parameters or key length still
+    verifies.
+    """
+
+    def __init__(
+        self, n: int, r: int, p: int, workers: int, executor: str
+    ) -> None:
+        """
+        Create a hasher.
+
+        Parameters
+        ----------
+        n : int
+            The CPU and memory cost of new hashes, a power of 2.
+        r : int
+            The block size of new hashes.
+        p : int
+            The parallelisation of new hashes.
+        workers : int
+            The most derivations running at once.
+        executor : str
+            "thread" or "process".
+
+        Raises
+        ------
+        ValueError
+            If the executor is unknown.
+        """
+        if executor not in {"thread", "process"}:
+            raise ValueError(f"Unknown password executor: {executor}")
+        self.n = n
+        self.r = r
+        self.p = p
+        self.workers = max(workers, 1)
+        self.executor = executor
+        self._pool: Executor | None = None
+
+    def _get_pool(self) -> Executor:
+        """
+        Get the pool, starting it if needed.
+
+        Returns
+        -------
+        Executor
+            The pool.
+        """
+        if self._pool is None:
+            if self.executor == "process":
+                # Spawned, as forking a process running an event loop and
+                # database threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="passwords"
+                )
+        return self._pool
+
+    async def _derive(
+        self, password: str, salt: bytes, n: int, r: int, p: int, length: int
+    ) -> bytes:
+        """
+        Derive a key in the pool.
+
+        Parameters
+        ----------
+        password : str
+            The password.
+        salt : bytes
+            The salt.
+        n : int
+            The CPU and memory cost.
+        r : int
+            The block size.
+        p : int
+            The parallelisation.
+        length : int
+            The length of the key in bytes.
+
+        Returns
+        -------
+        bytes
+            The derived key.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_pool(), _scrypt(password, salt, n, r, p, length)
+        )
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with a new random salt.
+
+        Parameters
+        ----------
+        password : str
+            The password.
+
+        Returns
+        -------
+        str
+            The encoded hash.
+        """
+        salt = os.urandom(config.passwords.salt_bytes)
+        key = await self._derive(
+            password,
+            salt,
+            self.n,
+            self.r,
+            self.p,
+            config.passwords.key_bytes,
+        )
+        return "$".join(
+            (
+                SCHEME,
+                str(self.n),
+                str(self.r),
+                str(self.p),
+                base64.b64encode(salt).decode(),
+                base64.b64encode(key).decode(),
+            )
+        )
+
+    async def verify(self, password: str, encoded: str) -> bool:
+        """
+        Check a password against an encoded hash.
+
+        Parameters
+        ----------
+        password : str
+            The password.
+        encoded : str
+            The encoded hash.
+
+        Returns
+        -------
+        bool
+            True if the password matches, False if it does not or the hash
+            is not a valid scrypt hash.
+        """
+        try:
+            scheme, n, r, p, salt, key = encoded.split("$")
+        except ValueError:
+            return False
+        if scheme != SCHEME:
+            return False
+        try:
+            key = base64.b64decode(key, validate=True)
+            salt = base64.b64decode(salt, validate=True)
+            # Also raises ValueError for costs scrypt does not accept
+            derived = await self._derive(
+                password, salt, int(n), int(r), int(p), len(key)
+            )
+        except (ValueError, binascii.Error):
+            return False
+        return hmac.compare_digest(derived, key)
+
+    def shutdown(self) -> None:
+        """Stop the pool, waiting for running derivations."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+password_hasher = PasswordHasher(
+    config.passwords.scrypt_n,
+    config.passwords.scrypt_r,
+    config.passwords.scrypt_p,
+    config.passwords.workers,
+    config.passwords.executor,
+)
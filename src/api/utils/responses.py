@@ -0,0 +1,13 @@
+"""Response classes for large JSON payloads."""
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson  # noqa: F401
+except ImportError:  # orjson comes with the optional "fast" extra
+    ORJSON_AVAILABLE = False
+else:
+    ORJSON_AVAILABLE = True
+
+# Encodes plain dicts and lists, with orjson when it is installed
+FastJSONResponse = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
@@ -0,0 +1,107 @@
+"""Shared setup for the tests."""
+
+import asyncio
+import sys
+import tempfile
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import pytest
+
+API_PATH = Path(__file__).resolve().parents[1] / "src" / "api"
+if str(API_PATH) not in sys.path:
+    sys.path.insert(0, str(API_PATH))
+
+from properties import config  # noqa: E402
+
+# Set before anything from ``database`` or ``utils`` is imported, as the
+# engine and the log files are created at import time
+_directory = tempfile.mkdtemp(prefix="sjenk-tests-")
+config.database.update_entry(
+    "url", f"sqlite+aiosqlite:///{_directory}/test.db", source="tests"
+)
+config.database.update_entry("echo", False, source="tests")
+config.logging.update_entry("path", f"{_directory}/logs", source="tests")
+# Cheap password hashes, the cost of new hashes is not under test
+config.passwords.update_entry("scrypt_n", 16, source="tests")
+
+from utils.logging import logger  # noqa: E402
+
+logger.remove()
+
+
+@pytest.fixture
+def run_in_session() -> Callable[[Callable[..., Awaitable]], object]:
+    """
+    Get a runner of coroutines against empty tables.
+
+    Returns
+    -------
+    Callable[[Callable[..., Awaitable]], object]
+        Runs a coroutine function with a session on freshly created tables
+        and returns its result. The engines are disposed of afterwards.
+    """
+    from database import dispose, engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    def run(test: Callable[..., Awaitable]) -> object:
+        async def main() -> object:
+            await _create_tables()
+            try:
+                async with AsyncSession(
+                    engine, expire_on_commit=False
+                ) as session:
+                    return await test(session)
+            finally:
+                await dispose()
+
+        return asyncio.run(main())
+
+    return run
+
+
+async def _create_tables() -> None:
+    """Drop and create every table, so a test starts from empty ones."""
+    from database import engine
+    from sqlmodel import SQLModel
+
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.drop_all)
+        await connection.run_sync(SQLModel.metadata.create_all)
+
+
+@pytest.fixture
+def run_with_client() -> Callable[[Callable[..., Awaitable]], object]:
+    """
+    Get a runner of coroutines against the app, on empty tables.
+
+    Returns
+    -------
+    Callable[[Callable[..., Awaitable]], object]
+        Runs a coroutine function with an httpx client bound to the app,
+        inside the app's lifespan, and returns its result.
+    """
+    import httpx
+    from database import dispose
+    from main import app
+    from utils.passwords import password_hasher
+
+    def run(test: Callable[..., Awaitable]) -> object:
+        async def main() -> object:
+            await _create_tables()
+            try:
+                async with app.router.lifespan_context(app):
+                    async with httpx.AsyncClient(
+                        transport=httpx.ASGITransport(app=app),
+                        base_url="http://test",
+                    ) as client:
+                        return await test(client)
+            finally:
+                # The lifespan skips its shutdown if the test fails, and
+                # the engines' threads would keep the tests from exiting
+                await dispose()
+                password_hasher.shutdown()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,230 @@
+"""Tests for the per-place availability index."""
+
+import asyncio
+import random
+from datetime import datetime
+
+from database import engine
+from database.cache.availability import (
+    AvailabilityIndex,
+    PlaceAvailability,
+    peak_units,
+)
+from database.models.booking import BookedArea, Booking, Status
+from database.models.place import Place
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def at(hour: int, day: int = 1) -> datetime:
+    """
+    Get a point in time on a day in January 2030.
+
+    Parameters
+    ----------
+    hour : int
+        The hour.
+    day : int, optional
+        The day of the month, by default 1.
+
+    Returns
+    -------
+    datetime
+        The point in time.
+    """
+    return datetime(2030, 1, day, hour)
+
+
+def test_touching_intervals_do_not_overlap() -> None:
+    """A booking ending when another starts leaves room for both."""
+    place = PlaceAvailability(allow_partial_booking=False, slot_minutes=60)
+    place.add(1, at(8), at(10), BookedArea.full)
+
+    assert place.fits(at(10), at(12), BookedArea.full)
+    assert place.fits(at(6), at(8), BookedArea.full)
+    assert not place.fits(at(9), at(11), BookedArea.full)
+    assert place.max_used(at(10), at(12)) == 0
+
+
+def test_partial_bookings_share_a_place() -> None:
+    """Partial bookings add up until the place is full."""
+    place = PlaceAvailability(allow_partial_booking=True, slot_minutes=60)
+    place.add(1, at(8), at(12), BookedArea.half)
+    place.add(2, at(9), at(11), BookedArea.quarter)
+
+    assert place.max_used(at(8), at(12)) == 3
+    assert place.fits(at(9), at(10), BookedArea.quarter)
+    assert not place.fits(at(9), at(10), BookedArea.half)
+    # Leaving out the booking being moved frees its own units
+    assert place.fits(at(9), at(10), BookedArea.half, exclude=2)
+
+
+def test_partial_bookings_take_a_whole_unshared_place() -> None:
+    """Without partial booking, any area takes the whole place."""
+    place = PlaceAvailability(allow_partial_booking=False, slot_minutes=60)
+    place.add(1, at(8), at(9), BookedArea.quarter)
+
+    assert not place.fits(at(8), at(9), BookedArea.quarter)
+
+
+def test_remove_last_booking_leaves_the_index_empty() -> None:
+    """Removing the only booking drops every breakpoint and day."""
+    place = PlaceAvailability(allow_partial_booking=True, slot_minutes=60)
+    place.add(1, at(22), at(2, day=2), BookedArea.half)
+    place.remove(1)
+
+    assert len(place) == 0
+    assert place._times == []
+    assert place._used == []
+    assert place.occupancy.get(at(0).date()) is None
+    assert place.occupancy.get(at(0, day=2).date()) is None
+    assert place.free(at(0), at(4, day=2)) == [(at(0), at(4, day=2), 4)]
+    # Removing an unknown key is a no-op
+    place.remove(1)
+
+
+def test_remove_compacts_breakpoints() -> None:
+    """Breakpoints that no longer change the usage are dropped."""
+    place = PlaceAvailability(allow_partial_booking=True, slot_minutes=60)
+    place.add(1, at(8), at(12), BookedArea.quarter)
+    place.add(2, at(10), at(14), BookedArea.quarter)
+    assert place._times == [at(8), at(10), at(12), at(14)]
+
+    place.remove(2)
+
+    assert place._times == [at(8), at(12)]
+    assert place._used == [1, 0]
+
+
+def test_add_again_moves_a_booking() -> None:
+    """Adding a known key replaces its interval."""
+    place = PlaceAvailability(allow_partial_booking=False, slot_minutes=60)
+    place.add(1, at(8), at(10), BookedArea.full)
+    place.add(1, at(12), at(14), BookedArea.full)
+
+    assert len(place) == 1
+    assert place.fits(at(8), at(10), BookedArea.full)
+    assert not place.fits(at(12), at(14), BookedArea.full)
+
+
+def test_free_merges_equal_segments() -> None:
+    """The free capacity is reported as maximal segments."""
+    place = PlaceAvailability(allow_partial_booking=True, slot_minutes=60)
+    place.add(1, at(8), at(10), BookedArea.half)
+    place.add(2, at(10), at(12), BookedArea.half)
+
+    assert place.free(at(6), at(14)) == [
+        (at(6), at(8), 4),
+        (at(8), at(12), 2),
+        (at(12), at(14), 4),
+    ]
+
+
+def test_clashes_matches_fits() -> None:
+    """The single pass finds the same clashes as one check per interval."""
+    place = PlaceAvailability(allow_partial_booking=True, slot_minutes=60)
+    place.add(1, at(8), at(10), BookedArea.half)
+    place.add(2, at(9), at(11), BookedArea.quarter)
+    place.add(3, at(13), at(14), BookedArea.full)
+    intervals = [
+        (at(6), at(8)),
+        (at(7), at(9)),
+        (at(9), at(10)),
+        (at(10), at(11)),
+        (at(11), at(13)),
+        (at(12), at(15)),
+    ]
+
+    for area in BookedArea:
+        expected = [
+            (start, end)
+            for start, end in intervals
+            if not place.fits(start, end, area)
+        ]
+        assert place.clashes(intervals, area) == expected
+    assert place.clashes(intervals, BookedArea.half) == [
+        (at(9), at(10)),
+        (at(12), at(15)),
+    ]
+
+
+def test_remove_after_compaction() -> None:
+    """Removing a booking whose breakpoints were compacted away is exact."""
+    place = PlaceAvailability(allow_partial_booking=True, slot_minutes=60)
+    place.add("a", at(8), at(10), BookedArea.half)
+    place.add("b", at(10), at(12), BookedArea.half)
+    place.add("c", at(9), at(11), BookedArea.quarter)
+
+    place.remove("c")
+
+    assert place._times == [at(8), at(12)]
+    assert place._used == [2, 0]
+    assert place.fits(at(10), at(12), BookedArea.full, exclude="b")
+
+    place.remove("b")
+
+    assert place._times == [at(8), at(10)]
+    assert place._used == [2, 0]
+    assert place.max_used(at(10), at(12)) == 0
+    assert place.occupancy.get(at(0).date()) is not None
+
+
+def test_random_changes_match_a_recount() -> None:
+    """After any adds and removes, the peak usage matches a recount."""
+    rng = random.Random(7)
+    place = PlaceAvailability(allow_partial_booking=True, slot_minutes=60)
+    live: dict[int, tuple[datetime, datetime, int]] = {}
+    for key in range(200):
+        if live and rng.random() < 0.4:
+            removed = rng.choice(list(live))
+            del live[removed]
+            place.remove(removed)
+        else:
+            start = rng.randrange(19)
+            live[key] = (at(start), at(start + rng.randint(1, 4)), 1)
+            place.add(key, live[key][0], live[key][1], BookedArea.quarter)
+        exclude = rng.choice([None, *live])
+        for start in range(23):
+            for end in range(start + 1, 24):
+                expected = peak_units(
+                    (
+                        interval
+                        for other, interval in live.items()
+                        if other != exclude
+                    ),
+                    at(start),
+                    at(end),
+                )
+                assert place.max_used(at(start), at(end), exclude) == expected
+
+
+def test_concurrent_syncs_keep_every_place(run_in_session) -> None:
+    """A place stays readable while its stripe is being reloaded."""
+
+    async def test(session: AsyncSession) -> None:
+        session.add(Place(id=1, name="room", allow_partial_booking=True))
+        await session.commit()
+        index = AvailabilityIndex(slot_minutes=60, stripes=4, history_days=7)
+        await index.rebuild(session)
+        # Another process books the place
+        session.add(
+            Booking(
+                user_id=1,
+                place_id=1,
+                start_time=at(8),
+                end_time=at(10),
+                booked_area=BookedArea.half,
+                status=Status.active,
+            )
+        )
+        await session.commit()
+        index.generations.bump(index.generations.stripe(1))
+        async with AsyncSession(engine) as other:
+            syncing = asyncio.create_task(index.sync(other))
+            # Let the sync start reading, then look the place up meanwhile
+            await asyncio.sleep(0)
+            assert not syncing.done()
+            assert index[1].max_used(at(0), at(23)) == 0
+            await syncing
+        assert index[1].max_used(at(0), at(23)) == 2
+
+    run_in_session(test)
@@ -0,0 +1,42 @@
+"""Tests for the bookings endpoints."""
+
+import httpx
+
+
+def test_update_rejects_nulls(run_with_client) -> None:
+    """A null for a required field is invalid, not a server error."""
+
+    async def test(client: httpx.AsyncClient) -> None:
+        await client.post(
+            "/users",
+            json={"username": "alice", "password": "x", "role": "user"},
+        )
+        await client.post(
+            "/places", json={"name": "room", "allow_partial_booking": True}
+        )
+        response = await client.post(
+            "/bookings",
+            json={
+                "user_id": 1,
+                "place_id": 1,
+                "start_time": "2030-01-01T08:00:00",
+                "end_time": "2030-01-01T10:00:00",
+                "booked_area": "full",
+            },
+        )
+        assert response.status_code == 201
+        booking = response.json()
+
+        for field in ("start_time", "end_time", "booked_area", "status"):
+            response = await client.put(
+                f"/bookings/{booking['id']}", json={field: None}
+            )
+            assert response.status_code == 422, field
+
+        response = await client.put(
+            f"/bookings/{booking['id']}", json={"end_time": "2030-01-01T11:00"}
+        )
+        assert response.status_code == 200
+        assert response.json()["start_time"] == booking["start_time"]
+
+    run_with_client(test)
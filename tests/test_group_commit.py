@@ -0,0 +1,172 @@
+"""Tests for the group commit writer."""
+
+import asyncio
+
+import pytest
+from database import engine
+from database.group_commit import GroupCommitWriter
+from database.models.user import User, UserRole
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def add_user(username: str):
+    """
+    Make a write adding a user.
+
+    Parameters
+    ----------
+    username : str
+        The username.
+
+    Returns
+    -------
+    Write[User]
+        The write, returning the added user.
+    """
+
+    async def write(session: AsyncSession) -> User:
+        """Add the user."""
+        user = User(username=username, password_hash="x", role=UserRole.user)
+        session.add(user)
+        await session.flush()
+        return user
+
+    return write
+
+
+async def usernames(session: AsyncSession) -> list[str]:
+    """
+    Read the stored usernames.
+
+    Parameters
+    ----------
+    session : AsyncSession
+        The database session.
+
+    Returns
+    -------
+    list[str]
+        The usernames, sorted.
+    """
+    return sorted(await session.exec(select(User.username)))
+
+
+def test_writes_are_committed_together(run_in_session) -> None:
+    """Concurrent writes share one batch and each gets its own result."""
+
+    async def test(session: AsyncSession) -> None:
+        writer = GroupCommitWriter(engine, max_batch=10, max_wait=0.05)
+        users = await asyncio.gather(
+            *(writer.submit(add_user(f"user{number}")) for number in range(5))
+        )
+        await writer.close()
+
+        assert [user.username for user in users] == [
+            f"user{number}" for number in range(5)
+        ]
+        assert len({user.id for user in users}) == 5
+        assert await usernames(session) == [
+            f"user{number}" for number in range(5)
+        ]
+
+    run_in_session(test)
+
+
+def test_failed_write_leaves_its_batch_committed(run_in_session) -> None:
+    """A write that raises only fails its own caller."""
+
+    async def test(session: AsyncSession) -> None:
+        writer = GroupCommitWriter(engine, max_batch=10, max_wait=0.05)
+        await writer.submit(add_user("taken"))
+
+        results = await asyncio.gather(
+            writer.submit(add_user("first")),
+            writer.submit(add_user("taken")),
+            writer.submit(add_user("last")),
+            return_exceptions=True,
+        )
+        await writer.close()
+
+        assert isinstance(results[1], IntegrityError)
+        assert results[0].username == "first"
+        assert results[2].username == "last"
+        assert await usernames(session) == ["first", "last", "taken"]
+
+    run_in_session(test)
+
+
+def test_batches_are_capped(run_in_session) -> None:
+    """More writes than fit in a batch are committed in several."""
+
+    async def test(session: AsyncSession) -> None:
+        writer = GroupCommitWriter(engine, max_batch=2, max_wait=0.05)
+        batches = []
+        apply = writer._apply
+
+        async def counting_apply(batch: list) -> None:
+            """Note the size of each batch."""
+            batches.append(len(batch))
+            await apply(batch)
+
+        writer._apply = counting_apply
+        await asyncio.gather(
+            *(writer.submit(add_user(f"user{number}")) for number in range(5))
+        )
+        await writer.close()
+
+        assert batches == [2, 2, 1]
+        assert len(await usernames(session)) == 5
+
+    run_in_session(test)
+
+
+def test_failed_commit_fails_the_whole_batch(run_in_session) -> None:
+    """If the commit fails, every caller of the batch gets the error."""
+
+    async def test(session: AsyncSession) -> None:
+        writer = GroupCommitWriter(engine, max_batch=10, max_wait=0.05)
+
+        async def break_commit(session: AsyncSession) -> None:
+            """Make the batch's commit fail."""
+            session.sync_session.commit = broken_commit
+
+        def broken_commit() -> None:
+            """Fail like a commit that can not be written."""
+            raise RuntimeError("disk full")
+
+        results = await asyncio.gather(
+            writer.submit(add_user("lost")),
+            writer.submit(break_commit),
+            return_exceptions=True,
+        )
+        await writer.close()
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert await usernames(session) == []
+
+    run_in_session(test)
+
+
+def test_writer_restarts_after_close(run_in_session) -> None:
+    """A closed writer starts again on the next write."""
+
+    async def test(session: AsyncSession) -> None:
+        writer = GroupCommitWriter(engine, max_batch=10, max_wait=0)
+        await writer.submit(add_user("before"))
+        await writer.close()
+        await writer.submit(add_user("after"))
+        await writer.close()
+
+        assert await usernames(session) == ["after", "before"]
+
+    run_in_session(test)
+
+
+@pytest.mark.parametrize("max_batch", [0, -1])
+def test_batches_hold_at_least_one_write(max_batch: int) -> None:
+    """A batch size below one is raised to one."""
+    writer = GroupCommitWriter(engine, max_batch=max_batch, max_wait=0)
+
+    assert writer.max_batch == 1
@@ -0,0 +1,209 @@
+"""Tests for the log analytics command line tool."""
+
+import argparse
+import json
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from cli.logs import (
+    LogSummary,
+    log_files,
+    read_lines,
+    strptime_format,
+    summarize,
+    utc_time,
+)
+
+TIME_FORMAT = strptime_format("YYYY-MM-DD_HH:mm:ss!UTC")
+
+
+def record(time: str, level: str, function: str, message: str = "") -> str:
+    """
+    Format a log record as the file sinks write it.
+
+    Parameters
+    ----------
+    time : str
+        The time, e.g. "2030-01-01_08:00:00".
+    level : str
+        The level name.
+    function : str
+        The function that logged the record.
+    message : str, optional
+        The message, by default empty.
+
+    Returns
+    -------
+    str
+        The line, with its line ending.
+    """
+    fields = [time, "abcd1234", f"{level:<8}", "  12", "routers.users"]
+    return " │ ".join([*fields, function, message]) + "\n"
+
+
+LINES = [
+    record("2030-01-01_08:00:00", "INFO", "read_users", "Fetching"),
+    record("2030-01-01_08:00:00", "INFO", "read_users", "Fetched"),
+    record("2030-01-01_08:30:00", "ERROR", "create_user", "Failed"),
+    "Traceback (most recent call last):\n",
+    record("2030-01-01_09:15:00", "INFO", "create_user", "Created"),
+    record("2030-01-01_10:00:00", "WARNING", "read_user", "Not found"),
+]
+
+
+def test_strptime_format() -> None:
+    """Loguru tokens become ``strptime`` directives."""
+    assert TIME_FORMAT == "%Y-%m-%d_%H:%M:%S"
+    assert strptime_format("YYYY-MM-DD HH:mm:ss.SSS ZZ") == (
+        "%Y-%m-%d %H:%M:%S.%f %z"
+    )
+    assert strptime_format("100% YYYY") == "100%% %Y"
+
+
+def test_utc_time() -> None:
+    """Times with an offset are converted to naive UTC."""
+    assert utc_time("2030-01-01T10:00:00+02:00") == datetime(2030, 1, 1, 8)
+    assert utc_time("2030-01-01T10:00") == datetime(2030, 1, 1, 10)
+
+
+def test_summary_counts_levels_functions_and_buckets() -> None:
+    """Records are counted, other lines are not."""
+    summary = LogSummary(TIME_FORMAT, timedelta(hours=1))
+    summary.add_lines(line.encode() for line in LINES)
+
+    report = summary.report(top=10)
+
+    assert report["records"] == 5
+    assert report["errors"] == 1
+    assert report["other_lines"] == 1
+    assert report["levels"] == {"INFO": 3, "ERROR": 1, "WARNING": 1}
+    assert report["first"] == "2030-01-01T08:00:00"
+    assert report["last"] == "2030-01-01T10:00:00"
+    # The functions with errors first, then by records
+    assert [row["function"] for row in report["functions"]] == [
+        "routers.users:create_user",
+        "routers.users:read_users",
+        "routers.users:read_user",
+    ]
+    assert report["functions"][0]["error_rate"] == 0.5
+    assert report["histogram"] == [
+        {"start": "2030-01-01T08:00:00", "records": 3, "errors": 1},
+        {"start": "2030-01-01T09:00:00", "records": 1, "errors": 0},
+        {"start": "2030-01-01T10:00:00", "records": 1, "errors": 0},
+    ]
+    assert len(summary.report(top=1)["functions"]) == 1
+
+
+def test_summary_time_range() -> None:
+    """Records outside the range are skipped, the end is exclusive."""
+    summary = LogSummary(
+        TIME_FORMAT,
+        timedelta(days=1),
+        since=datetime(2030, 1, 1, 8, 30),
+        until=datetime(2030, 1, 1, 10),
+    )
+    summary.add_lines(line.encode() for line in LINES)
+
+    report = summary.report(top=10)
+
+    assert report["records"] == 2
+    assert report["skipped"] == 3
+    assert report["histogram"] == [
+        {"start": "2030-01-01T00:00:00", "records": 2, "errors": 1}
+    ]
+
+
+def test_empty_summary() -> None:
+    """A summary without records reports zeros."""
+    report = LogSummary(TIME_FORMAT, timedelta(hours=1)).report(top=10)
+
+    assert report["records"] == 0
+    assert report["error_rate"] == 0.0
+    assert report["first"] is None
+    assert report["histogram"] == []
+
+
+def test_files_are_read_oldest_first(tmp_path: Path) -> None:
+    """Rotated archives and files come before the current file."""
+    current = tmp_path / "debug.log"
+    current.write_text(LINES[4])
+    archive = tmp_path / "debug.2030-01-01_08-00-00_000000.log.zip"
+    with zipfile.ZipFile(archive, "w") as zipped:
+        zipped.writestr(
+            "debug.2030-01-01_08-00-00_000000.log", "".join(LINES[:4])
+        )
+    rotated = tmp_path / "debug.2030-01-01_09-00-00_000000.log"
+    rotated.write_text("")
+    (tmp_path / "error.log").write_text(LINES[2])
+
+    files = log_files(tmp_path, "debug")
+
+    assert files == [archive, rotated, current]
+    assert [len(list(read_lines(path))) for path in files] == [4, 0, 1]
+    assert list(read_lines(current)) == [LINES[4].encode()]
+
+
+def summary_args(paths: list[Path], **options: object) -> argparse.Namespace:
+    """
+    Build the arguments of the summary command.
+
+    Parameters
+    ----------
+    paths : list[Path]
+        The log files or directories.
+    **options : object
+        Options to override.
+
+    Returns
+    -------
+    argparse.Namespace
+        The arguments, with the command's defaults.
+    """
+    defaults = {
+        "sink": "debug",
+        "since": None,
+        "until": None,
+        "bucket": "hour",
+        "top": 10,
+        "json": True,
+    }
+    return argparse.Namespace(paths=paths, **(defaults | options))
+
+
+def test_summarize_prints_json(
+    tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    """The summary of a directory is printed as JSON."""
+    (tmp_path / "debug.log").write_text("".join(LINES))
+
+    assert summarize(summary_args([tmp_path])) == 0
+    report = json.loads(capsys.readouterr().out)
+
+    assert report["records"] == 5
+    assert report["files"] == [str(tmp_path / "debug.log")]
+
+
+def test_summarize_prints_text(
+    tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    """The summary is printed as tables by default."""
+    path = tmp_path / "debug.log"
+    path.write_text("".join(LINES))
+
+    assert summarize(summary_args([path], json=False)) == 0
+    output = capsys.readouterr().out
+
+    assert output.startswith("5 records from 2030-01-01T08:00:00")
+    assert "routers.users:create_user" in output
+
+
+def test_summarize_without_logs(
+    tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    """Missing paths and empty directories are reported, not raised."""
+    assert summarize(summary_args([tmp_path / "missing"])) == 1
+    assert "does not exist" in capsys.readouterr().err
+    assert summarize(summary_args([tmp_path])) == 1
+    assert "No debug log files found" in capsys.readouterr().err
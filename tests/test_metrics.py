@@ -0,0 +1,45 @@
+"""Tests for the SQL statement metrics."""
+
+import pytest
+from database.metrics import (
+    instrument,
+    normalise,
+    statement_duration,
+    statement_errors,
+)
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+
+def test_normalise_counts_values_together() -> None:
+    """Statements differing only in their values share a shape."""
+    assert normalise("SELECT *  FROM t\n WHERE a = 'x' AND b = 12") == (
+        "SELECT * FROM t WHERE a = ? AND b = ?"
+    )
+    assert normalise("SELECT * FROM t WHERE id IN (?, ?, ?)") == (
+        "SELECT * FROM t WHERE id IN (?, ...)"
+    )
+    assert normalise("INSERT INTO t VALUES (?, ?), (?, ?), (?, ?)") == (
+        "INSERT INTO t VALUES (?, ...), ..."
+    )
+
+
+def test_failed_statements_are_recorded() -> None:
+    """A statement that raises is timed, counted and not left pending."""
+    engine = create_engine("sqlite://")
+    instrument(engine, max_statements=1000, pool="test")
+    failing = ("SELECT * FROM missing_metrics_table",)
+    working = ("SELECT ? AS metrics_test",)
+
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text(failing[0]))
+        connection.execute(text("SELECT 1 AS metrics_test"))
+
+        assert connection.info["statement_started"] == {}
+    engine.dispose()
+
+    assert failing in statement_duration
+    assert failing in statement_errors
+    assert working in statement_duration
+    assert working not in statement_errors
@@ -0,0 +1,166 @@
+"""Tests for the per-slot occupancy and the index's loaded history."""
+
+from datetime import UTC, date, datetime, time, timedelta
+
+from database.cache.availability import AvailabilityIndex, PlaceAvailability
+from database.cache.occupancy import Occupancy
+from database.models.booking import BookedArea, Booking, Status
+from database.models.booking_series import BookingSeries, Frequency
+from database.models.place import Place
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+DAY = date(2030, 1, 1)
+
+
+def at(hour: int, minute: int = 0, day: date = DAY) -> datetime:
+    """
+    Get a point in time on a day.
+
+    Parameters
+    ----------
+    hour : int
+        The hour.
+    minute : int, optional
+        The minute, by default 0.
+    day : date, optional
+        The day, by default ``DAY``.
+
+    Returns
+    -------
+    datetime
+        The point in time.
+    """
+    return datetime.combine(day, time(hour, minute))
+
+
+def test_slots_hold_the_peak_of_partly_used_slots() -> None:
+    """A slot used for part of its length holds its peak usage."""
+    occupancy = Occupancy(slot_minutes=60)
+    occupancy.refresh(
+        DAY,
+        [
+            (at(0), at(8, 30), 0),
+            (at(8, 30), at(9), 2),
+            (at(9), at(10, 15), 1),
+            (at(10, 15), at(0, day=DAY + timedelta(days=1)), 0),
+        ],
+    )
+
+    slots = occupancy.get(DAY)
+    assert isinstance(slots, bytearray)
+    assert len(slots) == 24
+    assert list(slots[7:12]) == [0, 2, 1, 1, 0]
+    assert occupancy.read(DAY, DAY) == [(DAY, "0" * 8 + "211" + "0" * 13)]
+
+
+def test_empty_days_are_not_stored() -> None:
+    """A day that becomes empty is dropped and read as all zeros."""
+    occupancy = Occupancy(slot_minutes=15)
+    occupancy.refresh(DAY, [(at(8), at(9), 4)])
+    occupancy.refresh(DAY, [(at(0), at(23, 59), 0)])
+
+    assert occupancy.get(DAY) is None
+    assert occupancy.read(DAY, DAY + timedelta(days=1)) == [
+        (DAY, "0" * 96),
+        (DAY + timedelta(days=1), "0" * 96),
+    ]
+
+
+def test_days_of_an_interval_exclude_its_end() -> None:
+    """An interval ending at midnight does not touch the next day."""
+    occupancy = Occupancy(slot_minutes=15)
+    next_day = DAY + timedelta(days=1)
+
+    assert occupancy.days(at(22), at(0, day=next_day)) == [DAY]
+    assert occupancy.days(at(22), at(1, day=next_day)) == [DAY, next_day]
+
+
+def test_slots_must_divide_a_day() -> None:
+    """A slot length that does not divide a day is rejected."""
+    for minutes in (0, -15, 7):
+        try:
+            Occupancy(slot_minutes=minutes)
+        except ValueError:
+            continue
+        raise AssertionError(f"{minutes} minutes accepted")
+
+
+def test_place_keeps_occupancy_in_step() -> None:
+    """Adding and removing bookings recomputes the days they touch."""
+    place = PlaceAvailability(allow_partial_booking=True, slot_minutes=60)
+    next_day = DAY + timedelta(days=1)
+    place.add(1, at(23), at(1, day=next_day), BookedArea.half)
+    place.add(2, at(23, 30), at(0, day=next_day), BookedArea.quarter)
+
+    assert place.occupancy.get(DAY)[23] == 3
+    assert place.occupancy.get(next_day)[0] == 2
+
+    place.remove(1)
+
+    assert place.occupancy.get(DAY)[23] == 1
+    assert place.occupancy.get(next_day) is None
+
+
+def test_rebuild_loads_past_days(run_in_session) -> None:
+    """Bookings and series of the recent past are loaded, older ones not."""
+    today = datetime.now(UTC).date()
+    yesterday = today - timedelta(days=1)
+    old = today - timedelta(days=28)
+
+    async def test(session: AsyncSession) -> None:
+        session.add(Place(id=1, name="room", allow_partial_booking=True))
+        session.add(
+            Booking(
+                user_id=1,
+                place_id=1,
+                start_time=at(8, day=yesterday),
+                end_time=at(10, day=yesterday),
+                booked_area=BookedArea.half,
+                status=Status.active,
+            )
+        )
+        session.add(
+            BookingSeries(
+                user_id=1,
+                place_id=1,
+                start_time=at(12, day=old),
+                end_time=at(13, day=old),
+                booked_area=BookedArea.quarter,
+                frequency=Frequency.weekly,
+                until=today,
+                status=Status.active,
+            )
+        )
+        await session.commit()
+        index = AvailabilityIndex(slot_minutes=60, stripes=4, history_days=7)
+        await index.rebuild(session)
+
+        assert index.since == datetime.combine(
+            today - timedelta(days=7), time()
+        )
+        occupancy = index[1].occupancy
+        assert occupancy.get(yesterday)[8:10] == b"\x02\x02"
+        # The week old occurrence is loaded, the older ones are not
+        week_ago = old + timedelta(weeks=3)
+        assert week_ago >= index.since.date()
+        assert occupancy.get(week_ago)[12] == 1
+        assert occupancy.get(old) is None
+
+        # A window reaching before the loaded history is read from the
+        # database instead
+        place = await session.get(Place, 1)
+        availability = await index.window(
+            session,
+            place,
+            at(0, day=old),
+            at(0, day=today + timedelta(days=1)),
+        )
+        assert availability is not index[1]
+        assert availability.occupancy.get(old)[12] == 1
+        assert availability.occupancy.get(yesterday)[8:10] == b"\x02\x02"
+        recent = await index.window(
+            session, place, at(0, day=yesterday), at(0, day=today)
+        )
+        assert recent is index[1]
+
+    run_in_session(test)
@@ -0,0 +1,60 @@
+"""Tests for password hashing."""
+
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+from utils.passwords import PasswordHasher
+
+
+@pytest.fixture
+def hasher() -> Iterator[PasswordHasher]:
+    """
+    Get a cheap hasher running in threads.
+
+    Yields
+    ------
+    PasswordHasher
+        The hasher, shut down after the test.
+    """
+    hasher = PasswordHasher(n=16, r=1, p=1, workers=1, executor="thread")
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_verifies(hasher: PasswordHasher) -> None:
+    """A hash verifies its own password only."""
+    encoded = asyncio.run(hasher.hash("secret"))
+
+    assert encoded.startswith("scrypt$16$1$1$")
+    assert asyncio.run(hasher.verify("secret", encoded))
+    assert not asyncio.run(hasher.verify("Secret", encoded))
+
+
+def test_hash_with_other_costs_verifies(hasher: PasswordHasher) -> None:
+    """A hash keeps verifying after the cost of new hashes changes."""
+    encoded = asyncio.run(hasher.hash("secret"))
+    hasher.n = 32
+
+    assert asyncio.run(hasher.verify("secret", encoded))
+
+
+@pytest.mark.parametrize(
+    "encoded",
+    [
+        "",
+        "not a hash",
+        "bcrypt$16$1$1$c2FsdA==$a2V5",
+        "scrypt$16$1$1$c2FsdA==",
+        "scrypt$x$1$1$c2FsdA==$a2V5",
+        "scrypt$15$1$1$c2FsdA==$a2V5",
+        "scrypt$16$1$1$not base64!$a2V5",
+        "scrypt$16$1$1$c2FsdA==$a2V",
+        "scrypt$16$1$1$c2FsdA==$",
+    ],
+)
+def test_malformed_hash_does_not_verify(
+    hasher: PasswordHasher, encoded: str
+) -> None:
+    """A malformed hash is a failed check, not an error."""
+    assert not asyncio.run(hasher.verify("secret", encoded))
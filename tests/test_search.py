@@ -0,0 +1,149 @@
+"""Tests for the vectorised free slot search."""
+
+from datetime import datetime, timedelta
+
+from database.cache.availability import AvailabilityIndex
+from database.cache.search import occupancy_matrix, search_slots
+from database.models.booking import BookedArea
+from database.models.place import Place
+
+
+def at(hour: int, minute: int = 0, day: int = 1) -> datetime:
+    """
+    Get a point in time in January 2030.
+
+    Parameters
+    ----------
+    hour : int
+        The hour.
+    minute : int, optional
+        The minute, by default 0.
+    day : int, optional
+        The day of the month, by default 1.
+
+    Returns
+    -------
+    datetime
+        The point in time.
+    """
+    return datetime(2030, 1, day, hour, minute)
+
+
+def make_index() -> AvailabilityIndex:
+    """
+    Build an index of a shared and an unshared place.
+
+    Place 1 can be shared and is half booked from 9 to 10. Place 2 can not
+    be shared and is booked from 8 to 9:30.
+
+    Returns
+    -------
+    AvailabilityIndex
+        The index.
+    """
+    index = AvailabilityIndex(slot_minutes=30, stripes=4, history_days=0)
+    shared = index.register_place(
+        Place(id=1, name="shared", allow_partial_booking=True)
+    )
+    unshared = index.register_place(
+        Place(id=2, name="unshared", allow_partial_booking=False)
+    )
+    shared.add(1, at(9), at(10), BookedArea.half)
+    unshared.add(2, at(8), at(9, 30), BookedArea.quarter)
+    return index
+
+
+def test_matrix_rows_are_places_and_columns_slots() -> None:
+    """Each place is one row of consecutive days of slots."""
+    index = make_index()
+    places = [availability for _, availability in index.items()]
+
+    matrix = occupancy_matrix(places, at(0).date(), 2)
+
+    assert matrix.shape == (2, 96)
+    assert list(matrix[0, 17:21]) == [0, 2, 2, 0]
+    assert list(matrix[1, 15:20]) == [0, 4, 4, 4, 0]
+    assert not matrix[:, 48:].any()
+
+
+def test_search_orders_by_start_then_place() -> None:
+    """Candidates come earliest first, then by place ID."""
+    found = search_slots(
+        make_index(),
+        at(8),
+        at(11),
+        timedelta(hours=1),
+        BookedArea.full,
+        limit=10,
+    )
+
+    assert found == [
+        (1, at(8)),
+        (2, at(9, 30)),
+        (1, at(10)),
+        (2, at(10)),
+    ]
+
+
+def test_search_fits_partial_bookings_beside_others() -> None:
+    """A shared place fits a partial booking next to another one."""
+    found = search_slots(
+        make_index(),
+        at(9),
+        at(10),
+        timedelta(hours=1),
+        BookedArea.half,
+        limit=10,
+    )
+
+    assert found == [(1, at(9))]
+
+
+def test_search_matches_fits() -> None:
+    """Every candidate fits and every fitting slot start is found."""
+    index = make_index()
+    duration = timedelta(minutes=45)
+    for area in BookedArea:
+        found = set(
+            search_slots(index, at(7), at(12), duration, area, limit=100)
+        )
+        expected = {
+            (place_id, start)
+            for place_id, availability in index.items()
+            for start in (
+                at(7) + step * timedelta(minutes=30) for step in range(10)
+            )
+            if start + duration <= at(12)
+            # Slots hold their peak, so check whole slots
+            and availability.fits(start, start + timedelta(hours=1), area)
+        }
+        assert found == expected
+
+
+def test_search_stops_at_the_limit() -> None:
+    """Only the earliest candidates up to the limit are returned."""
+    found = search_slots(
+        make_index(),
+        at(0),
+        at(0, day=2),
+        timedelta(minutes=30),
+        BookedArea.quarter,
+        limit=3,
+    )
+
+    assert found == [(1, at(0)), (2, at(0)), (1, at(0, 30))]
+
+
+def test_search_window_shorter_than_the_booking() -> None:
+    """A window too short for the booking has no candidates."""
+    assert (
+        search_slots(
+            make_index(),
+            at(8),
+            at(8, 30),
+            timedelta(hours=1),
+            BookedArea.quarter,
+            limit=10,
+        )
+        == []
+    )
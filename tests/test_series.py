@@ -0,0 +1,144 @@
+"""Tests for booking series and their expansion into occurrences."""
+
+from datetime import UTC, date, datetime, time, timedelta
+
+import pytest
+from controllers.series_controller import create_series_controller
+from database.cache.availability import SeriesConflictError
+from database.models.booking import BookedArea, Booking, Status
+from database.models.booking_series import BookingSeries, Frequency
+from database.models.place import Place
+from database.recurrence import count_occurrences, occurrences
+from schemas.bookings import BookingSeriesCreate
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+START = datetime(2030, 1, 7, 9)
+
+
+def make_series(
+    frequency: Frequency = Frequency.weekly,
+    until: date = date(2030, 2, 4),
+    exceptions: list[str] | None = None,
+) -> BookingSeries:
+    """
+    Make a series of one hour occurrences from Monday 7 January 2030.
+
+    Parameters
+    ----------
+    frequency : Frequency, optional
+        The recurrence, by default weekly.
+    until : date, optional
+        The last day, by default Monday 4 February 2030.
+    exceptions : list[str] | None, optional
+        The ISO days to skip, by default none.
+
+    Returns
+    -------
+    BookingSeries
+        The series.
+    """
+    return BookingSeries(
+        id=1,
+        user_id=1,
+        place_id=1,
+        start_time=START,
+        end_time=START + timedelta(hours=1),
+        booked_area=BookedArea.full,
+        frequency=frequency,
+        until=until,
+        exceptions=exceptions or [],
+        status=Status.active,
+    )
+
+
+def test_occurrences_include_until() -> None:
+    """An occurrence starting on the last day is included."""
+    found = list(occurrences(make_series()))
+
+    assert [begin.day for _, begin, _ in found] == [7, 14, 21, 28, 4]
+    assert found[-1][1].date() == date(2030, 2, 4)
+    assert len(list(occurrences(make_series(until=date(2030, 1, 28))))) == 4
+    assert count_occurrences(START, date(2030, 2, 4), Frequency.weekly) == 5
+    assert count_occurrences(START, date(2030, 1, 6), Frequency.weekly) == 0
+
+
+def test_biweekly_occurrences() -> None:
+    """A biweekly series skips every other week."""
+    found = list(occurrences(make_series(Frequency.biweekly)))
+
+    assert [(number, begin.day) for number, begin, _ in found] == [
+        (0, 7),
+        (1, 21),
+        (2, 4),
+    ]
+
+
+def test_exceptions_are_skipped_but_counted() -> None:
+    """Skipped days keep the numbering of the later occurrences."""
+    series = make_series(exceptions=["2030-01-14", "2030-02-04"])
+
+    found = list(occurrences(series))
+
+    assert [(number, begin.day) for number, begin, _ in found] == [
+        (0, 7),
+        (2, 21),
+        (3, 28),
+    ]
+
+
+def test_occurrences_in_a_window() -> None:
+    """Occurrences outside the window are jumped over."""
+    series = make_series(exceptions=["2030-01-21"])
+
+    found = list(
+        occurrences(
+            series,
+            START + timedelta(days=7, minutes=30),
+            datetime(2030, 1, 28, 9),
+        )
+    )
+
+    # The one ending inside the window is included, the one starting at
+    # its end is not
+    assert [(number, begin.day) for number, begin, _ in found] == [(1, 14)]
+
+
+def test_create_series_checks_stored_bookings(run_in_session) -> None:
+    """A series clashing with a booking the index has not seen fails."""
+    monday = datetime.now(UTC).date() + timedelta(days=7)
+    start = datetime.combine(monday, time(9))
+
+    async def test(session: AsyncSession) -> None:
+        session.add(Place(id=1, name="room", allow_partial_booking=False))
+        # Stored, but never added to the in-memory index, as by a worker
+        # that has not counted its change yet
+        session.add(
+            Booking(
+                user_id=1,
+                place_id=1,
+                start_time=start + timedelta(weeks=2, minutes=30),
+                end_time=start + timedelta(weeks=2, hours=2),
+                booked_area=BookedArea.quarter,
+                status=Status.active,
+            )
+        )
+        await session.commit()
+        series = BookingSeriesCreate(
+            user_id=1,
+            place_id=1,
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            booked_area=BookedArea.quarter,
+            frequency=Frequency.weekly,
+            until=monday + timedelta(weeks=4),
+        )
+
+        with pytest.raises(SeriesConflictError) as raised:
+            await create_series_controller(series, session)
+        assert raised.value.clashes == [monday + timedelta(weeks=2)]
+
+        series.exceptions = [monday + timedelta(weeks=2)]
+        created = await create_series_controller(series, session)
+        assert created.id is not None
+
+    run_in_session(test)
@@ -0,0 +1,140 @@
+"""Tests for the username prefix index."""
+
+import asyncio
+
+from database import engine
+from database.cache.usernames import UsernameIndex
+from database.models.user import User, UserRole
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def names(found: list[tuple[int, str, UserRole]]) -> list[str]:
+    """
+    Get the usernames of search results.
+
+    Parameters
+    ----------
+    found : list[tuple[int, str, UserRole]]
+        The search results.
+
+    Returns
+    -------
+    list[str]
+        The usernames, in order.
+    """
+    return [username for _, username, _ in found]
+
+
+def make_index() -> UsernameIndex:
+    """
+    Build an index of a few users.
+
+    Returns
+    -------
+    UsernameIndex
+        The index.
+    """
+    index = UsernameIndex(stripes=4)
+    index.add(1, "bob", UserRole.user)
+    index.add(2, "Alice", UserRole.admin)
+    index.add(3, "alfred", UserRole.user)
+    index.add(4, "ALBERT", UserRole.leader)
+    return index
+
+
+def test_prefix_ignores_case() -> None:
+    """Any case of the prefix finds any case of the username."""
+    index = make_index()
+
+    assert names(index.search("al", 10)) == ["ALBERT", "alfred", "Alice"]
+    assert names(index.search("AL", 10)) == ["ALBERT", "alfred", "Alice"]
+    assert names(index.search("Alf", 10)) == ["alfred"]
+    assert index.search("c", 10) == []
+    assert index.search("alfreds", 10) == []
+
+
+def test_limit_and_role() -> None:
+    """The role filters before the limit is applied."""
+    index = make_index()
+
+    assert names(index.search("a", 2)) == ["ALBERT", "alfred"]
+    assert names(index.search("a", 1, UserRole.admin)) == ["Alice"]
+    assert index.search("b", 10, UserRole.admin) == []
+
+
+def test_rename_and_role_change() -> None:
+    """Adding a known user again replaces its username and role."""
+    index = make_index()
+    index.add(3, "carol", UserRole.member)
+
+    assert len(index) == 4
+    assert names(index.search("al", 10)) == ["ALBERT", "Alice"]
+    assert index.search("c", 10) == [(3, "carol", UserRole.member)]
+
+
+def test_username_freed_by_a_stale_user() -> None:
+    """A username taken over from a user not yet reloaded moves over."""
+    index = make_index()
+    # User 1 was renamed by another process, and user 5 took its name
+    index._add(5, "bob", UserRole.admin)
+
+    assert index.search("bob", 10) == [(5, "bob", UserRole.admin)]
+    assert len(index) == 4
+    assert index._keys == sorted(index._keys)
+
+
+def test_sync_reloads_stale_stripes(run_in_session) -> None:
+    """Only users in stripes changed elsewhere are reloaded."""
+
+    async def test(session: AsyncSession) -> None:
+        for user_id, username in ((1, "one"), (2, "two"), (5, "five")):
+            session.add(
+                User(
+                    id=user_id,
+                    username=username,
+                    password_hash="x",
+                    role=UserRole.user,
+                )
+            )
+        await session.commit()
+        index = UsernameIndex(stripes=4)
+        await index.rebuild(session)
+        assert names(index.search("", 10)) == ["five", "one", "two"]
+
+        # Renamed by another process, which counts the change
+        user = await session.get(User, 5)
+        user.username = "fifth"
+        await session.commit()
+        index.generations.bump(index.generations.stripe(5))
+        async with AsyncSession(engine) as other:
+            syncing = asyncio.create_task(index.sync(other))
+            # Let the sync start reading, then search meanwhile
+            await asyncio.sleep(0)
+            assert not syncing.done()
+            assert names(index.search("f", 10)) == ["five"]
+            await syncing
+
+        assert names(index.search("f", 10)) == ["fifth"]
+        assert len(index) == 3
+
+    run_in_session(test)
+
+
+def test_load_new_finds_uncounted_users(run_in_session) -> None:
+    """Users added without counting the change are found by their IDs."""
+
+    async def test(session: AsyncSession) -> None:
+        index = UsernameIndex(stripes=4)
+        await index.rebuild(session)
+        assert not await index.load_new(session)
+
+        session.add(
+            User(username="new", password_hash="x", role=UserRole.user)
+        )
+        await session.commit()
+
+        assert await index.load_new(session)
+        assert names(index.search("n", 10)) == ["new"]
+        assert not await index.load_new(session)
+
+    run_in_session(test)
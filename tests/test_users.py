@@ -0,0 +1,94 @@
+"""Tests for the users endpoints."""
+
+import httpx
+
+
+async def create_user(client: httpx.AsyncClient, username: str) -> dict:
+    """
+    Create a user through the API.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        The client bound to the app.
+    username : str
+        The username.
+
+    Returns
+    -------
+    dict
+        The created user.
+    """
+    response = await client.post(
+        "/users",
+        json={"username": username, "password": "secret", "role": "user"},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_rename_to_taken_username_is_rejected(run_with_client) -> None:
+    """Renaming a user to a taken username is a client error."""
+
+    async def test(client: httpx.AsyncClient) -> None:
+        await create_user(client, "alice")
+        bob = await create_user(client, "bob")
+
+        response = await client.put(
+            f"/users/{bob['id']}", json={"username": "alice"}
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Username already exists"
+        response = await client.get(f"/users/{bob['id']}")
+        assert response.json()["username"] == "bob"
+        response = await client.get("/users", params={"q": "b"})
+        assert [user["username"] for user in response.json()] == ["bob"]
+
+    run_with_client(test)
+
+
+def test_create_taken_username_is_rejected(run_with_client) -> None:
+    """Creating a user with a taken username is a client error."""
+
+    async def test(client: httpx.AsyncClient) -> None:
+        await create_user(client, "alice")
+
+        response = await client.post(
+            "/users",
+            json={"username": "alice", "password": "x", "role": "user"},
+        )
+
+        assert response.status_code == 400
+
+    run_with_client(test)
+
+
+def test_null_password_is_rejected(run_with_client) -> None:
+    """A null password is invalid, not a server error."""
+
+    async def test(client: httpx.AsyncClient) -> None:
+        alice = await create_user(client, "alice")
+
+        response = await client.put(
+            f"/users/{alice['id']}", json={"password": None}
+        )
+
+        assert response.status_code == 422
+
+    run_with_client(test)
+
+
+def test_null_username_or_role_is_rejected(run_with_client) -> None:
+    """A null username or role is invalid, not a taken username."""
+
+    async def test(client: httpx.AsyncClient) -> None:
+        alice = await create_user(client, "alice")
+
+        for field in ("username", "role"):
+            response = await client.put(
+                f"/users/{alice['id']}", json={field: None}
+            )
+            assert response.status_code == 422, field
+
+    run_with_client(test)
@@ -0,0 +1,94 @@
+"""Tests for the row version cache behind the users' ETags."""
+
+import sqlite3
+
+import httpx
+from database.cache.versions import VersionCache
+
+
+def test_versions_only_grow() -> None:
+    """A stale read can not replace a newer version."""
+    cache = VersionCache(max_size=10)
+    cache.set(1, 3)
+    cache.set(1, 2)
+
+    assert cache.get(1) == 3
+    assert cache.get(2) is None
+
+
+def test_least_recently_used_rows_are_evicted() -> None:
+    """Beyond the maximum size, the least recently used row is dropped."""
+    cache = VersionCache(max_size=2)
+    cache.set(1, 1)
+    cache.set(2, 1)
+    cache.get(1)
+    cache.set(3, 1)
+
+    assert cache.get(1) == 1
+    assert cache.get(2) is None
+    assert cache.get(3) == 1
+
+
+def test_changes_move_the_collection_tag() -> None:
+    """Every write or touch gives the collection a new tag."""
+    cache = VersionCache(max_size=10)
+    tags = [cache.collection_tag()]
+    cache.changed(1, 2)
+    tags.append(cache.collection_tag())
+    cache.touch()
+    tags.append(cache.collection_tag())
+
+    assert len(set(tags)) == 3
+    assert cache.get(1) == 2
+    assert VersionCache.row_tag(1, 2) == '"1-2"'
+
+
+def test_write_by_another_process_forgets_versions() -> None:
+    """A generation moved on elsewhere clears the cached versions."""
+    cache = VersionCache(max_size=10)
+    cache.changed(1, 2)
+    # As another worker sharing the generation would
+    cache.generations.bump(0)
+
+    assert cache.get(1) is None
+    cache.changed(2, 1)
+    assert cache.get(2) == 1
+
+
+def test_imported_users_change_the_collection(run_with_client) -> None:
+    """Users added outside the API change the ETag and are searchable."""
+    from database import url
+
+    async def test(client: httpx.AsyncClient) -> None:
+        response = await client.post(
+            "/users",
+            json={"username": "alice", "password": "x", "role": "user"},
+        )
+        assert response.status_code == 201
+        etag = (await client.get("/users")).headers["ETag"]
+        response = await client.get("/users", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        # As an import from the command line, in another process
+        with sqlite3.connect(url.database) as connection:
+            connection.execute(
+                "INSERT INTO user (username, password_hash, role) "
+                "VALUES ('imported', 'x', 'admin')"
+            )
+        connection.close()
+
+        response = await client.get("/users", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert [user["username"] for user in response.json()] == [
+            "alice",
+            "imported",
+        ]
+        response = await client.get("/users", params={"q": "IMP"})
+        assert [user["username"] for user in response.json()] == ["imported"]
+        response = await client.get(
+            "/users", params={"q": "i", "role": "admin"}
+        )
+        assert [user["username"] for user in response.json()] == ["imported"]
+
+    run_with_client(test)